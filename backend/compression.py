@@ -0,0 +1,218 @@
+"""
+HTTP response compression
+
+CompressionMiddleware compresses responses for clients that accept it,
+choosing Brotli, zstd or gzip from Accept-Encoding (q-values respected,
+ties go to br > zstd > gzip). Brotli and zstd need the optional brotli /
+zstandard packages; gzip always works. Only compressible media types of
+at least MINIMUM_SIZE bytes are compressed, at a fast level.
+
+Cached payloads (geo boundaries, TopoJSON, choropleths) are held as
+CachedBody, which compresses once per encoding at a high level and keeps
+the result, so hot responses are never recompressed. Responses that
+already carry Content-Encoding pass through the middleware untouched.
+"""
+import gzip
+import hashlib
+import threading
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Smaller bodies fit in a packet or two either way
+MINIMUM_SIZE = 1024
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/geo+json',
+    'application/vnd.kenpolimarket.columnar+json',
+    'application/vnd.mapbox-vector-tile',
+    'application/javascript',
+    'image/svg+xml',
+    'text/',
+)
+
+# Levels: (per request, cached once)
+LEVELS = {
+    'br': (4, 11),
+    'zstd': (3, 19),
+    'gzip': (6, 9),
+}
+
+
+def available_encodings() -> tuple:
+    """Encodings this server can produce, in preference order"""
+    return tuple(
+        name for name, module in (('br', brotli), ('zstd', zstandard), ('gzip', gzip))
+        if module is not None
+    )
+
+
+def negotiate_encoding(accept_encoding: str, encodings: Optional[tuple] = None) -> Optional[str]:
+    """Best encoding (of encodings, default all available) for an Accept-Encoding header, or None for identity"""
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(','):
+        coding, *params = [p.strip() for p in part.split(';')]
+        q = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if coding:
+            qualities[coding] = q
+
+    best, best_q = None, 0.0
+    for name in encodings or available_encodings():
+        q = qualities.get(name, qualities.get('*', 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(body: bytes, encoding: str, cached: bool = False) -> bytes:
+    level = LEVELS[encoding][1 if cached else 0]
+    if encoding == 'br':
+        return brotli.compress(body, quality=level)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def is_compressible(media_type: Optional[str]) -> bool:
+    if not media_type:
+        return False
+    media_type = media_type.split(';')[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CachedBody:
+    """A cached response body and its compressed forms, each produced at most once"""
+
+    def __init__(self, body, media_type: str = "application/json"):
+        self.body = body.encode() if isinstance(body, str) else body
+        self.media_type = media_type
+        self.etag = '"' + hashlib.md5(self.body).hexdigest() + '"'
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding: str) -> bytes:
+        with self._lock:
+            if encoding not in self._encoded:
+                self._encoded[encoding] = compress(self.body, encoding, cached=True)
+            return self._encoded[encoding]
+
+    def precompress(self):
+        """Compress in every available encoding now (cache warm-up)"""
+        if len(self.body) >= MINIMUM_SIZE:
+            for encoding in available_encodings():
+                self.encoded(encoding)
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Strong ETag of one form: each content-coding needs its own validator (RFC 9110)"""
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def response(self, request: Request, headers: Optional[dict] = None) -> Response:
+        """The body in the client's best encoding (304 if that form's ETag matches)"""
+        encoding = negotiate_encoding(request.headers.get('accept-encoding', ''))
+        if len(self.body) < MINIMUM_SIZE:
+            encoding = None
+        etag = self.etag_for(encoding)
+        headers = {'ETag': etag, 'Vary': 'Accept-Encoding', **(headers or {})}
+        if request.headers.get('if-none-match') == etag:
+            return Response(status_code=304, headers=headers)
+        if encoding is None:
+            return Response(content=self.body, media_type=self.media_type, headers=headers)
+        return Response(
+            content=self.encoded(encoding),
+            media_type=self.media_type,
+            headers={**headers, 'Content-Encoding': encoding}
+        )
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing buffered responses of compressible types
+
+    Streaming responses (more than one body message) are passed through
+    as they are.
+    """
+
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope.get('headers') or [])
+        encoding = negotiate_encoding(request_headers.get(b'accept-encoding', b'').decode('latin-1'))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message['type'] == 'http.response.start':
+                start = message
+                return
+            if message['type'] != 'http.response.body':
+                await send(message)
+                return
+
+            headers = {k.lower(): v for k, v in start.get('headers', [])}
+            body = message.get('body', b'')
+            if (
+                message.get('more_body', False)
+                or b'content-encoding' in headers
+                or start['status'] < 200 or start['status'] in (204, 304)
+                or len(body) < self.minimum_size
+                or not is_compressible(headers.get(b'content-type', b'').decode('latin-1'))
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            raw_headers = [
+                (k, v) for k, v in start.get('headers', [])
+                if k.lower() not in (b'content-length', b'vary', b'etag')
+            ]
+            etag = headers.get(b'etag')
+            if etag is not None:
+                # The compressed form is a different representation: give it its own validator
+                if etag.startswith(b'"') and etag.endswith(b'"'):
+                    etag = etag[:-1] + b'-' + encoding.encode() + b'"'
+                raw_headers.append((b'etag', etag))
+            vary = headers.get(b'vary', b'')
+            if b'accept-encoding' not in vary.lower():
+                vary = vary + b', Accept-Encoding' if vary else b'Accept-Encoding'
+            raw_headers += [
+                (b'content-encoding', encoding.encode()),
+                (b'content-length', str(len(compressed)).encode()),
+                (b'vary', vary),
+            ]
+            await send({**start, 'headers': raw_headers})
+            await send({'type': 'http.response.body', 'body': compressed})
+
+        await self.app(scope, receive, send_compressed)
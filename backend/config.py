@@ -41,6 +41,9 @@ class Settings(BaseSettings):
     enable_survey_plugin: bool = Field(default=True)
     enable_api_access: bool = Field(default=True)
     
+    # Map tiles
+    tile_cache_dir: str = Field(default="cache/tiles", description="On-disk cache for MVT tiles")
+    
     # Model
     model_update_interval_hours: int = Field(default=24)
     forecast_confidence_level: float = Field(default=0.90)
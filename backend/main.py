@@ -10,16 +10,26 @@ from datetime import datetime
 import os
 
 from config import settings
-from database import engine
+from database import engine, SessionLocal
 from models import Base
-from routers import forecasts, elections, counties, surveys, markets, candidates, scenarios, constituencies, wards, polling_stations, voter_demographics
+from routers import forecasts, elections, counties, surveys, markets, candidates, scenarios, constituencies, wards, polling_stations, voter_demographics, geo, tiles, maps
 from middleware import privacy_middleware, rate_limit_middleware
+from compression import CompressionMiddleware
+from spatial_index import ward_index
 
 # Note: Database tables are already created via init script
 # Base.metadata.create_all(bind=engine)  # Uncomment if needed
 
 # Initialize FastAPI app
+# orjson renders JSON several times faster than the stdlib encoder
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+
 app = FastAPI(
+    default_response_class=DefaultResponse,
     title="KenPoliMarket API",
     description="Kenya Political Forecasting & Analysis Platform",
     version="0.1.0",
@@ -53,6 +63,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Brotli/zstd/gzip per Accept-Encoding for responses of 1 KB and up
+# (cached geo/map payloads arrive already compressed and pass through)
+app.add_middleware(CompressionMiddleware)
+
 # Custom middleware
 app.middleware("http")(privacy_middleware)
 # Rate limiting disabled for development
@@ -72,6 +86,36 @@ app.include_router(polling_stations.router, prefix="/api/polling_stations", tags
 # Backwards-compatible routes using hyphenated path
 app.include_router(polling_stations.router, prefix="/api/polling-stations", tags=["polling_stations_compat"])
 app.include_router(voter_demographics.router, prefix="/api/voter-demographics", tags=["voter_demographics"])
+app.include_router(geo.router, prefix="/api")
+app.include_router(tiles.router, prefix="/api")
+app.include_router(maps.router, prefix="/api")
+
+
+@app.on_event("startup")
+def warm_geo_cache():
+    """Precompute simplified boundaries for the common zoom levels"""
+    db = SessionLocal()
+    try:
+        geo.precompute_geo_cache(db)
+    except Exception as e:
+        # Geometry may not be loaded yet; the cache then fills on first request
+        print(f"⚠️  Geo cache warm-up skipped: {e}")
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def build_ward_index():
+    """Load ward polygons into the point-in-polygon index used by /api/geo/locate"""
+    db = SessionLocal()
+    try:
+        count = ward_index.build(db, geo._data_version(db, 'wards'))
+        print(f"📍 Ward index: {count} wards")
+    except Exception as e:
+        # Lookups fall back to PostGIS until the index builds on first request
+        print(f"⚠️  Ward index skipped: {e}")
+    finally:
+        db.close()
 
 
 @app.get("/")
@@ -1,10 +1,14 @@
 """
 SQLAlchemy ORM Models for KenPoliMarket
 Maps to the PostgreSQL database schema
+
+Numeric columns load as float (asdecimal=False): shares and percentages are
+sent to clients as JSON numbers, and converting through Decimal per value
+was a large part of serializing long result lists.
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey, Text, Numeric, CheckConstraint, Boolean
-from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey, Text, Numeric, CheckConstraint, Boolean, LargeBinary
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PGUUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -22,6 +26,10 @@ class County(Base):
     code = Column(String(3), unique=True, nullable=False, index=True)
     name = Column(String(100), nullable=False)
     geometry = Column(Geometry('MULTIPOLYGON', srid=4326))
+    centroid = Column(Geometry('POINT', srid=4326))
+    label_point = Column(Geometry('POINT', srid=4326))  # ST_PointOnSurface, always inside
+    bbox = Column(ARRAY(Float))  # [min_lon, min_lat, max_lon, max_lat]
+    area_km2 = Column(Float)
     population_2019 = Column(Integer)
     registered_voters_2022 = Column(Integer)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -49,9 +57,9 @@ class CountyDemographics(Base):
     total_population = Column(Integer)
     urban_population = Column(Integer)
     rural_population = Column(Integer)
-    median_age = Column(Numeric(4, 1))
-    literacy_rate = Column(Numeric(5, 2))
-    employment_rate = Column(Numeric(5, 2))
+    median_age = Column(Numeric(4, 1, asdecimal=False))
+    literacy_rate = Column(Numeric(5, 2, asdecimal=False))
+    employment_rate = Column(Numeric(5, 2, asdecimal=False))
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -70,6 +78,10 @@ class Constituency(Base):
     code = Column(String(10), unique=True, nullable=False)
     name = Column(String(100), nullable=False)
     geometry = Column(Geometry('MULTIPOLYGON', srid=4326))
+    centroid = Column(Geometry('POINT', srid=4326))
+    label_point = Column(Geometry('POINT', srid=4326))  # ST_PointOnSurface, always inside
+    bbox = Column(ARRAY(Float))  # [min_lon, min_lat, max_lon, max_lat]
+    area_km2 = Column(Float)
     population_2019 = Column(Integer)
     registered_voters_2022 = Column(Integer)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -96,6 +108,10 @@ class Ward(Base):
     code = Column(String(20), unique=True, nullable=False)
     name = Column(String(100), nullable=False)
     geometry = Column(Geometry('MULTIPOLYGON', srid=4326))
+    centroid = Column(Geometry('POINT', srid=4326))
+    label_point = Column(Geometry('POINT', srid=4326))  # ST_PointOnSurface, always inside
+    bbox = Column(ARRAY(Float))  # [min_lon, min_lat, max_lon, max_lat]
+    area_km2 = Column(Float)
     population_2019 = Column(Integer)
     registered_voters_2022 = Column(Integer)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -307,7 +323,7 @@ class ElectionResultCounty(Base):
     rejected_votes = Column(Integer, default=0)
     total_votes_cast = Column(Integer)
     registered_voters = Column(Integer)
-    turnout_percentage = Column(Numeric(5, 2))
+    turnout_percentage = Column(Numeric(5, 2, asdecimal=False))
     source_document = Column(String(500))
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -336,7 +352,7 @@ class ElectionResultConstituency(Base):
     rejected_votes = Column(Integer, default=0)
     total_votes_cast = Column(Integer)
     registered_voters = Column(Integer)
-    turnout_percentage = Column(Numeric(5, 2))
+    turnout_percentage = Column(Numeric(5, 2, asdecimal=False))
     source_document = Column(String(500))
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -365,7 +381,7 @@ class CountyEthnicityAggregate(Base):
     census_year = Column(Integer, nullable=False)
     ethnicity_group = Column(String(100), nullable=False)
     population_count = Column(Integer, nullable=False)
-    percentage = Column(Numeric(5, 2))
+    percentage = Column(Numeric(5, 2, asdecimal=False))
     source = Column(String(200), default='KNBS 2019 Census')
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -414,11 +430,11 @@ class ForecastCounty(Base):
     forecast_run_id = Column(PGUUID(as_uuid=True), ForeignKey('forecast_runs.id', ondelete='CASCADE'))
     county_id = Column(Integer, ForeignKey('counties.id', ondelete='CASCADE'))
     candidate_id = Column(Integer, ForeignKey('candidates.id', ondelete='CASCADE'))
-    predicted_vote_share = Column(Numeric(5, 2))
-    lower_bound_90 = Column(Numeric(5, 2))
-    upper_bound_90 = Column(Numeric(5, 2))
+    predicted_vote_share = Column(Numeric(5, 2, asdecimal=False))
+    lower_bound_90 = Column(Numeric(5, 2, asdecimal=False))
+    upper_bound_90 = Column(Numeric(5, 2, asdecimal=False))
     predicted_votes = Column(Integer)
-    predicted_turnout = Column(Numeric(5, 2))
+    predicted_turnout = Column(Numeric(5, 2, asdecimal=False))
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -430,6 +446,27 @@ class ForecastCounty(Base):
         return f"<ForecastCounty(run_id={self.forecast_run_id}, county_id={self.county_id})>"
 
 
+class ForecastCountyDraws(Base):
+    """Thinned posterior vote share draws behind a ForecastCounty row"""
+    __tablename__ = "forecast_county_draws"
+
+    id = Column(Integer, primary_key=True, index=True)
+    forecast_run_id = Column(PGUUID(as_uuid=True), ForeignKey('forecast_runs.id', ondelete='CASCADE'), index=True)
+    county_id = Column(Integer, ForeignKey('counties.id', ondelete='CASCADE'))
+    candidate_id = Column(Integer, ForeignKey('candidates.id', ondelete='CASCADE'))
+    n_draws = Column(Integer, nullable=False)
+    encoding = Column(String(20), nullable=False, default='zlib-f2le')  # zlib-compressed little-endian float16
+    draws = Column(LargeBinary, nullable=False)  # Same draw order for every candidate in a county
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    county = relationship("County")
+    candidate = relationship("Candidate")
+
+    def __repr__(self):
+        return f"<ForecastCountyDraws(run_id={self.forecast_run_id}, county_id={self.county_id}, n_draws={self.n_draws})>"
+
+
 class ForecastConstituency(Base):
     """Constituency-level forecasts with uncertainty"""
     __tablename__ = "forecast_constituency"
@@ -438,11 +475,11 @@ class ForecastConstituency(Base):
     forecast_run_id = Column(String(36), ForeignKey('forecast_runs.id', ondelete='CASCADE'))
     constituency_id = Column(Integer, ForeignKey('constituencies.id', ondelete='CASCADE'))
     candidate_id = Column(Integer, ForeignKey('candidates.id', ondelete='CASCADE'))
-    predicted_vote_share = Column(Numeric(5, 2))
-    lower_bound_90 = Column(Numeric(5, 2))
-    upper_bound_90 = Column(Numeric(5, 2))
+    predicted_vote_share = Column(Numeric(5, 2, asdecimal=False))
+    lower_bound_90 = Column(Numeric(5, 2, asdecimal=False))
+    upper_bound_90 = Column(Numeric(5, 2, asdecimal=False))
     predicted_votes = Column(Integer)
-    predicted_turnout = Column(Numeric(5, 2))
+    predicted_turnout = Column(Numeric(5, 2, asdecimal=False))
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -2,7 +2,7 @@
 Elections API Router
 Endpoints for election data and results
 """
-from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, UploadFile, File
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, desc
 from typing import List, Optional, Dict, Any
@@ -13,6 +13,7 @@ import json
 import io
 from database import get_db
 from models import Election, Candidate, ElectionResultCounty, County
+from serialization import NEGOTIATED_HEADERS, json_response, tabular_response
 from schemas import (
     ElectionBaseSchema,
     ElectionDetailSchema,
@@ -150,6 +151,7 @@ async def get_election(
 @router.get("/{election_id}/results")
 async def get_election_results(
     election_id: int,
+    request: Request,
     county_code: Optional[str] = Query(None, description="Filter by county code"),
     candidate_id: Optional[int] = Query(None, description="Filter by candidate ID"),
     db: Session = Depends(get_db)
@@ -164,6 +166,10 @@ async def get_election_results(
 
     Returns:
         Election results with county and candidate details, plus summary statistics
+
+    With a columnar/Arrow/MessagePack Accept header (or ?format=), results are
+    sent column by column; election and summary stay as they are (Arrow:
+    JSON in the schema metadata).
     """
     # Verify election exists
     election = db.query(Election).filter(Election.id == election_id).first()
@@ -235,7 +241,7 @@ async def get_election_results(
             "turnout_percentage": float(result.turnout_percentage) if result.turnout_percentage else None
         })
 
-    return {
+    envelope = {
         "election": {
             "id": election.id,
             "year": election.year,
@@ -257,10 +263,14 @@ async def get_election_results(
                 }
                 for c in candidate_totals
             ]
-        },
-        "results": formatted_results
+        }
     }
 
+    response = tabular_response(request, formatted_results, envelope, rows_key="results")
+    if response is not None:
+        return response
+    return json_response({**envelope, "results": formatted_results}, headers=NEGOTIATED_HEADERS)
+
 
 @router.get("/{election_id}/candidates", response_model=List[CandidateSchema])
 async def get_election_candidates(
@@ -2,14 +2,18 @@
 Forecasts API Router
 Endpoints for accessing election forecasts
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import or_, and_
 from typing import List, Optional
 from datetime import datetime
+import zlib
+
+import numpy as np
 
 from database import get_db
-from models import ForecastRun, ForecastCounty, County, Candidate, Election
+from models import ForecastRun, ForecastCounty, ForecastCountyDraws, County, Candidate, Election
+from serialization import NEGOTIATED_HEADERS, json_response, tabular_response
 from schemas import (
     ForecastRunSchema,
     ForecastCountySchema,
@@ -124,6 +128,7 @@ async def get_forecast_run(
 @router.get("/{forecast_run_id}/counties", response_model=List[ForecastCountySchema])
 async def get_forecast_counties(
     forecast_run_id: str,
+    request: Request,
     county_code: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
@@ -132,16 +137,48 @@ async def get_forecast_counties(
 
     Query parameters:
     - county_code: Filter by specific county code
+
+    Also available as columnar JSON, Arrow IPC or MessagePack via the
+    Accept header or ?format= (see serialization.py).
     """
-    query = db.query(ForecastCounty).options(
-        joinedload(ForecastCounty.county),
-        joinedload(ForecastCounty.candidate)
+    # Plain column query: rows are built as dicts in ForecastCountySchema's
+    # shape and sent without revalidating ORM objects (see serialization.py)
+    query = db.query(
+        ForecastCounty.id, ForecastCounty.forecast_run_id, ForecastCounty.county_id,
+        ForecastCounty.candidate_id, ForecastCounty.predicted_vote_share,
+        ForecastCounty.lower_bound_90, ForecastCounty.upper_bound_90,
+        ForecastCounty.predicted_votes, ForecastCounty.predicted_turnout,
+        County.code.label('county_code'), County.name.label('county_name'),
+        County.population_2019, County.registered_voters_2022,
+        Candidate.name.label('candidate_name'), Candidate.party, Candidate.position
+    ).outerjoin(County, County.id == ForecastCounty.county_id).outerjoin(
+        Candidate, Candidate.id == ForecastCounty.candidate_id
     ).filter(ForecastCounty.forecast_run_id == forecast_run_id)
 
     if county_code:
-        query = query.join(County).filter(County.code == county_code)
-
-    forecasts = query.all()
+        query = query.filter(County.code == county_code)
+
+    forecasts = [
+        {
+            "id": r.id,
+            "forecast_run_id": str(r.forecast_run_id),
+            "county_id": r.county_id,
+            "candidate_id": r.candidate_id,
+            "predicted_vote_share": r.predicted_vote_share,
+            "lower_bound_90": r.lower_bound_90,
+            "upper_bound_90": r.upper_bound_90,
+            "predicted_votes": r.predicted_votes,
+            "predicted_turnout": r.predicted_turnout,
+            "county": {
+                "id": r.county_id, "code": r.county_code, "name": r.county_name,
+                "population_2019": r.population_2019, "registered_voters_2022": r.registered_voters_2022
+            } if r.county_code is not None else None,
+            "candidate": {
+                "id": r.candidate_id, "name": r.candidate_name, "party": r.party, "position": r.position
+            } if r.candidate_name is not None else None,
+        }
+        for r in query.all()
+    ]
 
     if not forecasts:
         raise HTTPException(
@@ -149,7 +186,100 @@ async def get_forecast_counties(
             detail=f"No forecasts found for forecast run '{forecast_run_id}'"
         )
 
-    return forecasts
+    response = tabular_response(request, forecasts)
+    if response is not None:
+        return response
+    return json_response(forecasts, headers=NEGOTIATED_HEADERS)
+
+
+def _decode_draws(row: ForecastCountyDraws) -> np.ndarray:
+    """Vote share draws (%) of a forecast_county_draws row ('zlib-f2le': zlib-compressed float16)"""
+    if row.encoding != 'zlib-f2le':
+        raise HTTPException(status_code=500, detail=f"Unsupported draws encoding '{row.encoding}'")
+    return np.frombuffer(zlib.decompress(row.draws), dtype='<f2').astype(np.float32)
+
+
+@router.get("/{forecast_run_id}/distribution")
+async def get_forecast_distribution(
+    forecast_run_id: str,
+    county_code: Optional[str] = None,
+    quantiles: str = Query("0.05,0.5,0.95", description="Comma-separated quantiles in [0, 1], e.g. 0.1,0.25,0.5,0.75,0.9"),
+    threshold: Optional[float] = Query(None, ge=0, le=100, description="Vote share (%) for exceedance probabilities"),
+    db: Session = Depends(get_db)
+):
+    """
+    Arbitrary quantiles, exceedance and win probabilities from stored posterior draws
+
+    Only available for runs stored with posterior draws (multi_candidate_forecast.py --store-draws).
+
+    Query parameters:
+    - county_code: Filter by specific county code
+    - quantiles: Quantiles of each candidate's vote share to return
+    - threshold: If set, also return P(vote share > threshold)
+    """
+    try:
+        quantile_levels = [float(q) for q in quantiles.split(',') if q.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="quantiles must be comma-separated numbers")
+    if not quantile_levels or any(q < 0 or q > 1 for q in quantile_levels):
+        raise HTTPException(status_code=400, detail="quantiles must be between 0 and 1")
+
+    query = db.query(ForecastCountyDraws).options(
+        joinedload(ForecastCountyDraws.county),
+        joinedload(ForecastCountyDraws.candidate)
+    ).filter(ForecastCountyDraws.forecast_run_id == forecast_run_id)
+
+    if county_code:
+        query = query.join(County).filter(County.code == county_code)
+
+    rows = query.order_by(ForecastCountyDraws.county_id, ForecastCountyDraws.candidate_id).all()
+
+    if not rows:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No posterior draws stored for forecast run '{forecast_run_id}'"
+        )
+
+    rows_by_county = {}
+    for row in rows:
+        rows_by_county.setdefault(row.county_id, []).append(row)
+
+    counties = []
+    for county_rows in rows_by_county.values():
+        # candidates x draws; draw k of every candidate comes from the same joint sample
+        draws = np.stack([_decode_draws(row) for row in county_rows])
+
+        quantile_values = np.quantile(draws, quantile_levels, axis=1)
+        win_probability = np.bincount(draws.argmax(axis=0), minlength=len(county_rows)) / draws.shape[1]
+        exceedance = (draws > threshold).mean(axis=1) if threshold is not None else None
+
+        counties.append({
+            'county_code': county_rows[0].county.code,
+            'county_name': county_rows[0].county.name,
+            'n_draws': int(draws.shape[1]),
+            'candidates': [
+                {
+                    'candidate_id': row.candidate_id,
+                    'candidate_name': row.candidate.name,
+                    'party': row.candidate.party,
+                    'mean': round(float(draws[i].mean()), 2),
+                    'quantiles': {
+                        str(q): round(float(quantile_values[k, i]), 2)
+                        for k, q in enumerate(quantile_levels)
+                    },
+                    'exceedance_probability': round(float(exceedance[i]), 4) if exceedance is not None else None,
+                    'win_probability': round(float(win_probability[i]), 4)
+                }
+                for i, row in enumerate(county_rows)
+            ]
+        })
+
+    return {
+        'forecast_run_id': forecast_run_id,
+        'quantiles': quantile_levels,
+        'threshold': threshold,
+        'counties': counties
+    }
 
 
 @router.get("/county/{county_code}/latest", response_model=List[ForecastCountySchema])
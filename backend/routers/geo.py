@@ -0,0 +1,338 @@
+"""
+Geo API Router
+Boundary geometry for counties, constituencies and wards, simplified per zoom level
+"""
+import json
+import math
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel, Field
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from compression import CachedBody
+from database import get_db
+from spatial_index import locate_points
+from topology import build_topology
+
+router = APIRouter(prefix="/geo", tags=["geo"])
+
+# Boundary levels: table, and the parent table/foreign key used by ?parent_code=
+GEO_LEVELS = {
+    'counties': {'table': 'counties', 'parent': None},
+    'constituencies': {'table': 'constituencies', 'parent': ('counties', 'county_id')},
+    'wards': {'table': 'wards', 'parent': ('constituencies', 'constituency_id')},
+}
+
+# Most points accepted by one bulk locate request
+MAX_LOCATE_POINTS = 10000
+
+# Simplification tolerance in map pixels at the requested zoom
+PIXEL_TOLERANCE = 0.5
+
+# Cached responses (level, tolerance, decimals, parent, data version) -> CachedBody
+# and (topology, quantization, simplify, data versions) -> CachedBody,
+# each kept with its compressed forms
+GEO_CACHE_SIZE = 64
+_geo_cache: "OrderedDict[tuple, CachedBody]" = OrderedDict()
+_geo_cache_lock = threading.Lock()
+
+
+def zoom_tolerance(zoom: int) -> float:
+    """Simplification tolerance in degrees: PIXEL_TOLERANCE pixels of a 256px web-mercator tile at zoom"""
+    return round(360.0 / (256 * 2 ** zoom) * PIXEL_TOLERANCE, 8)
+
+
+def tolerance_decimals(tolerance: float) -> int:
+    """Coordinate decimals that quantize well below the tolerance (one extra digit)"""
+    if tolerance <= 0:
+        return 6
+    return min(6, max(0, math.ceil(-math.log10(tolerance))) + 1)
+
+
+def _level_config(level: str) -> dict:
+    config = GEO_LEVELS.get(level)
+    if config is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown level '{level}' (expected one of: {', '.join(GEO_LEVELS)})"
+        )
+    return config
+
+
+def _data_version(db: Session, table: str) -> str:
+    """
+    Changes whenever rows of the table are added, removed or updated
+
+    Read from data_versions, which a statement trigger bumps on any change
+    made through SQL or the ORM (migration 011), so this is a primary-key
+    lookup. The bump time is part of the version, so a rebuilt database
+    never reuses caches (e.g. tiles on disk) of an earlier one.
+    """
+    row = db.execute(
+        text("SELECT version, updated_at FROM data_versions WHERE table_name = :table"),
+        {'table': table}
+    ).first()
+    return f"{row.version}:{row.updated_at}" if row else "0"
+
+
+def _feature_collection_sql(config: dict, parent_filter: bool) -> str:
+    """One query building the whole FeatureCollection as JSON text in PostGIS"""
+    table = config['table']
+    parent_select, parent_join, where = "NULL", "", "t.geometry IS NOT NULL"
+    if config['parent']:
+        parent_table, fk = config['parent']
+        parent_select = "p.code"
+        parent_join = f"LEFT JOIN {parent_table} p ON p.id = t.{fk}"
+        if parent_filter:
+            where += " AND p.code = :parent_code"
+
+    return f"""
+        SELECT json_build_object(
+            'type', 'FeatureCollection',
+            'features', COALESCE(json_agg(
+                json_build_object(
+                    'type', 'Feature',
+                    'id', t.id,
+                    'properties', json_build_object(
+                        'code', t.code,
+                        'name', t.name,
+                        'parent_code', {parent_select},
+                        'registered_voters_2022', t.registered_voters_2022,
+                        'label_point', json_build_array(ST_X(t.label_point), ST_Y(t.label_point)),
+                        'bbox', to_json(t.bbox),
+                        'area_km2', t.area_km2
+                    ),
+                    'geometry', ST_AsGeoJSON(
+                        CASE WHEN :tolerance > 0
+                             THEN ST_SimplifyPreserveTopology(t.geometry, :tolerance)
+                             ELSE t.geometry END,
+                        :decimals
+                    )::json
+                ) ORDER BY t.code
+            ), '[]'::json)
+        )::text
+        FROM {table} t {parent_join}
+        WHERE {where}
+    """
+
+
+def geo_feature_collection(
+    db: Session,
+    level: str,
+    tolerance: float,
+    decimals: int,
+    parent_code: Optional[str] = None
+) -> CachedBody:
+    """
+    Simplified GeoJSON of one level, from the cache when the data is unchanged
+
+    Returns:
+        CachedBody of the GeoJSON
+    """
+    config = _level_config(level)
+    key = (level, tolerance, decimals, parent_code, _data_version(db, config['table']))
+
+    def build():
+        return db.execute(
+            text(_feature_collection_sql(config, parent_code is not None)),
+            {'tolerance': tolerance, 'decimals': decimals, 'parent_code': parent_code}
+        ).scalar()
+
+    return _cached(key, build, "application/geo+json")
+
+
+def _cached(key: tuple, build, media_type: str) -> CachedBody:
+    """LRU lookup of a response body; build() produces the body text on a miss"""
+    with _geo_cache_lock:
+        if key in _geo_cache:
+            _geo_cache.move_to_end(key)
+            return _geo_cache[key]
+
+    cached = CachedBody(build(), media_type)
+
+    with _geo_cache_lock:
+        _geo_cache[key] = cached
+        while len(_geo_cache) > GEO_CACHE_SIZE:
+            _geo_cache.popitem(last=False)
+    return cached
+
+
+def boundary_features(db: Session, level: str) -> list:
+    """Full-detail features of a level as dicts (id = code) for the TopoJSON encoder"""
+    config = _level_config(level)
+    parent_select, parent_join = "NULL", ""
+    if config['parent']:
+        parent_table, fk = config['parent']
+        parent_select = "p.code"
+        parent_join = f"LEFT JOIN {parent_table} p ON p.id = t.{fk}"
+
+    rows = db.execute(text(f"""
+        SELECT t.code, t.name, {parent_select} AS parent_code,
+               t.registered_voters_2022, ST_X(t.label_point), ST_Y(t.label_point),
+               t.bbox, t.area_km2, ST_AsGeoJSON(t.geometry)
+        FROM {config['table']} t {parent_join}
+        WHERE t.geometry IS NOT NULL
+        ORDER BY t.code
+    """)).all()
+    return [
+        {
+            'id': code,
+            'properties': {
+                'name': name,
+                'parent_code': parent_code,
+                'registered_voters_2022': voters,
+                'label_point': [label_lon, label_lat] if label_lon is not None else None,
+                'bbox': list(bbox) if bbox else None,
+                'area_km2': area_km2,
+            },
+            'geometry': json.loads(geometry),
+        }
+        for code, name, parent_code, voters, label_lon, label_lat, bbox, area_km2, geometry in rows
+    ]
+
+
+def geo_topology(db: Session, quantization: int = 100000, simplify: float = 0.0) -> CachedBody:
+    """
+    Counties, constituencies and wards as one TopoJSON topology, cached until any level changes
+
+    Returns:
+        CachedBody of the TopoJSON
+    """
+    versions = tuple(_data_version(db, config['table']) for config in GEO_LEVELS.values())
+    key = ('topology', quantization, simplify, versions)
+
+    def build():
+        topology = build_topology(
+            {level: boundary_features(db, level) for level in GEO_LEVELS},
+            quantization=quantization,
+            simplify=simplify
+        )
+        return json.dumps(topology, separators=(',', ':'))
+
+    return _cached(key, build, "application/json")
+
+
+def precompute_geo_cache(db: Session, zooms=(5, 7, 9)):
+    """Warm the cache (compressed forms included) for every level at the zoom levels the maps open at"""
+    for level in GEO_LEVELS:
+        for zoom in zooms:
+            tolerance = zoom_tolerance(zoom)
+            geo_feature_collection(db, level, tolerance, tolerance_decimals(tolerance)).precompress()
+
+
+class LocateRequest(BaseModel):
+    points: List[List[float]] = Field(..., description="[[lon, lat], ...]")
+
+
+@router.get("/locate")
+async def locate(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    db: Session = Depends(get_db)
+):
+    """
+    Ward, constituency and county containing a point
+
+    Answered from the in-memory ward index (STRtree), or by PostGIS
+    ST_Intersects when the index is unavailable. 404 outside every ward.
+    """
+    (unit,), source = locate_points(db, [(lon, lat)], _data_version(db, 'wards'))
+    if unit is None:
+        raise HTTPException(status_code=404, detail=f"No ward contains ({lat}, {lon})")
+    return {'lat': lat, 'lon': lon, **unit, 'source': source}
+
+
+@router.post("/locate")
+async def locate_bulk(
+    payload: LocateRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Ward, constituency and county for many points at once
+
+    Body: {"points": [[lon, lat], ...]} (GeoJSON order, up to 10,000).
+    Results are in input order; points outside every ward give null.
+    """
+    if len(payload.points) > MAX_LOCATE_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_LOCATE_POINTS} points per request")
+    for point in payload.points:
+        if len(point) != 2 or not (-180 <= point[0] <= 180 and -90 <= point[1] <= 90):
+            raise HTTPException(status_code=400, detail=f"Invalid point {point}: expected [lon, lat]")
+
+    results, source = locate_points(db, [tuple(point) for point in payload.points], _data_version(db, 'wards'))
+    return {
+        'count': len(results),
+        'located': sum(result is not None for result in results),
+        'source': source,
+        'results': results,
+    }
+
+
+@router.get("/topology")
+async def get_topology(
+    request: Request,
+    quantization: int = Query(100000, ge=1000, le=1000000, description="Integer grid size per axis"),
+    zoom: Optional[int] = Query(None, ge=0, le=18, description="Simplify the shared arcs for this map zoom (default: full detail)"),
+    db: Session = Depends(get_db)
+):
+    """
+    All three boundary levels in one TopoJSON topology
+
+    Borders shared by counties, constituencies and wards are stored once as
+    quantized, delta-encoded arcs, so the whole hierarchy costs less than
+    the GeoJSON of the wards alone. Simplifying happens on the shared arcs,
+    so neighbouring units never gap or overlap. Clients decode it with
+    topojson-client's feature()/mesh().
+
+    Args:
+        quantization: Grid size (1e5 ~ 10 m across Kenya)
+        zoom: Map zoom whose pixel tolerance the arcs are simplified to
+    """
+    simplify = zoom_tolerance(zoom) if zoom is not None else 0.0
+    cached = geo_topology(db, quantization, simplify)
+    return cached.response(request, {'Cache-Control': 'public, max-age=3600'})
+
+
+@router.get("/{level}")
+async def get_geometry(
+    level: str,
+    request: Request,
+    zoom: Optional[int] = Query(None, ge=0, le=18, description="Map zoom level the geometry is drawn at"),
+    tolerance: Optional[float] = Query(None, ge=0, le=1, description="Simplification tolerance in degrees (overrides zoom; 0 = full detail)"),
+    decimals: Optional[int] = Query(None, ge=0, le=8, description="Coordinate decimals (default: derived from the tolerance)"),
+    parent_code: Optional[str] = Query(None, description="Only units inside this county (constituencies) or constituency (wards) code"),
+    db: Session = Depends(get_db)
+):
+    """
+    Boundary geometry for a level as a GeoJSON FeatureCollection
+
+    Geometries are simplified with ST_SimplifyPreserveTopology (no
+    self-intersections or collapsed rings) to the tolerance of the requested
+    zoom level, and coordinates are rounded to match, so a national
+    county map is tens of KB instead of MBs. Properties include the
+    precomputed label_point, bbox and area_km2 for labels and fit-bounds.
+
+    Args:
+        level: counties, constituencies or wards
+        zoom: Map zoom (default 6, national view)
+        tolerance: Explicit tolerance in degrees instead of zoom
+        decimals: Coordinate precision
+        parent_code: Restrict to one county/constituency
+
+    Responses are cached per (level, tolerance, decimals, parent_code)
+    until the underlying table changes, carry an ETag, and are stored
+    precompressed (br/zstd/gzip per Accept-Encoding).
+    """
+    if tolerance is None:
+        tolerance = zoom_tolerance(6 if zoom is None else zoom)
+    if decimals is None:
+        decimals = tolerance_decimals(tolerance)
+    if parent_code is not None and level == 'counties':
+        raise HTTPException(status_code=400, detail="parent_code is not supported for counties")
+
+    cached = geo_feature_collection(db, level, tolerance, decimals, parent_code)
+    return cached.response(request, {'Cache-Control': 'public, max-age=3600'})
@@ -0,0 +1,187 @@
+"""
+Maps API Router
+Compact, map-ready forecast data keyed by boundary code
+"""
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from compression import CachedBody
+from database import get_db
+from serialization import dumps
+
+router = APIRouter(prefix="/maps", tags=["maps"])
+
+# Level -> forecast table and the unit table its foreign key points to.
+# There are no ward-level forecasts: wards carry their constituency's values.
+CHOROPLETH_LEVELS = {
+    'county': {'forecast': 'forecast_county', 'fk': 'county_id', 'units': 'counties', 'via': None},
+    'constituency': {'forecast': 'forecast_constituency', 'fk': 'constituency_id', 'units': 'constituencies', 'via': None},
+    'ward': {'forecast': 'forecast_constituency', 'fk': 'constituency_id', 'units': 'wards', 'via': 'constituency_id'},
+}
+BIN_FIELDS = ('margin', 'leader_share', 'turnout')
+
+# Forecast results never change once a run has finished, so (run, level)
+# payloads of completed runs are cached as is, with their encoded and
+# compressed bodies (runs in any other state are recomputed per request)
+CHOROPLETH_CACHE_SIZE = 128
+_choropleth_cache: "OrderedDict[tuple, Tuple[dict, CachedBody]]" = OrderedDict()
+_choropleth_cache_lock = threading.Lock()
+
+
+def _choropleth_sql(config: dict) -> str:
+    """Leader, runner-up share and turnout per unit of one run, ranked in PostgreSQL"""
+    unit_join = (
+        f"JOIN {config['units']} u ON u.{config['via']} = r.unit_id" if config['via']
+        else f"JOIN {config['units']} u ON u.id = r.unit_id"
+    )
+    return f"""
+        WITH ranked AS (
+            SELECT f.{config['fk']} AS unit_id, f.candidate_id,
+                   f.predicted_vote_share::float AS share,
+                   f.predicted_turnout::float AS turnout,
+                   row_number() OVER (
+                       PARTITION BY f.{config['fk']}
+                       ORDER BY f.predicted_vote_share DESC NULLS LAST, f.candidate_id
+                   ) AS rank
+            FROM {config['forecast']} f
+            WHERE f.forecast_run_id = CAST(:forecast_run_id AS uuid)
+        )
+        SELECT u.code,
+               MAX(r.candidate_id) FILTER (WHERE r.rank = 1) AS leader_id,
+               MAX(r.share) FILTER (WHERE r.rank = 1) AS leader_share,
+               MAX(r.share) FILTER (WHERE r.rank = 2) AS runner_up_share,
+               MAX(r.turnout) AS turnout
+        FROM ranked r
+        {unit_join}
+        GROUP BY u.code
+        ORDER BY u.code
+    """
+
+
+def choropleth_columns(db: Session, forecast_run_id: str, level: str) -> Optional[Tuple[dict, CachedBody]]:
+    """
+    Columnar choropleth payload of one run and level, from the cache when possible
+
+    Returns:
+        (payload, its JSON body), or None if the run has no forecasts at this level
+    """
+    key = (forecast_run_id, level)
+    with _choropleth_cache_lock:
+        if key in _choropleth_cache:
+            _choropleth_cache.move_to_end(key)
+            return _choropleth_cache[key]
+
+    rows = db.execute(
+        text(_choropleth_sql(CHOROPLETH_LEVELS[level])), {'forecast_run_id': forecast_run_id}
+    ).all()
+    if not rows:
+        return None
+
+    leader_ids = sorted({row.leader_id for row in rows if row.leader_id is not None})
+    candidates = db.execute(
+        text("SELECT id, name, party FROM candidates WHERE id = ANY(:ids)"), {'ids': leader_ids}
+    ).all()
+    by_id = {c.id: c for c in candidates}
+    position = {candidate_id: i for i, candidate_id in enumerate(leader_ids)}
+
+    payload = {
+        'forecast_run_id': forecast_run_id,
+        'level': level,
+        'count': len(rows),
+        # Leaders are dictionary-encoded: 'leader' holds indexes into 'candidates'
+        'candidates': [
+            {'id': cid, 'name': by_id[cid].name if cid in by_id else None,
+             'party': by_id[cid].party if cid in by_id else None}
+            for cid in leader_ids
+        ],
+        'code': [row.code for row in rows],
+        'leader': [position.get(row.leader_id) for row in rows],
+        'leader_share': [row.leader_share for row in rows],
+        'margin': [
+            round(row.leader_share - (row.runner_up_share or 0.0), 2) if row.leader_share is not None else None
+            for row in rows
+        ],
+        'turnout': [row.turnout for row in rows],
+    }
+
+    status = db.execute(
+        text("SELECT status FROM forecast_runs WHERE id = CAST(:forecast_run_id AS uuid)"),
+        {'forecast_run_id': forecast_run_id}
+    ).scalar()
+    entry = (payload, CachedBody(dumps(payload)))
+    if status != 'completed':
+        return entry
+
+    with _choropleth_cache_lock:
+        _choropleth_cache[key] = entry
+        while len(_choropleth_cache) > CHOROPLETH_CACHE_SIZE:
+            _choropleth_cache.popitem(last=False)
+    return entry
+
+
+def quantile_bins(values: list, bins: int) -> dict:
+    """Quantile class breaks and each value's class (None stays None)"""
+    present = np.array([v for v in values if v is not None], dtype=float)
+    if present.size == 0:
+        return {'edges': [], 'values': [None] * len(values)}
+    edges = np.unique(np.quantile(present, np.linspace(0, 1, bins + 1)))
+    interior = edges[1:-1]
+    return {
+        'edges': [round(float(edge), 2) for edge in edges],
+        'values': [int(np.searchsorted(interior, v, side='right')) if v is not None else None for v in values],
+    }
+
+
+@router.get("/choropleth")
+async def get_choropleth(
+    request: Request,
+    forecast_run_id: str = Query(..., description="Forecast run UUID"),
+    level: str = Query('county', description="county, constituency or ward"),
+    bins: Optional[int] = Query(None, ge=2, le=9, description="Add quantile classes with this many bins"),
+    bin_by: str = Query('margin', description="Field to classify: margin, leader_share or turnout"),
+    db: Session = Depends(get_db)
+):
+    """
+    Everything a forecast choropleth needs, in one small columnar response
+
+    Columns are parallel arrays in unit-code order (join to boundaries by
+    'code'): leader (index into 'candidates'), leader_share and margin over
+    the runner-up in percentage points, and predicted turnout. With bins,
+    'bins' adds quantile class breaks and a class per unit.
+
+    Ward-level forecasts do not exist, so level=ward gives every ward its
+    constituency's values.
+
+    Payloads are computed once per (run, level) and cached, already
+    compressed for the client's Accept-Encoding when no bins are asked for.
+    """
+    if level not in CHOROPLETH_LEVELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown level '{level}' (expected one of: {', '.join(CHOROPLETH_LEVELS)})"
+        )
+    if bin_by not in BIN_FIELDS:
+        raise HTTPException(status_code=400, detail=f"bin_by must be one of: {', '.join(BIN_FIELDS)}")
+    try:
+        uuid.UUID(forecast_run_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="forecast_run_id must be a UUID")
+
+    entry = choropleth_columns(db, forecast_run_id, level)
+    if entry is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No {level} forecasts found for forecast run '{forecast_run_id}'"
+        )
+
+    payload, cached = entry
+    if bins is None:
+        return cached.response(request)
+    return {**payload, 'bins': {'by': bin_by, **quantile_bins(payload[bin_by], bins)}}
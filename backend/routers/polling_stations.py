@@ -3,17 +3,98 @@ Polling Stations API Router
 Provides endpoints for polling station data with voter registration information
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, text
 from typing import List, Optional
 
 from database import get_db
 from models import PollingStation, Ward, Constituency, County
+from routers.geo import _data_version
 from schemas import PollingStationBaseSchema, PollingStationDetailSchema
+from serialization import NEGOTIATED_HEADERS, json_response, tabular_response
+from spatial_index import station_index
 
 router = APIRouter()
 
+# Columns of PollingStationBaseSchema; listings are built from a plain column
+# query and sent without revalidating ORM objects (see serialization.py)
+STATION_COLUMNS = (
+    PollingStation.id, PollingStation.code, PollingStation.name, PollingStation.ward_id,
+    PollingStation.registration_center_id, PollingStation.registered_voters_2022,
+)
+
+
+def _station_rows(query) -> List[dict]:
+    return [
+        {**row._asdict(), "registration_center_code": None, "registration_center_name": None}
+        for row in query.all()
+    ]
+
+# Set once the GIST index on polling_stations.geometry is seen (migrations 004/010)
+_knn_index_available = False
+
+_NEAREST_SQL = """
+    SELECT ps.id, ps.code, ps.name, ps.ward_id, ps.registered_voters_2022,
+           ST_X(ps.geometry) AS lon, ST_Y(ps.geometry) AS lat,
+           ROUND(ST_Distance(ps.geometry::geography, p.geom::geography)::numeric, 1)::float AS distance_m
+    FROM (SELECT ST_SetSRID(ST_MakePoint(:lon, :lat), 4326) AS geom) p
+    CROSS JOIN LATERAL (
+        SELECT * FROM polling_stations
+        WHERE geometry IS NOT NULL
+        ORDER BY geometry <-> p.geom
+        LIMIT :k
+    ) ps
+    ORDER BY distance_m
+"""
+
+# Per ward: stations, located stations, voters, density over the ward's area
+# (migration 009) and the mean distance from each located station to its
+# nearest neighbour in the same ward (KNN per station on the GIST index)
+_DENSITY_SQL = """
+    WITH scope AS (
+        SELECT w.id, w.code, w.name, w.constituency_id, w.area_km2
+        FROM wards w
+        JOIN constituencies c ON c.id = w.constituency_id
+        WHERE (CAST(:constituency_id AS integer) IS NULL OR w.constituency_id = :constituency_id)
+          AND (CAST(:county_id AS integer) IS NULL OR c.county_id = :county_id)
+    ),
+    spacing AS (
+        SELECT s.ward_id, AVG(ST_Distance(s.geometry::geography, n.geometry::geography)) AS mean_nn_m
+        FROM polling_stations s
+        JOIN scope ON scope.id = s.ward_id
+        CROSS JOIN LATERAL (
+            SELECT o.geometry FROM polling_stations o
+            WHERE o.ward_id = s.ward_id AND o.id <> s.id AND o.geometry IS NOT NULL
+            ORDER BY o.geometry <-> s.geometry
+            LIMIT 1
+        ) n
+        WHERE s.geometry IS NOT NULL
+        GROUP BY s.ward_id
+    )
+    SELECT scope.id AS ward_id, scope.code AS ward_code, scope.name AS ward_name,
+           scope.constituency_id, scope.area_km2,
+           COUNT(ps.id) AS stations,
+           COUNT(ps.geometry) AS located_stations,
+           COALESCE(SUM(ps.registered_voters_2022), 0) AS registered_voters,
+           spacing.mean_nn_m
+    FROM scope
+    LEFT JOIN polling_stations ps ON ps.ward_id = scope.id
+    LEFT JOIN spacing ON spacing.ward_id = scope.id
+    GROUP BY scope.id, scope.code, scope.name, scope.constituency_id, scope.area_km2, spacing.mean_nn_m
+    ORDER BY scope.code
+"""
+
+
+def _has_knn_index(db: Session) -> bool:
+    global _knn_index_available
+    if not _knn_index_available:
+        _knn_index_available = bool(db.execute(text("""
+            SELECT 1 FROM pg_indexes
+            WHERE tablename = 'polling_stations' AND indexdef ILIKE '%USING gist%(geometry)%'
+        """)).first())
+    return _knn_index_available
+
 
 # ============================================================================
 # ENDPOINTS
@@ -21,6 +102,7 @@ router = APIRouter()
 
 @router.get("/", response_model=List[PollingStationBaseSchema])
 async def get_polling_stations(
+    request: Request,
     ward_id: Optional[int] = Query(None, description="Filter by ward ID"),
     constituency_id: Optional[int] = Query(None, description="Filter by constituency ID"),
     county_id: Optional[int] = Query(None, description="Filter by county ID"),
@@ -37,8 +119,10 @@ async def get_polling_stations(
     - **county_id**: Filter by county (returns all polling stations in that county)
     - **skip**: Pagination offset
     - **limit**: Maximum results (max 1000)
+
+    Columnar JSON, Arrow IPC or MessagePack via the Accept header or ?format=.
     """
-    query = db.query(PollingStation)
+    query = db.query(*STATION_COLUMNS).select_from(PollingStation)
 
     # Filter by ward
     if ward_id is not None:
@@ -53,9 +137,12 @@ async def get_polling_stations(
         query = query.join(Ward).join(Constituency).filter(Constituency.county_id == county_id)
 
     # Apply pagination
-    polling_stations = query.offset(skip).limit(limit).all()
+    polling_stations = _station_rows(query.offset(skip).limit(limit))
 
-    return polling_stations
+    response = tabular_response(request, polling_stations)
+    if response is not None:
+        return response
+    return json_response(polling_stations, headers=NEGOTIATED_HEADERS)
 
 
 
@@ -84,6 +171,7 @@ async def get_polling_station_by_code(
 
 @router.get("/search/", response_model=List[PollingStationBaseSchema])
 async def search_polling_stations(
+    request: Request,
     q: str = Query(..., min_length=3, description="Search query (minimum 3 characters)"),
     limit: int = Query(50, ge=1, le=100, description="Maximum results"),
     db: Session = Depends(get_db)
@@ -101,7 +189,11 @@ async def search_polling_stations(
         (PollingStation.registration_center_name.ilike(search_pattern))
     ).limit(limit).all()
 
-    return polling_stations
+    rows = [PollingStationBaseSchema.model_validate(ps).model_dump() for ps in polling_stations]
+    response = tabular_response(request, rows)
+    if response is not None:
+        return response
+    return json_response(rows, headers=NEGOTIATED_HEADERS)
 
 
 @router.get("/stats/summary")
@@ -190,6 +282,70 @@ async def get_polling_stations_by_county(
         for r in rows
     ]
 
+@router.get("/nearest")
+async def get_nearest_polling_stations(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: int = Query(5, ge=1, le=50, description="Number of stations"),
+    db: Session = Depends(get_db)
+):
+    """
+    The k polling stations closest to a point, closest first.
+
+    Ordered by PostGIS KNN (geometry <-> point) on the GIST index; distances
+    are geodesic metres. Without the index (migrations 004/010), an in-memory
+    KD-tree over the located stations answers instead.
+    Only stations with a location (geometry) are considered.
+    """
+    if _has_knn_index(db):
+        rows = db.execute(text(_NEAREST_SQL), {'lat': lat, 'lon': lon, 'k': k}).all()
+        stations, source = [dict(row._mapping) for row in rows], 'postgis'
+    else:
+        station_index.ensure_current(db, _data_version(db, 'polling_stations'))
+        stations, source = station_index.nearest(lon, lat, k), 'kdtree'
+
+    return {'lat': lat, 'lon': lon, 'k': k, 'source': source, 'stations': stations}
+
+
+@router.get("/density")
+async def get_polling_station_density(
+    constituency_id: Optional[int] = Query(None, description="Only wards in this constituency"),
+    county_id: Optional[int] = Query(None, description="Only wards in this county"),
+    db: Session = Depends(get_db)
+):
+    """
+    Polling station access per ward.
+
+    For every ward: stations, located stations, registered voters, stations
+    and voters per km² (ward area from its boundary), and the mean distance
+    in metres from each located station to the nearest other station in the
+    ward. Neighbours are found with KNN on the GIST index, so no pairwise
+    distances are computed. Density is null for wards without a boundary,
+    spacing for wards with fewer than two located stations.
+    """
+    rows = db.execute(
+        text(_DENSITY_SQL), {'constituency_id': constituency_id, 'county_id': county_id}
+    ).all()
+
+    wards = []
+    for row in rows:
+        area = row.area_km2
+        wards.append({
+            "ward_id": row.ward_id,
+            "ward_code": row.ward_code,
+            "ward_name": row.ward_name,
+            "constituency_id": row.constituency_id,
+            "area_km2": round(area, 3) if area else None,
+            "stations": row.stations,
+            "located_stations": row.located_stations,
+            "registered_voters": int(row.registered_voters),
+            "stations_per_km2": round(row.stations / area, 4) if area else None,
+            "voters_per_km2": round(row.registered_voters / area, 2) if area else None,
+            "mean_nearest_station_m": round(row.mean_nn_m, 1) if row.mean_nn_m is not None else None,
+        })
+    return {"count": len(wards), "wards": wards}
+
+
 @router.get("/{polling_station_id}", response_model=PollingStationDetailSchema)
 async def get_polling_station(
     polling_station_id: int,
@@ -0,0 +1,232 @@
+"""
+Vector Tiles API Router
+Mapbox Vector Tiles (MVT) for counties, constituencies, wards and polling stations
+"""
+import hashlib
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from compression import MINIMUM_SIZE, compress, negotiate_encoding
+from config import settings
+from database import get_db
+from routers.geo import _data_version
+
+router = APIRouter(prefix="/tiles", tags=["tiles"])
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+MAX_ZOOM = 16
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+# Layers: source table, forecast table joined for ?forecast_run_id=, and the
+# lowest zoom the layer is drawn at (below it tiles are empty)
+TILE_LAYERS = {
+    'counties': {'table': 'counties', 'forecast': ('forecast_county', 'county_id'), 'min_zoom': 0},
+    'constituencies': {'table': 'constituencies', 'forecast': ('forecast_constituency', 'constituency_id'), 'min_zoom': 5},
+    'wards': {'table': 'wards', 'forecast': None, 'min_zoom': 7},
+    'polling_stations': {'table': 'polling_stations', 'forecast': None, 'min_zoom': 9},
+}
+
+
+def _tile_sql(layer: str, with_forecast: bool) -> str:
+    """ST_AsMVT query for one tile of a layer"""
+    config = TILE_LAYERS[layer]
+    table = config['table']
+    select = ["t.id", "t.code", "t.name", "t.registered_voters_2022"]
+    join = ""
+    if with_forecast:
+        forecast_table, fk = config['forecast']
+        # Leading candidate of the run in this unit
+        select += ["f.leader", "f.leader_party", "f.leader_share"]
+        join = f"""
+            LEFT JOIN LATERAL (
+                SELECT c.name AS leader, c.party AS leader_party,
+                       fc.predicted_vote_share::float AS leader_share
+                FROM {forecast_table} fc
+                JOIN candidates c ON c.id = fc.candidate_id
+                WHERE fc.forecast_run_id = CAST(:forecast_run_id AS uuid) AND fc.{fk} = t.id
+                ORDER BY fc.predicted_vote_share DESC NULLS LAST
+                LIMIT 1
+            ) f ON TRUE
+        """
+    return f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(:z, :x, :y) AS geom_3857,
+                   ST_Transform(ST_TileEnvelope(:z, :x, :y), 4326) AS geom_4326
+        ),
+        features AS (
+            SELECT ST_AsMVTGeom(ST_Transform(t.geometry, 3857), bounds.geom_3857,
+                                {TILE_EXTENT}, {TILE_BUFFER}, TRUE) AS geom,
+                   {', '.join(select)}
+            FROM {table} t
+            CROSS JOIN bounds
+            {join}
+            WHERE t.geometry && bounds.geom_4326
+        )
+        SELECT ST_AsMVT(features.*, '{layer}', {TILE_EXTENT}, 'geom', 'id')
+        FROM features
+        WHERE geom IS NOT NULL
+    """
+
+
+# Written into each variant directory: the layer table's data version it was rendered from
+VARIANT_MARKER = "DATA_VERSION"
+
+
+def tile_cache_path(layer: str, variant: str, z: int, x: int, y: int) -> Path:
+    return Path(settings.tile_cache_dir) / layer / variant / str(z) / str(x) / f"{y}.mvt"
+
+
+def _start_variant(layer: str, variant: str, data_version: str):
+    """
+    Create a variant directory and remove the layer's variants of older data
+
+    Variants of the current data version (other forecast runs) are kept.
+    Directories without a marker are removed too, unless they were created
+    in the last minute (another worker may be about to write the marker).
+    """
+    layer_dir = Path(settings.tile_cache_dir) / layer
+    layer_dir.mkdir(parents=True, exist_ok=True)
+    for variant_dir in layer_dir.iterdir():
+        if not variant_dir.is_dir() or variant_dir.name == variant:
+            continue
+        marker = variant_dir / VARIANT_MARKER
+        if marker.exists():
+            stale = marker.read_text() != data_version
+        else:
+            stale = time.time() - variant_dir.stat().st_mtime > 60
+        if stale:
+            shutil.rmtree(variant_dir, ignore_errors=True)
+    (layer_dir / variant).mkdir(exist_ok=True)
+    _write_atomic(layer_dir / variant / VARIANT_MARKER, data_version.encode())
+
+
+def validate_tile(layer: str, z: int, x: int, y: int, forecast_run_id: Optional[str] = None):
+    if layer not in TILE_LAYERS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown layer '{layer}' (expected one of: {', '.join(TILE_LAYERS)})"
+        )
+    if not 0 <= z <= MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail=f"Invalid tile {z}/{x}/{y} (max zoom {MAX_ZOOM})")
+    if forecast_run_id is not None:
+        if TILE_LAYERS[layer]['forecast'] is None:
+            raise HTTPException(status_code=400, detail=f"Forecast attributes are not available for {layer}")
+        try:
+            uuid.UUID(forecast_run_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="forecast_run_id must be a UUID")
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def cached_tile(
+    db: Session,
+    layer: str,
+    z: int,
+    x: int,
+    y: int,
+    forecast_run_id: Optional[str] = None,
+    refresh: bool = False,
+    gzip_ok: bool = False
+) -> Tuple[bytes, Optional[str]]:
+    """
+    One MVT tile, served from the disk cache when present
+
+    Cached tiles live under <tile_cache_dir>/<layer>/<variant>/z/x/y.mvt.
+    The variant is a hash of the layer table's data version (plus the
+    forecast run, whose results never change), so reloading boundaries or
+    registration data starts a fresh cache instead of serving stale tiles.
+    Tiles of at least MINIMUM_SIZE bytes are stored gzipped alongside
+    (y.mvt.gz), so they are compressed once rather than per request. The
+    first tile of a new variant prunes the layer's variants of older data.
+
+    Returns:
+        (tile bytes, 'gzip' or None) - gzipped only if gzip_ok
+    """
+    if z < TILE_LAYERS[layer]['min_zoom']:
+        return b"", None
+
+    data_version = _data_version(db, TILE_LAYERS[layer]['table'])
+    variant = hashlib.md5(f"{data_version}:{forecast_run_id or ''}".encode()).hexdigest()[:12]
+    path = tile_cache_path(layer, variant, z, x, y)
+    gz_path = path.with_name(f"{path.name}.gz")
+
+    if path.exists() and not refresh:
+        if gzip_ok and gz_path.exists():
+            return gz_path.read_bytes(), 'gzip'
+        return path.read_bytes(), None
+
+    tile = db.execute(
+        text(_tile_sql(layer, forecast_run_id is not None)),
+        {'z': z, 'x': x, 'y': y, 'forecast_run_id': forecast_run_id}
+    ).scalar()
+    tile = bytes(tile or b"")
+
+    if not (path.parents[2] / VARIANT_MARKER).exists():
+        _start_variant(layer, variant, data_version)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    gzipped = compress(tile, 'gzip', cached=True) if len(tile) >= MINIMUM_SIZE else None
+    if gzipped is not None:
+        _write_atomic(gz_path, gzipped)
+    # Written last: its presence marks the tile (and its .gz) as cached
+    _write_atomic(path, tile)
+    if gzip_ok and gzipped is not None:
+        return gzipped, 'gzip'
+    return tile, None
+
+
+def render_tile(
+    db: Session,
+    layer: str,
+    z: int,
+    x: int,
+    y: int,
+    forecast_run_id: Optional[str] = None,
+    refresh: bool = False
+) -> bytes:
+    """One uncompressed MVT tile (see cached_tile)"""
+    return cached_tile(db, layer, z, x, y, forecast_run_id, refresh)[0]
+
+
+@router.get("/{layer}/{z}/{x}/{y}.mvt")
+async def get_tile(
+    request: Request,
+    layer: str,
+    z: int,
+    x: int,
+    y: int,
+    forecast_run_id: Optional[str] = Query(None, description="Join the leading candidate of this forecast run (counties, constituencies)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Mapbox Vector Tile of a layer, generated with ST_AsMVT from the PostGIS geometry
+
+    Features carry code, name and 2022 registered voters; with
+    forecast_run_id, counties and constituencies also carry the leading
+    candidate, party and predicted vote share. Layers are empty below their
+    minimum zoom (constituencies 5, wards 7, polling stations 9).
+
+    Tiles are cached on disk, larger ones also gzipped for clients that
+    accept gzip; pre-seed with backend/scripts/seed_tiles.py.
+    """
+    validate_tile(layer, z, x, y, forecast_run_id)
+    gzip_ok = negotiate_encoding(request.headers.get('accept-encoding', ''), ('gzip',)) == 'gzip'
+    tile, encoding = cached_tile(db, layer, z, x, y, forecast_run_id, gzip_ok=gzip_ok)
+
+    headers = {'Cache-Control': 'public, max-age=86400', 'Vary': 'Accept-Encoding'}
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE, headers=headers)
@@ -5,7 +5,6 @@ Pydantic schemas for API request/response validation
 from pydantic import BaseModel, Field, ConfigDict, field_serializer
 from typing import Optional, List
 from datetime import datetime
-from decimal import Decimal
 from uuid import UUID
 
 
@@ -22,9 +21,9 @@ class CountyDemographicsSchema(BaseModel):
     total_population: Optional[int] = None
     urban_population: Optional[int] = None
     rural_population: Optional[int] = None
-    median_age: Optional[Decimal] = None
-    literacy_rate: Optional[Decimal] = None
-    employment_rate: Optional[Decimal] = None
+    median_age: Optional[float] = None
+    literacy_rate: Optional[float] = None
+    employment_rate: Optional[float] = None
 
 
 class CountyEthnicityAggregateSchema(BaseModel):
@@ -35,7 +34,7 @@ class CountyEthnicityAggregateSchema(BaseModel):
     census_year: int
     ethnicity_group: str
     population_count: int = Field(..., ge=10, description="Minimum 10 for privacy")
-    percentage: Optional[Decimal] = None
+    percentage: Optional[float] = None
     source: Optional[str] = None
 
 
@@ -271,7 +270,7 @@ class ElectionResultCountySchema(BaseModel):
     rejected_votes: Optional[int] = 0
     total_votes_cast: Optional[int] = None
     registered_voters: Optional[int] = None
-    turnout_percentage: Optional[Decimal] = None
+    turnout_percentage: Optional[float] = None
     
     # Nested relationships
     county: Optional[CountyBaseSchema] = None
@@ -337,11 +336,11 @@ class ForecastCountySchema(BaseModel):
     forecast_run_id: UUID  # Pydantic will automatically serialize UUID to string
     county_id: int
     candidate_id: int
-    predicted_vote_share: Optional[Decimal] = None
-    lower_bound_90: Optional[Decimal] = None
-    upper_bound_90: Optional[Decimal] = None
+    predicted_vote_share: Optional[float] = None
+    lower_bound_90: Optional[float] = None
+    upper_bound_90: Optional[float] = None
     predicted_votes: Optional[int] = None
-    predicted_turnout: Optional[Decimal] = None
+    predicted_turnout: Optional[float] = None
 
     # Nested relationships
     county: Optional[CountyBaseSchema] = None
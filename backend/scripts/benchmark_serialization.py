@@ -0,0 +1,199 @@
+"""
+Benchmark API response serialization
+Compares the response_model path list endpoints used to take with the fast
+path they take now, on synthetic data shaped like the real payloads:
+
+- forecast list: 47 counties x N candidates (/api/forecasts/{id}/counties)
+- station export: 46,000 polling stations (/api/polling_stations)
+
+before: ORM objects with Decimal columns, validated against the response
+        schema (from_attributes, Decimal fields), dumped in JSON mode and
+        encoded with the stdlib json module (FastAPI's JSONResponse)
+float:  the same, with Numeric columns loaded as float (asdecimal=False)
+fast:   plain dict rows from a column query, encoded with orjson (stdlib
+        json if orjson is not installed) and no revalidation
+
+Usage:
+    python scripts/benchmark_serialization.py --candidates 8 --stations 46000 --repeat 5
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Optional
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from pydantic import TypeAdapter
+
+from schemas import ForecastCountySchema, PollingStationBaseSchema
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class DecimalForecastCountySchema(ForecastCountySchema):
+    """ForecastCountySchema as it was before Numeric columns became floats"""
+    predicted_vote_share: Optional[Decimal] = None
+    lower_bound_90: Optional[Decimal] = None
+    upper_bound_90: Optional[Decimal] = None
+    predicted_turnout: Optional[Decimal] = None
+
+
+def forecast_rows(n_candidates, as_decimal, seed=0):
+    """ORM-like forecast_county rows with nested county and candidate"""
+    rng = random.Random(seed)
+    run_id = uuid.UUID(int=rng.getrandbits(128))
+    number = (lambda x: Decimal(f"{x:.2f}")) if as_decimal else (lambda x: round(x, 2))
+    candidates = [
+        SimpleNamespace(id=c, name=f"Candidate {c}", party=f"Party {c % 5}", position='president')
+        for c in range(1, n_candidates + 1)
+    ]
+    rows = []
+    for county_id in range(1, 48):
+        county = SimpleNamespace(
+            id=county_id, code=f"{county_id:03d}", name=f"County {county_id}",
+            population_2019=rng.randint(100000, 4000000), registered_voters_2022=rng.randint(50000, 2000000)
+        )
+        for candidate in candidates:
+            share = rng.uniform(0, 60)
+            rows.append(SimpleNamespace(
+                id=len(rows) + 1, forecast_run_id=run_id, county_id=county_id, candidate_id=candidate.id,
+                predicted_vote_share=number(share), lower_bound_90=number(max(0, share - 3)),
+                upper_bound_90=number(min(100, share + 3)), predicted_votes=rng.randint(0, 500000),
+                predicted_turnout=number(rng.uniform(50, 85)), county=county, candidate=candidate
+            ))
+    return rows
+
+
+def forecast_dicts(rows):
+    """What the column query in routers/forecasts.py builds"""
+    return [
+        {
+            "id": r.id, "forecast_run_id": str(r.forecast_run_id), "county_id": r.county_id,
+            "candidate_id": r.candidate_id, "predicted_vote_share": r.predicted_vote_share,
+            "lower_bound_90": r.lower_bound_90, "upper_bound_90": r.upper_bound_90,
+            "predicted_votes": r.predicted_votes, "predicted_turnout": r.predicted_turnout,
+            "county": {
+                "id": r.county.id, "code": r.county.code, "name": r.county.name,
+                "population_2019": r.county.population_2019,
+                "registered_voters_2022": r.county.registered_voters_2022
+            },
+            "candidate": {
+                "id": r.candidate.id, "name": r.candidate.name,
+                "party": r.candidate.party, "position": r.candidate.position
+            },
+        }
+        for r in rows
+    ]
+
+
+def station_rows(n_stations, seed=0):
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(
+            id=i, code=f"{rng.randint(1, 47):03d}{i:012d}", name=f"PRIMARY SCHOOL {i}", ward_id=rng.randint(1, 1450),
+            registration_center_id=i // 3, registration_center_code=None, registration_center_name=None,
+            registered_voters_2022=rng.randint(20, 700)
+        )
+        for i in range(1, n_stations + 1)
+    ]
+
+
+def station_dicts(rows):
+    """What the column query in routers/polling_stations.py builds"""
+    return [
+        {
+            "id": r.id, "code": r.code, "name": r.name, "ward_id": r.ward_id,
+            "registration_center_id": r.registration_center_id, "registered_voters_2022": r.registered_voters_2022,
+            "registration_center_code": None, "registration_center_name": None,
+        }
+        for r in rows
+    ]
+
+
+def response_model_path(schema):
+    """FastAPI's response_model handling: validate, dump in JSON mode, JSONResponse.render"""
+    adapter = TypeAdapter(List[schema])
+
+    def run(rows):
+        content = adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode='json')
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':')).encode()
+    return run
+
+
+def fast_path(build):
+    def run(rows):
+        content = build(rows)
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, separators=(',', ':')).encode()
+    return run
+
+
+def best_time(fn, rows, repeat):
+    best, body = float('inf'), b''
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best, body
+
+
+def report(title, timings):
+    print()
+    print(title)
+    print("-" * 60)
+    print(f"{'path':<10} {'ms':>10} {'KB':>10} {'speedup':>10}")
+    baseline = timings[0][1]
+    for name, seconds, body in timings:
+        print(f"{name:<10} {seconds * 1000:>10.1f} {len(body) / 1024:>10.1f} {baseline / seconds:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark API response serialization')
+    parser.add_argument('--candidates', type=int, default=8, help='Candidates per county in the forecast list')
+    parser.add_argument('--stations', type=int, default=46000, help='Polling stations in the export')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions (best is reported)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("RESPONSE SERIALIZATION BENCHMARK")
+    print("=" * 60)
+    print(f"JSON encoder for the fast path: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+
+    decimal_rows = forecast_rows(args.candidates, as_decimal=True)
+    float_rows = forecast_rows(args.candidates, as_decimal=False)
+    report(f"Forecast list: 47 counties x {args.candidates} candidates ({len(float_rows):,} rows)", [
+        ('before', *best_time(response_model_path(DecimalForecastCountySchema), decimal_rows, args.repeat)),
+        ('float', *best_time(response_model_path(ForecastCountySchema), float_rows, args.repeat)),
+        ('fast', *best_time(fast_path(forecast_dicts), float_rows, args.repeat)),
+    ])
+
+    stations = station_rows(args.stations)
+    report(f"Station export: {len(stations):,} polling stations", [
+        ('before', *best_time(response_model_path(PollingStationBaseSchema), stations, args.repeat)),
+        ('fast', *best_time(fast_path(station_dicts), stations, args.repeat)),
+    ])
+
+    # Same data either way (Decimal fields used to be sent as strings)
+    before = json.loads(response_model_path(ForecastCountySchema)(float_rows))
+    after = json.loads(fast_path(forecast_dicts)(float_rows))
+    if before != after:
+        print("\n❌ Fast path output differs from the response_model output")
+        raise SystemExit(1)
+    print("\n✅ Fast path output matches the response_model output")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Pre-seed the MVT tile cache
+Renders every tile covering Kenya for the chosen layers and zoom levels, so
+map requests are served straight from the disk cache (routers/tiles.py).
+
+Usage:
+    python scripts/seed_tiles.py --layers counties constituencies --max-zoom 9
+    python scripts/seed_tiles.py --layers counties --forecast-run-id <uuid> --workers 8
+"""
+
+import argparse
+import math
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from database import SessionLocal
+from routers.tiles import MAX_ZOOM, TILE_LAYERS, render_tile
+
+# Kenya bounding box: west, south, east, north
+KENYA_BBOX = (33.9, -4.7, 41.9, 5.0)
+
+
+def lonlat_to_tile(lon, lat, z):
+    """Web-mercator tile containing a point"""
+    n = 2 ** z
+    x = int((lon + 180.0) / 360.0 * n)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_in_bbox(bbox, z):
+    """All (z, x, y) tiles covering a bounding box"""
+    west, south, east, north = bbox
+    x_min, y_min = lonlat_to_tile(west, north, z)
+    x_max, y_max = lonlat_to_tile(east, south, z)
+    return [(z, x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1)]
+
+
+def seed_layer(layer, tiles, forecast_run_id, refresh, workers):
+    """Render tiles across worker threads, each with its own session"""
+    def render(chunk):
+        db = SessionLocal()
+        try:
+            return sum(len(render_tile(db, layer, z, x, y, forecast_run_id, refresh)) for z, x, y in chunk)
+        finally:
+            db.close()
+
+    chunks = [tiles[i::workers] for i in range(workers)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(render, chunks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-seed the MVT tile cache")
+    parser.add_argument("--layers", nargs="+", choices=list(TILE_LAYERS), default=list(TILE_LAYERS))
+    parser.add_argument("--min-zoom", type=int, default=0)
+    parser.add_argument("--max-zoom", type=int, default=10)
+    parser.add_argument("--bbox", type=float, nargs=4, default=KENYA_BBOX, metavar=("WEST", "SOUTH", "EAST", "NORTH"))
+    parser.add_argument("--forecast-run-id", default=None, help="Also bake in this run's leading candidates")
+    parser.add_argument("--refresh", action="store_true", help="Re-render tiles already in the cache")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    if not 0 <= args.min_zoom <= args.max_zoom <= MAX_ZOOM:
+        parser.error(f"zoom levels must satisfy 0 <= min <= max <= {MAX_ZOOM}")
+    if args.forecast_run_id:
+        try:
+            uuid.UUID(args.forecast_run_id)
+        except ValueError:
+            parser.error("--forecast-run-id must be a UUID")
+
+    print("🗺️  Seeding MVT tile cache")
+    print("=" * 60)
+
+    for layer in args.layers:
+        forecast_run_id = args.forecast_run_id if TILE_LAYERS[layer]['forecast'] else None
+        min_zoom = max(args.min_zoom, TILE_LAYERS[layer]['min_zoom'])
+        for z in range(min_zoom, args.max_zoom + 1):
+            tiles = tiles_in_bbox(args.bbox, z)
+            started = time.perf_counter()
+            n_bytes = seed_layer(layer, tiles, forecast_run_id, args.refresh, max(1, args.workers))
+            print(f"  ✅ {layer:<17} z{z:<2} {len(tiles):>6,} tiles, {n_bytes / 1024:>10,.1f} KB "
+                  f"({time.perf_counter() - started:.1f}s)")
+
+    print()
+    print("🎉 Tile cache seeded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Tabular response formats chosen by content negotiation
+
+Large list endpoints normally answer with a JSON array of (nested) objects,
+which repeats every key and every nested county/candidate object per row.
+Clients that send a matching Accept header (or ?format=) get the same rows
+column by column instead:
+
+    application/vnd.kenpolimarket.columnar+json   ?format=columnar
+        {"length": n, "columns": {"id": [...], "county.name": {"dictionary": [...], "indices": [...]}}}
+    application/vnd.apache.arrow.stream            ?format=arrow    (needs pyarrow)
+    application/msgpack                            ?format=msgpack  (needs msgpack)
+
+Nested objects are flattened to dotted column names, and low-cardinality
+string columns are dictionary-encoded (natively in Arrow). Plain JSON stays
+the default, so existing clients are unaffected.
+
+JSON is rendered with orjson when it is installed (main.py also makes
+ORJSONResponse the default response class). Hot list endpoints build plain
+rows from column queries and return json_response() directly, skipping
+response_model revalidation of ORM objects.
+"""
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, Request, Response
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Every response of a negotiated endpoint, plain JSON included, varies by
+# Accept; otherwise a shared cache could hand JSON to an Arrow client or back
+NEGOTIATED_HEADERS = {'Vary': 'Accept'}
+
+COLUMNAR_JSON = "application/vnd.kenpolimarket.columnar+json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+
+# Media types (and their ?format= names) in server preference order. Arrow is
+# only offered as an IPC stream (the file format is not written).
+TABULAR_FORMATS = {
+    'columnar': (COLUMNAR_JSON,),
+    'arrow': (ARROW_STREAM,),
+    'msgpack': (MSGPACK, "application/x-msgpack"),
+}
+
+
+def _available(name: str) -> bool:
+    return {'arrow': pa is not None, 'msgpack': msgpack is not None}.get(name, True)
+
+
+def _accept_qualities(accept: str) -> Dict[str, float]:
+    qualities = {}
+    for part in accept.split(','):
+        media_type, *params = [p.strip() for p in part.split(';')]
+        q = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media_type:
+            qualities[media_type.lower()] = q
+    return qualities
+
+
+def negotiate_format(request: Request) -> str:
+    """'json' (default), 'columnar', 'arrow' or 'msgpack' for this request"""
+    requested = request.query_params.get('format')
+    if requested:
+        if requested == 'json':
+            return 'json'
+        if requested not in TABULAR_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown format '{requested}' (expected json, {', '.join(TABULAR_FORMATS)})"
+            )
+        if not _available(requested):
+            raise HTTPException(status_code=406, detail=f"Format '{requested}' is not available on this server")
+        return requested
+
+    qualities = _accept_qualities(request.headers.get('accept', ''))
+    json_q = max(qualities.get('application/json', 0.0), qualities.get('*/*', 0.0))
+    best, best_q = 'json', json_q
+    for name, media_types in TABULAR_FORMATS.items():
+        q = max(qualities.get(media_type, 0.0) for media_type in media_types)
+        if q > best_q and _available(name):
+            best, best_q = name, q
+    return best
+
+
+def dumps(body: Any) -> bytes:
+    """Compact JSON bytes (orjson when available); Decimal/UUID/dates made plain"""
+    if orjson is not None:
+        return orjson.dumps(body, default=_plain)
+    return json.dumps(body, default=_plain, separators=(',', ':')).encode()
+
+
+def json_response(content: Any, **kwargs) -> Response:
+    """JSON response for already-plain, trusted data (no response_model validation)"""
+    return Response(content=dumps(content), media_type="application/json", **kwargs)
+
+
+def _plain(value: Any, keep_datetimes: bool = False) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)) and not keep_datetimes:
+        return value.isoformat()
+    return value
+
+
+def flatten_row(row: Dict[str, Any], prefix: str = '', keep_datetimes: bool = False) -> Dict[str, Any]:
+    """{'county': {'name': x}} -> {'county.name': x}, with Decimal/UUID made plain"""
+    flat = {}
+    for key, value in row.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_row(value, f"{name}.", keep_datetimes))
+        else:
+            flat[name] = _plain(value, keep_datetimes)
+    return flat
+
+
+def _column_lists(rows: List[Dict[str, Any]], keep_datetimes: bool = False) -> Dict[str, list]:
+    flat_rows = [flatten_row(row, keep_datetimes=keep_datetimes) for row in rows]
+    names: Dict[str, None] = {}
+    for row in flat_rows:
+        for name in row:
+            names.setdefault(name)
+    return {name: [row.get(name) for row in flat_rows] for name in names}
+
+
+def _dictionary_encode(values: list) -> Optional[dict]:
+    """{'dictionary', 'indices'} for string columns with at most half as many distinct values as rows"""
+    if not values or not all(v is None or isinstance(v, str) for v in values):
+        return None
+    dictionary: Dict[str, int] = {}
+    indices = [None if v is None else dictionary.setdefault(v, len(dictionary)) for v in values]
+    if len(dictionary) > len(values) // 2:
+        return None
+    return {'dictionary': list(dictionary), 'indices': indices}
+
+
+def to_columnar(rows: List[Dict[str, Any]]) -> dict:
+    columns = {}
+    for name, values in _column_lists(rows).items():
+        columns[name] = _dictionary_encode(values) or values
+    return {'length': len(rows), 'columns': columns}
+
+
+def to_arrow(rows: List[Dict[str, Any]], metadata: Optional[dict] = None) -> bytes:
+    """Arrow IPC stream of the rows; metadata is stored as JSON under the 'meta' schema key"""
+    arrays, names = [], []
+    for name, values in _column_lists(rows, keep_datetimes=True).items():
+        array = pa.array(values)
+        if pa.types.is_string(array.type) and _dictionary_encode(values) is not None:
+            array = array.dictionary_encode()
+        arrays.append(array)
+        names.append(name)
+    table = pa.Table.from_arrays(arrays, names=names)
+    if metadata:
+        table = table.replace_schema_metadata({'meta': json.dumps(metadata, default=_plain)})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def tabular_response(
+    request: Request,
+    rows: List[Dict[str, Any]],
+    envelope: Optional[dict] = None,
+    rows_key: str = 'rows'
+) -> Optional[Response]:
+    """
+    Response in the negotiated tabular format, or None for plain JSON
+
+    Args:
+        rows: One dict per row (nested dicts allowed)
+        envelope: Non-tabular fields sent alongside the rows (Arrow: schema metadata)
+        rows_key: Key of the columnar rows inside the envelope (columnar JSON, MessagePack)
+
+    The caller returns its usual JSON body when this returns None, with
+    NEGOTIATED_HEADERS (e.g. json_response(rows, headers=NEGOTIATED_HEADERS)).
+    """
+    fmt = negotiate_format(request)
+    if fmt == 'json':
+        return None
+
+    headers = NEGOTIATED_HEADERS
+    if fmt == 'arrow':
+        return Response(content=to_arrow(rows, envelope), media_type=ARROW_STREAM, headers=headers)
+
+    body = {**(envelope or {}), rows_key: to_columnar(rows)} if envelope is not None else to_columnar(rows)
+    if fmt == 'msgpack':
+        return Response(
+            content=msgpack.packb(body, default=_plain, use_bin_type=True),
+            media_type=MSGPACK,
+            headers=headers
+        )
+    return Response(
+        content=dumps(body),
+        media_type=COLUMNAR_JSON,
+        headers=headers
+    )
@@ -0,0 +1,216 @@
+"""
+Spatial lookups: which ward contains a point, and which stations are nearest
+
+Ward polygons are loaded once into a shapely STRtree (built at startup and
+rebuilt when the wards table changes), so locating a point, or thousands
+of them, needs no database round-trip for the geometry test. Without
+shapely, or before any ward geometry is loaded, lookups fall back to
+PostGIS ST_Intersects on the GIST-indexed wards.geometry.
+
+Points on a shared border belong to the ward with the lowest id in both
+paths, so results do not depend on which one answered.
+
+Nearest polling stations come from PostGIS KNN ordering (geometry <-> point)
+on the GIST index of polling_stations.geometry (migrations 004/010). Where that
+index is missing, a KD-tree over the located stations (scipy's cKDTree, or
+a vectorized numpy scan without scipy) answers instead of a full scan per
+request.
+"""
+import math
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+try:
+    import shapely
+    from shapely import STRtree
+except ImportError:
+    shapely = None
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+# Local equirectangular projection for the KD-tree (metres; Kenya spans 5°N-5°S,
+# so the error against geodesic distance stays well under 1%)
+M_PER_DEG_LAT = 110574.0
+M_PER_DEG_LON = 111320.0
+PROJECTION_LAT = 0.0
+EARTH_RADIUS_M = 6371008.8
+
+_UNIT_COLUMNS = """
+    w.id, w.code, w.name,
+    c.id AS constituency_id, c.code AS constituency_code, c.name AS constituency_name,
+    co.id AS county_id, co.code AS county_code, co.name AS county_name
+"""
+_UNIT_JOINS = """
+    FROM wards w
+    LEFT JOIN constituencies c ON c.id = w.constituency_id
+    LEFT JOIN counties co ON co.id = c.county_id
+"""
+
+_LOCATE_SQL = f"""
+    SELECT p.idx, u.*
+    FROM unnest(CAST(:lons AS double precision[]), CAST(:lats AS double precision[]))
+         WITH ORDINALITY AS p(lon, lat, idx)
+    LEFT JOIN LATERAL (
+        SELECT {_UNIT_COLUMNS} {_UNIT_JOINS}
+        WHERE w.geometry IS NOT NULL
+          AND ST_Intersects(w.geometry, ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326))
+        ORDER BY w.id
+        LIMIT 1
+    ) u ON TRUE
+    ORDER BY p.idx
+"""
+
+
+def _unit(row) -> dict:
+    return {
+        'ward': {'id': row.id, 'code': row.code, 'name': row.name},
+        'constituency': {'id': row.constituency_id, 'code': row.constituency_code, 'name': row.constituency_name},
+        'county': {'id': row.county_id, 'code': row.county_code, 'name': row.county_name},
+    }
+
+
+class WardIndex:
+    """STRtree over ward polygons with the hierarchy of each ward"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tree = None
+        self._ward_ids = None
+        self._units: List[dict] = []
+        self.version: Optional[str] = None
+
+    def build(self, db: Session, version: Optional[str] = None) -> int:
+        """(Re)build the tree from wards.geometry; returns the number of wards indexed"""
+        if shapely is None:
+            return 0
+        rows = db.execute(text(f"""
+            SELECT ST_AsBinary(w.geometry) AS wkb, {_UNIT_COLUMNS} {_UNIT_JOINS}
+            WHERE w.geometry IS NOT NULL
+            ORDER BY w.id
+        """)).all()
+        geometries = shapely.from_wkb([bytes(row.wkb) for row in rows])
+        with self._lock:
+            self._tree = STRtree(geometries) if rows else None
+            self._ward_ids = np.array([row.id for row in rows])
+            self._units = [_unit(row) for row in rows]
+            self.version = version
+        return len(rows)
+
+    def ensure_current(self, db: Session, version: str):
+        if shapely is not None and self.version != version:
+            self.build(db, version)
+
+    def locate_many(self, points: Sequence[Tuple[float, float]]) -> Optional[List[Optional[dict]]]:
+        """Units containing each (lon, lat), or None if the tree is not built"""
+        with self._lock:
+            tree, ward_ids, units = self._tree, self._ward_ids, self._units
+        if tree is None:
+            return None
+        if not points:
+            return []
+        lons, lats = zip(*points)
+        hits_input, hits_tree = tree.query(shapely.points(lons, lats), predicate='intersects')
+        # Lowest ward id wins on shared borders: visit hits by descending id, last write wins
+        order = np.argsort(-ward_ids[hits_tree], kind='stable')
+        results: List[Optional[dict]] = [None] * len(points)
+        for i, j in zip(hits_input[order], hits_tree[order]):
+            results[i] = units[j]
+        return results
+
+
+ward_index = WardIndex()
+
+
+def locate_points(db: Session, points: Sequence[Tuple[float, float]], version: Optional[str] = None) -> Tuple[List[Optional[dict]], str]:
+    """
+    Ward/constituency/county containing each (lon, lat) point
+
+    Returns:
+        (one unit dict or None per point, 'index' or 'postgis')
+    """
+    if version is not None:
+        ward_index.ensure_current(db, version)
+    results = ward_index.locate_many(points)
+    if results is not None:
+        return results, 'index'
+
+    rows = db.execute(text(_LOCATE_SQL), {
+        'lons': [lon for lon, _ in points],
+        'lats': [lat for _, lat in points],
+    }).all()
+    return [_unit(row) if row.id is not None else None for row in rows], 'postgis'
+
+
+def haversine_m(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _project(lons, lats):
+    x = np.asarray(lons, dtype=float) * M_PER_DEG_LON * math.cos(math.radians(PROJECTION_LAT))
+    y = np.asarray(lats, dtype=float) * M_PER_DEG_LAT
+    return np.column_stack([x, y])
+
+
+class StationIndex:
+    """KD-tree over located polling stations (fallback for PostGIS KNN)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tree = None
+        self._xy = None
+        self._stations: List[dict] = []
+        self.version: Optional[str] = None
+
+    def build(self, db: Session, version: Optional[str] = None) -> int:
+        rows = db.execute(text("""
+            SELECT id, code, name, ward_id, registered_voters_2022,
+                   ST_X(geometry) AS lon, ST_Y(geometry) AS lat
+            FROM polling_stations
+            WHERE geometry IS NOT NULL
+            ORDER BY id
+        """)).all()
+        stations = [dict(row._mapping) for row in rows]
+        xy = _project([s['lon'] for s in stations], [s['lat'] for s in stations]) if stations else None
+        with self._lock:
+            self._xy = xy
+            self._tree = cKDTree(xy) if cKDTree is not None and stations else None
+            self._stations = stations
+            self.version = version
+        return len(stations)
+
+    def ensure_current(self, db: Session, version: str):
+        if self.version != version:
+            self.build(db, version)
+
+    def nearest(self, lon: float, lat: float, k: int) -> List[dict]:
+        """k nearest stations to (lon, lat), closest first, with geodesic distance_m"""
+        with self._lock:
+            tree, xy, stations = self._tree, self._xy, self._stations
+        if not stations:
+            return []
+        k = min(k, len(stations))
+        query = _project([lon], [lat])[0]
+        if tree is not None:
+            _, indices = tree.query(query, k=k)
+            indices = np.atleast_1d(indices)
+        else:
+            distances = ((xy - query) ** 2).sum(axis=1)
+            indices = np.argpartition(distances, k - 1)[:k]
+        results = [
+            {**stations[i], 'distance_m': round(haversine_m(lon, lat, stations[i]['lon'], stations[i]['lat']), 1)}
+            for i in indices
+        ]
+        return sorted(results, key=lambda station: station['distance_m'])
+
+
+station_index = StationIndex()
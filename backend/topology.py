@@ -0,0 +1,236 @@
+"""
+TopoJSON encoding for administrative boundaries
+
+Counties, constituencies and wards share most of their edges. A TopoJSON
+topology stores every shared border once as an arc, and each polygon refers
+to its arcs by index (~index when traversed backwards). Coordinates are
+quantized to an integer grid and every arc is delta-encoded, so the three
+levels together are a fraction of the size of their GeoJSON.
+
+Arcs are found the same way topojson does it: after quantization, a point
+is a junction when the rings passing through it do not all continue to the
+same neighbours. Rings are cut at junctions; identical cut sequences (in
+either direction) become one arc. Rings without junctions are stored as a
+single closed arc, deduplicated across rotations and orientation.
+
+Simplification (optional) runs on the arcs, not the features, so borders
+shared between units and across levels stay identical after simplifying.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+Point = Tuple[int, int]
+
+
+def _iter_coordinates(geometry: dict) -> Iterable[Sequence[float]]:
+    polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+    for polygon in polygons:
+        for ring in polygon:
+            yield from ring
+
+
+def _polygons(geometry: dict) -> List[list]:
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+
+
+def _quantize_ring(ring, x0: float, y0: float, kx: float, ky: float) -> Optional[List[Point]]:
+    """Quantized ring without its closing point or repeated points; None if it collapses"""
+    points = []
+    for x, y, *_ in ring:
+        point = (round((x - x0) / kx), round((y - y0) / ky))
+        if not points or point != points[-1]:
+            points.append(point)
+    while len(points) > 1 and points[-1] == points[0]:
+        points.pop()
+    return points if len(points) >= 3 else None
+
+
+def _find_junctions(rings: Iterable[List[Point]]) -> set:
+    """Points where rings passing through them do not share both neighbours"""
+    neighbours, junctions = {}, set()
+    for ring in rings:
+        n = len(ring)
+        for i, point in enumerate(ring):
+            previous, following = ring[i - 1], ring[(i + 1) % n]
+            seen = neighbours.get(point)
+            if seen is None:
+                neighbours[point] = (previous, following)
+            elif seen != (previous, following) and seen != (following, previous):
+                junctions.add(point)
+    return junctions
+
+
+def _canonical_ring(ring: List[Point]) -> List[Point]:
+    """Closed ring rotated to start at its smallest point"""
+    start = ring.index(min(ring))
+    rotated = ring[start:] + ring[:start]
+    return rotated + [rotated[0]]
+
+
+def _simplify(points: List[Point], tolerance: float) -> List[Point]:
+    """Douglas-Peucker on one arc, keeping its endpoints"""
+    if tolerance <= 0 or len(points) <= 2:
+        return points
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    tolerance_sq = tolerance * tolerance
+    while stack:
+        first, last = stack.pop()
+        (ax, ay), (bx, by) = points[first], points[last]
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+        max_dist, index = -1.0, None
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if length_sq == 0:
+                dist = (px - ax) ** 2 + (py - ay) ** 2
+            else:
+                cross = dx * (py - ay) - dy * (px - ax)
+                dist = cross * cross / length_sq
+            if dist > max_dist:
+                max_dist, index = dist, i
+        if index is not None and max_dist > tolerance_sq:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+class _ArcIndex:
+    """Deduplicating store of arcs; returns ~index for arcs stored in the other direction"""
+
+    def __init__(self):
+        self.arcs: List[List[Point]] = []
+        self._index: Dict[tuple, int] = {}
+
+    def add(self, points: List[Point]) -> int:
+        key = tuple(points)
+        if key in self._index:
+            return self._index[key]
+        reverse = tuple(reversed(points))
+        if reverse in self._index:
+            return ~self._index[reverse]
+        self._index[key] = len(self.arcs)
+        self.arcs.append(points)
+        return len(self.arcs) - 1
+
+    def add_closed(self, ring: List[Point]) -> int:
+        forward = _canonical_ring(ring)
+        key = tuple(forward)
+        if key in self._index:
+            return self._index[key]
+        reverse = tuple(_canonical_ring(list(reversed(ring))))
+        if reverse in self._index:
+            return ~self._index[reverse]
+        self._index[key] = len(self.arcs)
+        self.arcs.append(forward)
+        return len(self.arcs) - 1
+
+
+def _ring_arcs(ring: List[Point], junctions: set, arcs: _ArcIndex) -> List[int]:
+    """Cut a ring at its junctions into arc references"""
+    cuts = [i for i, point in enumerate(ring) if point in junctions]
+    if not cuts:
+        return [arcs.add_closed(ring)]
+    rotated = ring[cuts[0]:] + ring[:cuts[0]]
+    rotated.append(rotated[0])
+    refs, start = [], 0
+    for i in range(1, len(rotated)):
+        if rotated[i] in junctions:
+            refs.append(arcs.add(rotated[start:i + 1]))
+            start = i
+    return refs
+
+
+def _delta_encode(points: List[Point]) -> List[List[int]]:
+    encoded, last_x, last_y = [], 0, 0
+    for x, y in points:
+        encoded.append([x - last_x, y - last_y])
+        last_x, last_y = x, y
+    return encoded
+
+
+def build_topology(
+    layers: Dict[str, List[dict]],
+    quantization: int = 100000,
+    simplify: float = 0.0
+) -> dict:
+    """
+    Encode several layers of polygon features as one TopoJSON topology
+
+    Args:
+        layers: {object name: [{'id', 'properties', 'geometry' (GeoJSON Polygon/MultiPolygon)}]}
+        quantization: Grid size per axis (1e5 is ~10 m across Kenya)
+        simplify: Douglas-Peucker tolerance in degrees applied to the shared arcs (0 = none)
+
+    Returns:
+        TopoJSON Topology dict with delta-encoded, quantized arcs
+    """
+    xs, ys = [], []
+    for features in layers.values():
+        for feature in features:
+            for x, y, *_ in _iter_coordinates(feature['geometry']):
+                xs.append(x)
+                ys.append(y)
+    if not xs:
+        return {'type': 'Topology', 'objects': {name: {'type': 'GeometryCollection', 'geometries': []} for name in layers}, 'arcs': []}
+
+    x0, y0, x1, y1 = min(xs), min(ys), max(xs), max(ys)
+    kx = (x1 - x0) / (quantization - 1) or 1.0
+    ky = (y1 - y0) / (quantization - 1) or 1.0
+    del xs, ys
+
+    # Quantize once: [layer][feature] -> list of polygons -> list of rings
+    quantized = {}
+    for name, features in layers.items():
+        quantized[name] = []
+        for feature in features:
+            polygons = []
+            for polygon in _polygons(feature['geometry']):
+                rings = [_quantize_ring(ring, x0, y0, kx, ky) for ring in polygon]
+                if rings and rings[0] is not None:
+                    polygons.append([ring for ring in rings if ring is not None])
+            quantized[name].append(polygons)
+
+    junctions = _find_junctions(
+        ring for polygons_list in quantized.values() for polygons in polygons_list
+        for polygon in polygons for ring in polygon
+    )
+
+    arcs = _ArcIndex()
+    objects = {}
+    for name, features in layers.items():
+        geometries = []
+        for feature, polygons in zip(features, quantized[name]):
+            if not polygons:
+                continue
+            polygon_arcs = [[_ring_arcs(ring, junctions, arcs) for ring in polygon] for polygon in polygons]
+            geometry = (
+                {'type': 'Polygon', 'arcs': polygon_arcs[0]} if len(polygon_arcs) == 1
+                else {'type': 'MultiPolygon', 'arcs': polygon_arcs}
+            )
+            geometry['id'] = feature.get('id')
+            geometry['properties'] = feature.get('properties', {})
+            geometries.append(geometry)
+        objects[name] = {'type': 'GeometryCollection', 'geometries': geometries}
+
+    tolerance = simplify / min(kx, ky) if simplify > 0 else 0.0
+    encoded_arcs = []
+    for points in arcs.arcs:
+        simplified = _simplify(points, tolerance)
+        # A closed arc must stay a ring
+        if points[0] == points[-1] and len(simplified) < 4:
+            simplified = points
+        encoded_arcs.append(_delta_encode(simplified))
+
+    return {
+        'type': 'Topology',
+        'bbox': [x0, y0, x1, y1],
+        'transform': {'scale': [kx, ky], 'translate': [x0, y0]},
+        'objects': objects,
+        'arcs': encoded_arcs,
+    }
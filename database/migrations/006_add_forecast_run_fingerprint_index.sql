@@ -0,0 +1,10 @@
+-- ============================================================================
+-- Migration 006: Index Forecast Runs by Content Fingerprint
+-- ============================================================================
+-- Purpose: The forecast scripts record a fingerprint of their inputs and
+-- parameters in forecast_runs.parameters. The store scripts look runs up by
+-- it to reuse an existing run instead of storing a duplicate.
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_forecast_runs_fingerprint
+    ON forecast_runs ((parameters->>'fingerprint'));
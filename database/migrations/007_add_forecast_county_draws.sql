@@ -0,0 +1,23 @@
+-- ============================================================================
+-- Migration 007: Store Posterior Draws for County Forecasts
+-- ============================================================================
+-- Purpose: forecast_county only keeps the 90% bounds. Runs can now also
+-- store a thinned matrix of posterior vote-share draws per county/candidate
+-- (zlib-compressed little-endian float16, draw-aligned across candidates),
+-- so the API can derive any quantile, exceedance or win probability
+-- without rerunning the model.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS forecast_county_draws (
+    id SERIAL PRIMARY KEY,
+    forecast_run_id UUID REFERENCES forecast_runs(id) ON DELETE CASCADE,
+    county_id INTEGER REFERENCES counties(id) ON DELETE CASCADE,
+    candidate_id INTEGER REFERENCES candidates(id) ON DELETE CASCADE,
+    n_draws INTEGER NOT NULL CHECK (n_draws > 0),
+    encoding VARCHAR(20) NOT NULL DEFAULT 'zlib-f2le',
+    draws BYTEA NOT NULL,  -- Vote share draws (%), same draw order for every candidate
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(forecast_run_id, county_id, candidate_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_forecast_county_draws_run ON forecast_county_draws(forecast_run_id);
@@ -0,0 +1,24 @@
+-- ============================================================================
+-- Migration 008: Incremental, Hash-Based Ingestion Bookkeeping
+-- ============================================================================
+-- Purpose: every ingester (etl/scripts/ingest_*.py, scripts/import_*.py) now
+-- logs each attempt to data_ingestion_log with the source file's SHA256,
+-- row counts, duration and outcome. A file whose hash already has a
+-- 'success' row is skipped; a changed file is diffed row by row so only
+-- new/changed rows are written.
+-- Status values: 'running', 'success', 'skipped', 'partial' (some rows failed; retried on the next run), 'failed'
+-- ============================================================================
+
+ALTER TABLE data_ingestion_log
+    ADD COLUMN IF NOT EXISTS source_file VARCHAR(500),
+    ADD COLUMN IF NOT EXISTS rows_inserted INTEGER,
+    ADD COLUMN IF NOT EXISTS rows_updated INTEGER,
+    ADD COLUMN IF NOT EXISTS rows_unchanged INTEGER,
+    ADD COLUMN IF NOT EXISTS rows_skipped INTEGER,
+    ADD COLUMN IF NOT EXISTS duration_ms INTEGER,
+    ADD COLUMN IF NOT EXISTS completed_at TIMESTAMP;
+
+-- "Was this exact file already loaded?" lookup
+CREATE INDEX IF NOT EXISTS idx_ingestion_log_source_hash
+    ON data_ingestion_log(source_name, file_hash, ingestion_timestamp DESC)
+    WHERE status = 'success';
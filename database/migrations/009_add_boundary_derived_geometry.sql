@@ -0,0 +1,77 @@
+-- ============================================================================
+-- Migration 009: Precomputed Centroid, Label Point, Bounding Box and Area
+-- ============================================================================
+-- Purpose: map labels, fit-bounds and "zoom to unit" used to rely on
+-- hand-coded county centroids plus grid offsets. Each boundary table now
+-- stores PostGIS-derived geometry alongside its polygon:
+--   centroid     ST_Centroid (may fall outside concave/multi-part units)
+--   label_point  ST_PointOnSurface (always inside; use for labels/markers)
+--   bbox         [min_lon, min_lat, max_lon, max_lat] for fitBounds
+--   area_km2     geodesic area
+-- A trigger keeps them in sync whenever geometry is inserted or changed;
+-- scripts/build_boundary_geometry.py rebuilds them in bulk.
+-- ============================================================================
+
+ALTER TABLE counties
+    ADD COLUMN IF NOT EXISTS centroid GEOMETRY(Point, 4326),
+    ADD COLUMN IF NOT EXISTS label_point GEOMETRY(Point, 4326),
+    ADD COLUMN IF NOT EXISTS bbox DOUBLE PRECISION[],
+    ADD COLUMN IF NOT EXISTS area_km2 DOUBLE PRECISION;
+
+ALTER TABLE constituencies
+    ADD COLUMN IF NOT EXISTS centroid GEOMETRY(Point, 4326),
+    ADD COLUMN IF NOT EXISTS label_point GEOMETRY(Point, 4326),
+    ADD COLUMN IF NOT EXISTS bbox DOUBLE PRECISION[],
+    ADD COLUMN IF NOT EXISTS area_km2 DOUBLE PRECISION;
+
+ALTER TABLE wards
+    ADD COLUMN IF NOT EXISTS centroid GEOMETRY(Point, 4326),
+    ADD COLUMN IF NOT EXISTS label_point GEOMETRY(Point, 4326),
+    ADD COLUMN IF NOT EXISTS bbox DOUBLE PRECISION[],
+    ADD COLUMN IF NOT EXISTS area_km2 DOUBLE PRECISION;
+
+CREATE OR REPLACE FUNCTION set_boundary_derived_geometry()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.geometry IS NULL OR ST_IsEmpty(NEW.geometry) THEN
+        NEW.centroid := NULL;
+        NEW.label_point := NULL;
+        NEW.bbox := NULL;
+        NEW.area_km2 := NULL;
+    ELSE
+        NEW.centroid := ST_Centroid(NEW.geometry);
+        NEW.label_point := ST_PointOnSurface(NEW.geometry);
+        NEW.bbox := ARRAY[ST_XMin(NEW.geometry), ST_YMin(NEW.geometry),
+                          ST_XMax(NEW.geometry), ST_YMax(NEW.geometry)];
+        NEW.area_km2 := ST_Area(NEW.geometry::geography) / 1000000.0;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_counties_derived_geometry ON counties;
+CREATE TRIGGER trigger_counties_derived_geometry
+    BEFORE INSERT OR UPDATE OF geometry ON counties
+    FOR EACH ROW
+    EXECUTE FUNCTION set_boundary_derived_geometry();
+
+DROP TRIGGER IF EXISTS trigger_constituencies_derived_geometry ON constituencies;
+CREATE TRIGGER trigger_constituencies_derived_geometry
+    BEFORE INSERT OR UPDATE OF geometry ON constituencies
+    FOR EACH ROW
+    EXECUTE FUNCTION set_boundary_derived_geometry();
+
+DROP TRIGGER IF EXISTS trigger_wards_derived_geometry ON wards;
+CREATE TRIGGER trigger_wards_derived_geometry
+    BEFORE INSERT OR UPDATE OF geometry ON wards
+    FOR EACH ROW
+    EXECUTE FUNCTION set_boundary_derived_geometry();
+
+-- Backfill existing rows (the trigger fires on UPDATE OF geometry)
+UPDATE counties SET geometry = geometry WHERE geometry IS NOT NULL;
+UPDATE constituencies SET geometry = geometry WHERE geometry IS NOT NULL;
+UPDATE wards SET geometry = geometry WHERE geometry IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_counties_label_point ON counties USING GIST(label_point);
+CREATE INDEX IF NOT EXISTS idx_constituencies_label_point ON constituencies USING GIST(label_point);
+CREATE INDEX IF NOT EXISTS idx_wards_label_point ON wards USING GIST(label_point);
@@ -0,0 +1,20 @@
+-- ============================================================================
+-- Migration 010: Spatial Index on Polling Station Locations
+-- ============================================================================
+-- Purpose: /api/polling_stations/nearest orders stations by distance with
+-- the PostGIS KNN operator (geometry <-> point), and the per-ward density
+-- report finds each station's nearest neighbour the same way. Both walk the
+-- GIST index on polling_stations.geometry instead of scanning every station.
+--
+-- Migration 004 already creates that index (idx_polling_stations_geometry);
+-- this only ensures it exists on databases where the table was created
+-- otherwise, and removes the duplicate an earlier version of this migration
+-- added under another name.
+-- ============================================================================
+
+DROP INDEX IF EXISTS idx_polling_stations_geom;
+
+CREATE INDEX IF NOT EXISTS idx_polling_stations_geometry
+    ON polling_stations USING GIST(geometry);
+
+ANALYZE polling_stations;
@@ -0,0 +1,57 @@
+-- ============================================================================
+-- Migration 011: Trigger-Maintained Data Versions
+-- ============================================================================
+-- Purpose: the API caches boundary GeoJSON/TopoJSON, vector tiles (on disk)
+-- and the in-memory ward and station indexes until the underlying table
+-- changes. COUNT(*) + MAX(updated_at) missed changes made with plain SQL
+-- (nothing but the ORM sets updated_at) and cost a full scan per lookup.
+-- A statement-level trigger now bumps one row per table in data_versions on
+-- every INSERT, UPDATE, DELETE or TRUNCATE, so a version lookup is a
+-- primary-key read and any reload invalidates the caches.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO data_versions (table_name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name) DO UPDATE
+        SET version = data_versions.version + 1,
+            updated_at = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_counties_data_version ON counties;
+CREATE TRIGGER trigger_counties_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON counties
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+DROP TRIGGER IF EXISTS trigger_constituencies_data_version ON constituencies;
+CREATE TRIGGER trigger_constituencies_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON constituencies
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+DROP TRIGGER IF EXISTS trigger_wards_data_version ON wards;
+CREATE TRIGGER trigger_wards_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON wards
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+DROP TRIGGER IF EXISTS trigger_polling_stations_data_version ON polling_stations;
+CREATE TRIGGER trigger_polling_stations_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON polling_stations
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+-- Start every table at a fresh version: caches built before this migration
+-- (including tiles on disk) are not reused
+INSERT INTO data_versions (table_name)
+VALUES ('counties'), ('constituencies'), ('wards'), ('polling_stations')
+ON CONFLICT (table_name) DO UPDATE
+    SET version = data_versions.version + 1,
+        updated_at = CURRENT_TIMESTAMP;
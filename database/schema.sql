@@ -15,6 +15,10 @@ CREATE TABLE counties (
     code VARCHAR(3) UNIQUE NOT NULL,  -- IEBC county code
     name VARCHAR(100) NOT NULL,
     geometry GEOMETRY(MultiPolygon, 4326),
+    centroid GEOMETRY(Point, 4326),
+    label_point GEOMETRY(Point, 4326),  -- ST_PointOnSurface, always inside the unit
+    bbox DOUBLE PRECISION[],  -- [min_lon, min_lat, max_lon, max_lat]
+    area_km2 DOUBLE PRECISION,
     population_2019 INTEGER,
     registered_voters_2022 INTEGER,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -27,6 +31,10 @@ CREATE TABLE constituencies (
     name VARCHAR(100) NOT NULL,
     county_id INTEGER REFERENCES counties(id) ON DELETE CASCADE,
     geometry GEOMETRY(MultiPolygon, 4326),
+    centroid GEOMETRY(Point, 4326),
+    label_point GEOMETRY(Point, 4326),  -- ST_PointOnSurface, always inside the unit
+    bbox DOUBLE PRECISION[],  -- [min_lon, min_lat, max_lon, max_lat]
+    area_km2 DOUBLE PRECISION,
     population_2019 INTEGER,
     registered_voters_2022 INTEGER,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -39,6 +47,10 @@ CREATE TABLE wards (
     name VARCHAR(100) NOT NULL,
     constituency_id INTEGER REFERENCES constituencies(id) ON DELETE CASCADE,
     geometry GEOMETRY(MultiPolygon, 4326),
+    centroid GEOMETRY(Point, 4326),
+    label_point GEOMETRY(Point, 4326),  -- ST_PointOnSurface, always inside the unit
+    bbox DOUBLE PRECISION[],  -- [min_lon, min_lat, max_lon, max_lat]
+    area_km2 DOUBLE PRECISION,
     population_2019 INTEGER,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -162,6 +174,19 @@ CREATE TABLE forecast_county (
     UNIQUE(forecast_run_id, county_id, candidate_id)
 );
 
+-- Thinned posterior draws behind forecast_county (optional per run)
+CREATE TABLE forecast_county_draws (
+    id SERIAL PRIMARY KEY,
+    forecast_run_id UUID REFERENCES forecast_runs(id) ON DELETE CASCADE,
+    county_id INTEGER REFERENCES counties(id) ON DELETE CASCADE,
+    candidate_id INTEGER REFERENCES candidates(id) ON DELETE CASCADE,
+    n_draws INTEGER NOT NULL CHECK (n_draws > 0),
+    encoding VARCHAR(20) NOT NULL DEFAULT 'zlib-f2le',
+    draws BYTEA NOT NULL,  -- Vote share draws (%), same draw order for every candidate
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(forecast_run_id, county_id, candidate_id)
+);
+
 CREATE TABLE forecast_constituency (
     id SERIAL PRIMARY KEY,
     forecast_run_id UUID REFERENCES forecast_runs(id) ON DELETE CASCADE,
@@ -253,8 +278,15 @@ CREATE TABLE data_ingestion_log (
     source_url VARCHAR(500),
     file_hash VARCHAR(64),  -- SHA256 of source file
     ingestion_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    records_processed INTEGER,
-    status VARCHAR(50),  -- 'success', 'partial', 'failed'
+    records_processed INTEGER,  -- Rows read from the source
+    rows_inserted INTEGER,
+    rows_updated INTEGER,
+    rows_unchanged INTEGER,
+    rows_skipped INTEGER,
+    duration_ms INTEGER,
+    source_file VARCHAR(500),
+    completed_at TIMESTAMP,
+    status VARCHAR(50),  -- 'running', 'success', 'skipped', 'partial', 'failed'
     error_log TEXT
 );
 
@@ -272,11 +304,77 @@ CREATE INDEX idx_candidates_position ON candidates(position);
 CREATE INDEX idx_election_results_county_election ON election_results_county(election_id, county_id);
 CREATE INDEX idx_election_results_constituency_election ON election_results_constituency(election_id, constituency_id);
 CREATE INDEX idx_forecast_county_run ON forecast_county(forecast_run_id);
+CREATE INDEX idx_forecast_county_draws_run ON forecast_county_draws(forecast_run_id);
+CREATE INDEX idx_ingestion_log_source_hash ON data_ingestion_log(source_name, file_hash, ingestion_timestamp DESC) WHERE status = 'success';
 CREATE INDEX idx_forecast_constituency_run ON forecast_constituency(forecast_run_id);
+CREATE INDEX idx_forecast_runs_fingerprint ON forecast_runs ((parameters->>'fingerprint'));
 CREATE INDEX idx_county_ethnicity_county ON county_ethnicity_aggregate(county_id);
 
 -- Spatial indexes
 CREATE INDEX idx_counties_geom ON counties USING GIST(geometry);
 CREATE INDEX idx_constituencies_geom ON constituencies USING GIST(geometry);
 CREATE INDEX idx_wards_geom ON wards USING GIST(geometry);
+CREATE INDEX idx_counties_label_point ON counties USING GIST(label_point);
+CREATE INDEX idx_constituencies_label_point ON constituencies USING GIST(label_point);
+CREATE INDEX idx_wards_label_point ON wards USING GIST(label_point);
+
+-- Derived geometry (centroid, label_point, bbox, area_km2) follows geometry
+CREATE OR REPLACE FUNCTION set_boundary_derived_geometry()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.geometry IS NULL OR ST_IsEmpty(NEW.geometry) THEN
+        NEW.centroid := NULL;
+        NEW.label_point := NULL;
+        NEW.bbox := NULL;
+        NEW.area_km2 := NULL;
+    ELSE
+        NEW.centroid := ST_Centroid(NEW.geometry);
+        NEW.label_point := ST_PointOnSurface(NEW.geometry);
+        NEW.bbox := ARRAY[ST_XMin(NEW.geometry), ST_YMin(NEW.geometry),
+                          ST_XMax(NEW.geometry), ST_YMax(NEW.geometry)];
+        NEW.area_km2 := ST_Area(NEW.geometry::geography) / 1000000.0;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_counties_derived_geometry
+    BEFORE INSERT OR UPDATE OF geometry ON counties
+    FOR EACH ROW EXECUTE FUNCTION set_boundary_derived_geometry();
+CREATE TRIGGER trigger_constituencies_derived_geometry
+    BEFORE INSERT OR UPDATE OF geometry ON constituencies
+    FOR EACH ROW EXECUTE FUNCTION set_boundary_derived_geometry();
+CREATE TRIGGER trigger_wards_derived_geometry
+    BEFORE INSERT OR UPDATE OF geometry ON wards
+    FOR EACH ROW EXECUTE FUNCTION set_boundary_derived_geometry();
+
+-- Data versions: bumped once per statement that changes a boundary table;
+-- API caches (geo, tiles, spatial indexes) are keyed on them. polling_stations
+-- gets the same trigger in migration 011.
+CREATE TABLE data_versions (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO data_versions (table_name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name) DO UPDATE
+        SET version = data_versions.version + 1,
+            updated_at = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
 
+CREATE TRIGGER trigger_counties_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON counties
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+CREATE TRIGGER trigger_constituencies_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON constituencies
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+CREATE TRIGGER trigger_wards_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON wards
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
@@ -56,6 +56,7 @@ class ETLConfig(BaseSettings):
     
     # Processing settings
     chunk_size: int = Field(default=1000, description="Batch size for DB inserts")
+    pdf_workers: Optional[int] = Field(default=None, description="Processes for PDF page extraction (default: CPU count)")
     max_retries: int = Field(default=3, description="Max retries for HTTP requests")
     request_timeout: int = Field(default=30, description="HTTP request timeout (seconds)")
     
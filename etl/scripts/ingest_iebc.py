@@ -7,14 +7,12 @@ Usage:
     python ingest_iebc.py --year 2022 --election-type presidential
 """
 import argparse
-import hashlib
 import sys
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
 import requests
 import pandas as pd
-import pdfplumber
 from loguru import logger
 from sqlalchemy import create_engine, text
 from tenacity import retry, stop_after_attempt, wait_exponential
@@ -22,14 +20,21 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 from config import config
+from pdf_pages import extract_page_tables
+from ingestion_log import IngestionRun, file_sha256
+
+SOURCE_NAME = 'IEBC_RESULTS_2022:pdf:ingest_iebc'
 
 
 class IEBCIngester:
     """Ingest IEBC election results data"""
     
-    def __init__(self, year: int, election_type: str = "presidential"):
+    def __init__(self, year: int, election_type: str = "presidential", workers: Optional[int] = None,
+                 force: bool = False):
         self.year = year
         self.election_type = election_type
+        self.workers = workers
+        self.force = force
         self.engine = create_engine(str(config.database_url))
         self.raw_dir = config.raw_data_dir / "iebc" / str(year)
         self.raw_dir.mkdir(parents=True, exist_ok=True)
@@ -58,13 +63,9 @@ class IEBCIngester:
     
     def compute_file_hash(self, filepath: Path) -> str:
         """Compute SHA256 hash of file"""
-        sha256_hash = hashlib.sha256()
-        with open(filepath, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+        return file_sha256(filepath)
     
-    def parse_2022_presidential_pdf(self, pdf_path: Path) -> pd.DataFrame:
+    def parse_2022_presidential_pdf(self, pdf_path: Path, file_hash: Optional[str] = None) -> pd.DataFrame:
         """
         Parse IEBC 2022 presidential results PDF
         
@@ -74,40 +75,37 @@ class IEBCIngester:
         - Candidate votes (multiple columns)
         - Total votes cast
         - Rejected votes
+        
+        Page tables are extracted in parallel and cached per page (see
+        pdf_pages.py), so re-parsing only re-runs the row logic below.
         """
         logger.info(f"Parsing PDF: {pdf_path}")
         
         results = []
         
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                logger.debug(f"Processing page {page_num}/{len(pdf.pages)}")
+        for page_num, tables in extract_page_tables(pdf_path, file_hash, workers=self.workers):
+            for table in tables:
+                if not table or len(table) < 2:
+                    continue
                 
-                # Extract tables from page
-                tables = page.extract_tables()
+                # First row is usually header
+                header = table[0]
                 
-                for table in tables:
-                    if not table or len(table) < 2:
+                # Process data rows
+                for row in table[1:]:
+                    if len(row) < 3:
                         continue
                     
-                    # First row is usually header
-                    header = table[0]
+                    # Basic parsing - adjust based on actual PDF structure
+                    # This is a template; real implementation needs PDF inspection
+                    county_name = row[0] if row[0] else None
                     
-                    # Process data rows
-                    for row in table[1:]:
-                        if len(row) < 3:
-                            continue
-                        
-                        # Basic parsing - adjust based on actual PDF structure
-                        # This is a template; real implementation needs PDF inspection
-                        county_name = row[0] if row[0] else None
-                        
-                        if county_name and county_name.strip():
-                            results.append({
-                                'county_name': county_name.strip(),
-                                'raw_row': row,
-                                'page': page_num
-                            })
+                    if county_name and county_name.strip():
+                        results.append({
+                            'county_name': county_name.strip(),
+                            'raw_row': row,
+                            'page': page_num
+                        })
         
         df = pd.DataFrame(results)
         logger.info(f"Extracted {len(df)} rows from PDF")
@@ -138,29 +136,19 @@ class IEBCIngester:
         
         return pd.DataFrame(normalized)
     
-    def load_to_database(self, df: pd.DataFrame, source_file: str, file_hash: str):
-        """Load processed data to database"""
+    def load_to_database(self, df: pd.DataFrame) -> int:
+        """
+        Load processed data to database
+
+        Only the election record is written so far; the county results stay
+        in the processed CSV.
+
+        Returns:
+            Number of rows inserted (0 if the election already existed)
+        """
         logger.info(f"Loading {len(df)} records to database")
         
         with self.engine.begin() as conn:
-            # Log ingestion
-            ingestion_log = {
-                'source_name': 'IEBC',
-                'source_url': config.iebc_2022_results_url,
-                'file_hash': file_hash,
-                'records_processed': len(df),
-                'status': 'success'
-            }
-            
-            conn.execute(
-                text("""
-                    INSERT INTO data_ingestion_log 
-                    (source_name, source_url, file_hash, records_processed, status)
-                    VALUES (:source_name, :source_url, :file_hash, :records_processed, :status)
-                """),
-                ingestion_log
-            )
-            
             # Create or get election record
             election_result = conn.execute(
                 text("""
@@ -178,6 +166,7 @@ class IEBCIngester:
             ).fetchone()
             
             logger.success("Data loaded successfully")
+        return 1 if election_result is not None else 0
     
     def run(self):
         """Execute full ingestion pipeline"""
@@ -194,28 +183,44 @@ class IEBCIngester:
                 logger.error(f"No data source configured for year {self.year}")
                 return
             
-            # Compute hash
+            # Compute hash; an unchanged file was already loaded
             file_hash = self.compute_file_hash(pdf_path)
             logger.info(f"File hash: {file_hash}")
             
-            # Parse PDF
-            raw_df = self.parse_2022_presidential_pdf(pdf_path)
-            
-            # Save raw data
-            raw_csv = self.raw_dir / "raw_parsed.csv"
-            raw_df.to_csv(raw_csv, index=False)
-            logger.info(f"Saved raw parsed data to {raw_csv}")
-            
-            # Normalize
-            normalized_df = self.normalize_county_results(raw_df)
-            
-            # Save processed data
-            processed_csv = config.processed_data_dir / f"iebc_{self.year}_county_results.csv"
-            normalized_df.to_csv(processed_csv, index=False)
-            logger.info(f"Saved processed data to {processed_csv}")
-            
-            # Load to database
-            self.load_to_database(normalized_df, str(pdf_path), file_hash)
+            log_conn = self.engine.raw_connection()
+            try:
+                with IngestionRun(log_conn, SOURCE_NAME, file_hash, source_file=pdf_path,
+                                  source_url=config.iebc_2022_results_url) as run:
+                    if run.previous and not self.force:
+                        run.skip()
+                        logger.info(f"File already ingested at {run.previous[1]}, nothing to do (use --force to reload)")
+                        return
+                    
+                    # Parse PDF
+                    raw_df = self.parse_2022_presidential_pdf(pdf_path, file_hash)
+                    
+                    # Save raw data
+                    raw_csv = self.raw_dir / "raw_parsed.csv"
+                    raw_df.to_csv(raw_csv, index=False)
+                    logger.info(f"Saved raw parsed data to {raw_csv}")
+                    
+                    # Normalize
+                    normalized_df = self.normalize_county_results(raw_df)
+                    
+                    # Save processed data
+                    processed_csv = config.processed_data_dir / f"iebc_{self.year}_county_results.csv"
+                    normalized_df.to_csv(processed_csv, index=False)
+                    logger.info(f"Saved processed data to {processed_csv}")
+                    
+                    # Load to database
+                    inserted = self.load_to_database(normalized_df)
+                    run.rows_read = len(raw_df)
+                    run.rows_inserted = inserted
+                    run.rows_unchanged = 1 - inserted
+                    run.rows_skipped = len(raw_df) - len(normalized_df)
+                logger.info(run.summary())
+            finally:
+                log_conn.close()
             
             logger.success("IEBC ingestion completed successfully")
             
@@ -228,6 +233,8 @@ def main():
     parser = argparse.ArgumentParser(description="Ingest IEBC election results")
     parser.add_argument("--year", type=int, default=2022, help="Election year")
     parser.add_argument("--election-type", default="presidential", help="Election type")
+    parser.add_argument("--workers", type=int, default=None, help="Processes for PDF page extraction")
+    parser.add_argument("--force", action="store_true", help="Reload even if this file was already ingested")
     parser.add_argument("--verbose", action="store_true", help="Verbose logging")
     
     args = parser.parse_args()
@@ -236,7 +243,8 @@ def main():
         logger.remove()
         logger.add(sys.stderr, level="DEBUG")
     
-    ingester = IEBCIngester(year=args.year, election_type=args.election_type)
+    ingester = IEBCIngester(year=args.year, election_type=args.election_type, workers=args.workers,
+                            force=args.force)
     ingester.run()
 
 
@@ -10,26 +10,30 @@ Usage:
     python ingest_knbs.py --census-year 2019
 """
 import argparse
-import hashlib
 import sys
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 import requests
 import pandas as pd
-import pdfplumber
 from loguru import logger
 from sqlalchemy import create_engine, text
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 sys.path.append(str(Path(__file__).parent.parent))
 from config import config
+from pdf_pages import extract_page_tables
+from ingestion_log import IngestionRun, combine_hashes, diff_rows, file_sha256
+
+SOURCE_NAME = 'KNBS_CENSUS_2019:ethnicity:ingest_knbs'
 
 
 class KNBSIngester:
     """Ingest KNBS Census data with privacy safeguards"""
     
-    def __init__(self, census_year: int = 2019):
+    def __init__(self, census_year: int = 2019, workers: Optional[int] = None, force: bool = False):
         self.census_year = census_year
+        self.workers = workers
+        self.force = force
         self.engine = create_engine(str(config.database_url))
         self.raw_dir = config.raw_data_dir / "knbs" / str(census_year)
         self.raw_dir.mkdir(parents=True, exist_ok=True)
@@ -64,6 +68,8 @@ class KNBSIngester:
         - County populations
         - Sub-county populations
         - Urban/rural breakdown
+        
+        Page tables come from the parallel per-page cache (pdf_pages.py).
         """
         logger.info(f"Parsing Volume I: {pdf_path}")
         
@@ -72,25 +78,22 @@ class KNBSIngester:
         
         results = []
         
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                tables = page.extract_tables()
+        for page_num, tables in extract_page_tables(pdf_path, workers=self.workers):
+            for table in tables:
+                if not table or len(table) < 2:
+                    continue
                 
-                for table in tables:
-                    if not table or len(table) < 2:
-                        continue
-                    
-                    # Extract county/sub-county population data
-                    # Adjust based on actual table structure
-                    for row in table[1:]:
-                        if len(row) >= 3:
-                            results.append({
-                                'location_name': row[0],
-                                'total_population': row[1],
-                                'male': row[2] if len(row) > 2 else None,
-                                'female': row[3] if len(row) > 3 else None,
-                                'page': page_num
-                            })
+                # Extract county/sub-county population data
+                # Adjust based on actual table structure
+                for row in table[1:]:
+                    if len(row) >= 3:
+                        results.append({
+                            'location_name': row[0],
+                            'total_population': row[1],
+                            'male': row[2] if len(row) > 2 else None,
+                            'female': row[3] if len(row) > 3 else None,
+                            'page': page_num
+                        })
         
         df = pd.DataFrame(results)
         logger.info(f"Extracted {len(df)} population records")
@@ -108,39 +111,38 @@ class KNBSIngester:
         
         Returns:
         - County-level ethnicity counts (aggregated)
+        
+        Page tables come from the parallel per-page cache (pdf_pages.py).
         """
         logger.info(f"Parsing Volume IV (Ethnicity): {pdf_path}")
         logger.warning("PRIVACY MODE: Only aggregate county-level data will be extracted")
         
         results = []
         
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                tables = page.extract_tables()
+        for page_num, tables in extract_page_tables(pdf_path, workers=self.workers):
+            for table in tables:
+                if not table or len(table) < 2:
+                    continue
                 
-                for table in tables:
-                    if not table or len(table) < 2:
-                        continue
-                    
-                    # Look for ethnicity tables
-                    # KNBS Volume IV has tables like:
-                    # County | Kikuyu | Luhya | Kalenjin | ... | Total
-                    
-                    header = table[0]
-                    
-                    # Check if this is an ethnicity table
-                    if any('ethnic' in str(h).lower() or 'tribe' in str(h).lower() for h in header if h):
-                        for row in table[1:]:
-                            if len(row) >= 2:
-                                county_name = row[0]
-                                
-                                # Extract ethnicity counts
-                                # This is a template - adjust based on actual structure
-                                results.append({
-                                    'county_name': county_name,
-                                    'raw_data': row,
-                                    'page': page_num
-                                })
+                # Look for ethnicity tables
+                # KNBS Volume IV has tables like:
+                # County | Kikuyu | Luhya | Kalenjin | ... | Total
+                
+                header = table[0]
+                
+                # Check if this is an ethnicity table
+                if any('ethnic' in str(h).lower() or 'tribe' in str(h).lower() for h in header if h):
+                    for row in table[1:]:
+                        if len(row) >= 2:
+                            county_name = row[0]
+                            
+                            # Extract ethnicity counts
+                            # This is a template - adjust based on actual structure
+                            results.append({
+                                'county_name': county_name,
+                                'raw_data': row,
+                                'page': page_num
+                            })
         
         df = pd.DataFrame(results)
         logger.info(f"Extracted {len(df)} ethnicity records")
@@ -198,41 +200,42 @@ class KNBSIngester:
         
         return pd.DataFrame(normalized)
     
-    def load_to_database(self, population_df: pd.DataFrame, ethnicity_df: pd.DataFrame):
-        """Load processed data to database"""
+    def load_to_database(self, ethnicity_df: pd.DataFrame, run: IngestionRun):
+        """
+        Load processed data to database
+        
+        Ethnicity aggregates are diffed against the stored rows for this
+        census year, so only new or changed counts are written.
+        """
         logger.info("Loading data to database")
         
         with self.engine.begin() as conn:
-            # Log ingestion
-            conn.execute(
-                text("""
-                    INSERT INTO data_ingestion_log 
-                    (source_name, source_url, records_processed, status)
-                    VALUES (:source, :url, :records, :status)
-                """),
-                {
-                    'source': 'KNBS',
-                    'url': config.knbs_2019_census_volume1_url,
-                    'records': len(population_df) + len(ethnicity_df),
-                    'status': 'success'
-                }
-            )
+            county_ids = dict(conn.execute(text("SELECT name, id FROM counties")).fetchall())
+            existing = {
+                (county_id, ethnicity): (count,)
+                for county_id, ethnicity, count in conn.execute(
+                    text("""
+                        SELECT county_id, ethnicity_group, population_count
+                        FROM county_ethnicity_aggregate
+                        WHERE census_year = :year
+                    """),
+                    {'year': self.census_year}
+                )
+            }
             
-            # Load ethnicity data (with privacy safeguards already applied)
-            for _, row in ethnicity_df.iterrows():
-                # Get county_id
-                county_result = conn.execute(
-                    text("SELECT id FROM counties WHERE name = :name"),
-                    {'name': row['county_name']}
-                ).fetchone()
-                
-                if not county_result:
-                    logger.warning(f"County not found: {row['county_name']}")
+            incoming = {}
+            for row in ethnicity_df.itertuples(index=False):
+                county_id = county_ids.get(row.county_name)
+                if county_id is None:
+                    logger.warning(f"County not found: {row.county_name}")
+                    run.rows_failed += 1
                     continue
-                
-                county_id = county_result[0]
-                
-                # Insert ethnicity aggregate
+                incoming[(county_id, row.ethnicity_group)] = (int(row.population_count),)
+            
+            new_keys, changed_keys, run.rows_unchanged = diff_rows(existing, incoming.items())
+            
+            # Load ethnicity data (with privacy safeguards already applied)
+            for county_id, ethnicity in new_keys + changed_keys:
                 conn.execute(
                     text("""
                         INSERT INTO county_ethnicity_aggregate 
@@ -243,12 +246,14 @@ class KNBSIngester:
                     """),
                     {
                         'county_id': county_id,
-                        'year': row['census_year'],
-                        'ethnicity': row['ethnicity_group'],
-                        'count': row['population_count']
+                        'year': self.census_year,
+                        'ethnicity': ethnicity,
+                        'count': incoming[(county_id, ethnicity)][0]
                     }
                 )
             
+            run.rows_inserted = len(new_keys)
+            run.rows_updated = len(changed_keys)
             logger.success("Data loaded successfully")
     
     def run(self):
@@ -268,22 +273,40 @@ class KNBSIngester:
                 "2019_census_volume4.pdf"
             )
             
-            # Parse population data
-            population_df = self.parse_volume1_population(vol1_path)
-            
-            # Parse ethnicity data
-            ethnicity_raw_df = self.parse_volume4_ethnicity(vol4_path)
-            
-            # Normalize with privacy safeguards
-            ethnicity_df = self.normalize_ethnicity_data(ethnicity_raw_df)
-            
-            # Save processed data
-            ethnicity_csv = config.processed_data_dir / f"knbs_{self.census_year}_ethnicity_aggregate.csv"
-            ethnicity_df.to_csv(ethnicity_csv, index=False)
-            logger.info(f"Saved ethnicity data to {ethnicity_csv}")
+            # Both volumes make up one source; skip if neither changed
+            file_hash = combine_hashes([file_sha256(vol1_path), file_sha256(vol4_path)])
+            logger.info(f"Source hash: {file_hash}")
             
-            # Load to database
-            self.load_to_database(population_df, ethnicity_df)
+            log_conn = self.engine.raw_connection()
+            try:
+                with IngestionRun(log_conn, SOURCE_NAME, file_hash,
+                                  source_file=f"{vol1_path}, {vol4_path}",
+                                  source_url=config.knbs_2019_census_volume1_url) as run:
+                    if run.previous and not self.force:
+                        run.skip()
+                        logger.info(f"Files already ingested at {run.previous[1]}, nothing to do (use --force to reload)")
+                        return
+                    
+                    # Parse population data
+                    population_df = self.parse_volume1_population(vol1_path)
+                    
+                    # Parse ethnicity data
+                    ethnicity_raw_df = self.parse_volume4_ethnicity(vol4_path)
+                    
+                    # Normalize with privacy safeguards
+                    ethnicity_df = self.normalize_ethnicity_data(ethnicity_raw_df)
+                    
+                    # Save processed data
+                    ethnicity_csv = config.processed_data_dir / f"knbs_{self.census_year}_ethnicity_aggregate.csv"
+                    ethnicity_df.to_csv(ethnicity_csv, index=False)
+                    logger.info(f"Saved ethnicity data to {ethnicity_csv}")
+                    
+                    # Load to database
+                    run.rows_read = len(population_df) + len(ethnicity_df)
+                    self.load_to_database(ethnicity_df, run)
+                logger.info(run.summary())
+            finally:
+                log_conn.close()
             
             logger.success("KNBS ingestion completed successfully")
             
@@ -295,6 +318,8 @@ class KNBSIngester:
 def main():
     parser = argparse.ArgumentParser(description="Ingest KNBS census data")
     parser.add_argument("--census-year", type=int, default=2019, help="Census year")
+    parser.add_argument("--workers", type=int, default=None, help="Processes for PDF page extraction")
+    parser.add_argument("--force", action="store_true", help="Reload even if these files were already ingested")
     parser.add_argument("--verbose", action="store_true", help="Verbose logging")
     
     args = parser.parse_args()
@@ -303,7 +328,7 @@ def main():
         logger.remove()
         logger.add(sys.stderr, level="DEBUG")
     
-    ingester = KNBSIngester(census_year=args.census_year)
+    ingester = KNBSIngester(census_year=args.census_year, workers=args.workers, force=args.force)
     ingester.run()
 
 
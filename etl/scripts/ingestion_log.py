@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Hash-based ingestion bookkeeping on data_ingestion_log
+
+Every ingester (etl/scripts/ingest_*.py and scripts/import_*.py) wraps a
+load in an IngestionRun. The run records the source file's SHA256, row
+counts, duration and outcome, and knows whether the same file was already
+loaded successfully, so nightly reloads of an unchanged file become a
+cheap no-op. When the file did change, loaders use diff_rows to write only
+the rows whose values differ from what is already stored.
+
+A skip is decided per (source_name, file hash), so source_name must name
+the loader and what it writes, not just the file: several scripts load
+the same register CSV into different tables, and one succeeding must not
+make the others skip. The convention is '<source>:<target>:<loader>',
+e.g. 'IEBC_ROV_2022:polling_stations:import_polling_stations'.
+
+Works on any psycopg2 (DB-API, %s paramstyle) connection, so it is shared
+by the SQLAlchemy-based ETL (engine.raw_connection()) and the plain
+psycopg2 import scripts. It has no dependency on etl/config.py.
+"""
+import hashlib
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+STATUS_RUNNING = 'running'
+STATUS_SUCCESS = 'success'
+STATUS_SKIPPED = 'skipped'
+STATUS_PARTIAL = 'partial'
+STATUS_FAILED = 'failed'
+
+
+def file_sha256(filepath: Path) -> str:
+    """Compute SHA256 hash of file"""
+    sha256_hash = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for byte_block in iter(lambda: f.read(1 << 20), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def combine_hashes(hashes: Sequence[str]) -> str:
+    """Single hash for a source made of several files (order-sensitive)"""
+    return hashlib.sha256("\n".join(hashes).encode()).hexdigest()
+
+
+def find_successful_ingestion(conn, source_name: str, file_hash: str) -> Optional[Tuple[int, object]]:
+    """(log id, timestamp) of the latest successful load of this exact file, or None"""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT id, ingestion_timestamp FROM data_ingestion_log
+            WHERE source_name = %s AND file_hash = %s AND status = %s
+            ORDER BY ingestion_timestamp DESC
+            LIMIT 1
+        """, (source_name, file_hash, STATUS_SUCCESS))
+        return cursor.fetchone()
+
+
+def diff_rows(
+    existing: Dict[Hashable, tuple],
+    incoming: Iterable[Tuple[Hashable, tuple]]
+) -> Tuple[List[Hashable], List[Hashable], int]:
+    """
+    Row-level diff of incoming (key, values) pairs against stored values
+
+    Returns:
+        (new keys, changed keys, number of unchanged rows)
+    """
+    new_keys, changed_keys, unchanged = [], [], 0
+    for key, values in incoming:
+        stored = existing.get(key)
+        if stored is None:
+            new_keys.append(key)
+        elif tuple(stored) != tuple(values):
+            changed_keys.append(key)
+        else:
+            unchanged += 1
+    return new_keys, changed_keys, unchanged
+
+
+class IngestionRun:
+    """
+    One ingestion attempt, logged to data_ingestion_log
+
+    Usage:
+        with IngestionRun(conn, 'IEBC_ROV_2022:polling_stations:import_polling_stations', file_hash, source_file=path) as run:
+            if run.previous and not force:
+                run.skip()
+                return
+            ...load...
+            run.rows_read, run.rows_inserted = n_read, n_new
+
+    A 'running' row is committed on entry. On a clean exit the row is
+    finished as 'success' (or 'skipped') and committed together with the
+    caller's pending work; on an exception the caller's work is rolled back
+    and the row is finished as 'failed' with the traceback in error_log.
+
+    Rows the loader meant to write but could not (a caught per-row error, a
+    parent row not found) go in rows_failed. A run with failed rows finishes
+    as 'partial', which does not count as a successful load of the file, so
+    the next run retries it without --force. rows_skipped is for rows that
+    can never be loaded (unparseable lines, rows filtered out by design);
+    both are stored in the rows_skipped column.
+    """
+
+    def __init__(self, conn, source_name: str, file_hash: str,
+                 source_file: Optional[str] = None, source_url: Optional[str] = None):
+        self.conn = conn
+        self.source_name = source_name
+        self.file_hash = file_hash
+        self.source_file = str(source_file) if source_file is not None else None
+        self.source_url = source_url
+
+        self.rows_read = 0
+        self.rows_inserted = 0
+        self.rows_updated = 0
+        self.rows_unchanged = 0
+        self.rows_skipped = 0
+        self.rows_failed = 0
+
+        self.log_id = None
+        self.status = STATUS_RUNNING
+        self.previous = None
+        self._started = None
+        self._finished = None
+
+    def __enter__(self) -> 'IngestionRun':
+        self.previous = find_successful_ingestion(self.conn, self.source_name, self.file_hash)
+        self._started = time.perf_counter()
+
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO data_ingestion_log
+                (source_name, source_url, source_file, file_hash, status)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING id
+            """, (self.source_name, self.source_url, self.source_file, self.file_hash, STATUS_RUNNING))
+            self.log_id = cursor.fetchone()[0]
+        self.conn.commit()
+        return self
+
+    def skip(self):
+        """Mark the run as a no-op because this file was already loaded"""
+        self.status = STATUS_SKIPPED
+
+    @property
+    def duration_ms(self) -> int:
+        return int(((self._finished or time.perf_counter()) - self._started) * 1000)
+
+    def __exit__(self, exc_type, exc, tb):
+        self._finished = time.perf_counter()
+        error_log = None
+        if exc_type is None:
+            if self.status == STATUS_RUNNING:
+                self.status = STATUS_PARTIAL if self.rows_failed else STATUS_SUCCESS
+            if self.rows_failed:
+                error_log = f"{self.rows_failed} rows could not be loaded"
+        else:
+            self.conn.rollback()
+            self.status = STATUS_FAILED
+            error_log = ''.join(traceback.format_exception(exc_type, exc, tb))
+
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE data_ingestion_log
+                SET status = %s,
+                    records_processed = %s,
+                    rows_inserted = %s,
+                    rows_updated = %s,
+                    rows_unchanged = %s,
+                    rows_skipped = %s,
+                    duration_ms = %s,
+                    completed_at = CURRENT_TIMESTAMP,
+                    error_log = %s
+                WHERE id = %s
+            """, (
+                self.status, self.rows_read, self.rows_inserted, self.rows_updated,
+                self.rows_unchanged, self.rows_skipped + self.rows_failed, self.duration_ms, error_log, self.log_id
+            ))
+        self.conn.commit()
+        return False
+
+    def summary(self) -> str:
+        return (
+            f"{self.status}: {self.rows_read:,} read, {self.rows_inserted:,} inserted, "
+            f"{self.rows_updated:,} updated, {self.rows_unchanged:,} unchanged, "
+            f"{self.rows_skipped:,} skipped, {self.rows_failed:,} failed in {self.duration_ms / 1000:.1f}s"
+        )
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Parallel, cached PDF table extraction
+
+Table extraction is by far the slowest step of the IEBC/KNBS ingesters.
+This module splits a PDF's pages into contiguous ranges, extracts them
+across a process pool and caches every page's tables on disk keyed by the
+file's SHA256 and the page number. Ingesters then apply their (cheap) row
+parsing to the cached tables, so re-running after a parser tweak only
+re-extracts pages that were never extracted before.
+
+Cache layout: <cache_dir>/pdf_pages/<file_sha256>/<EXTRACTION_VERSION>/page_00001.json
+"""
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import pdfplumber
+from loguru import logger
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config import config
+from ingestion_log import file_sha256
+
+# Bump when extraction settings change so cached pages are not reused
+EXTRACTION_VERSION = "v1"
+
+PageTables = List[List[List[Optional[str]]]]
+
+
+def page_cache_dir(file_hash: str) -> Path:
+    """Cache directory for one PDF's extracted pages"""
+    return config.cache_dir / "pdf_pages" / file_hash / EXTRACTION_VERSION
+
+
+def _page_cache_path(cache_dir: Path, page_num: int) -> Path:
+    return cache_dir / f"page_{page_num:05d}.json"
+
+
+def _extract_page_range(pdf_path: str, first_page: int, last_page: int) -> List[Tuple[int, PageTables]]:
+    """Worker: extract tables from pages first_page..last_page (1-based, inclusive)"""
+    with pdfplumber.open(pdf_path) as pdf:
+        return [
+            (page_num, pdf.pages[page_num - 1].extract_tables())
+            for page_num in range(first_page, last_page + 1)
+        ]
+
+
+def _page_ranges(page_nums: List[int], pages_per_task: int) -> List[Tuple[int, int]]:
+    """Split sorted page numbers into contiguous (first, last) ranges of at most pages_per_task"""
+    ranges = []
+    for page_num in page_nums:
+        if ranges and page_num == ranges[-1][1] + 1 and page_num - ranges[-1][0] < pages_per_task:
+            ranges[-1] = (ranges[-1][0], page_num)
+        else:
+            ranges.append((page_num, page_num))
+    return ranges
+
+
+def extract_page_tables(
+    pdf_path: Path,
+    file_hash: Optional[str] = None,
+    workers: Optional[int] = None,
+    pages_per_task: Optional[int] = None
+) -> Iterator[Tuple[int, PageTables]]:
+    """
+    Tables of every page of a PDF, in page order
+
+    Args:
+        pdf_path: PDF to extract
+        file_hash: SHA256 of the file (computed if not given)
+        workers: Worker processes (default: config.pdf_workers, else CPU count)
+        pages_per_task: Pages per worker task (default: ~4 tasks per worker)
+
+    Yields:
+        (page_num, tables) with 1-based page numbers
+    """
+    file_hash = file_hash or file_sha256(pdf_path)
+    cache_dir = page_cache_dir(file_hash)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    workers = workers or config.pdf_workers or os.cpu_count() or 1
+
+    with pdfplumber.open(pdf_path) as pdf:
+        n_pages = len(pdf.pages)
+
+    missing = [
+        page_num for page_num in range(1, n_pages + 1)
+        if not _page_cache_path(cache_dir, page_num).exists()
+    ]
+    logger.info(
+        f"{pdf_path.name}: {n_pages} pages, {n_pages - len(missing)} cached, "
+        f"{len(missing)} to extract with {workers} worker(s)"
+    )
+
+    if missing:
+        if pages_per_task is None:
+            pages_per_task = max(1, -(-len(missing) // (workers * 4)))
+        ranges = _page_ranges(missing, pages_per_task)
+
+        if workers <= 1 or len(ranges) <= 1:
+            extracted = (_extract_page_range(str(pdf_path), first, last) for first, last in ranges)
+            _write_pages(cache_dir, extracted, len(missing))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                extracted = executor.map(
+                    _extract_page_range,
+                    [str(pdf_path)] * len(ranges),
+                    [first for first, _ in ranges],
+                    [last for _, last in ranges]
+                )
+                _write_pages(cache_dir, extracted, len(missing))
+
+    # Merge from the cache in page order, so output never depends on scheduling
+    for page_num in range(1, n_pages + 1):
+        with open(_page_cache_path(cache_dir, page_num)) as f:
+            yield page_num, json.load(f)
+
+
+def _write_pages(cache_dir: Path, extracted, n_missing: int):
+    """Write each extracted page to the cache as results arrive"""
+    done = 0
+    for page_results in extracted:
+        for page_num, tables in page_results:
+            path = _page_cache_path(cache_dir, page_num)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(tables, f)
+            os.replace(tmp_path, path)
+        done += len(page_results)
+        logger.debug(f"Extracted {done}/{n_missing} pages")
@@ -0,0 +1,116 @@
+"""
+Benchmark process-pool forecast generation
+
+Builds a synthetic ward-scale dataset (no database needed), runs the
+multi-candidate model with 1..N workers, reports speedup against a single
+worker and checks every run is identical to the single-worker output.
+
+Usage:
+    python benchmark_parallel.py --units 1450 --candidates 10 --samples 20000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from multi_candidate_forecast import generate_multi_candidate_forecast_parallel
+from parallel_forecast import default_worker_count
+
+
+def build_synthetic_data(n_units, n_candidates, seed=0):
+    """Synthetic unit data and historical results shaped like prepare_data.py output"""
+    rng = np.random.default_rng(seed)
+    codes = [f"{i:04d}" for i in range(1, n_units + 1)]
+
+    unit_data = pd.DataFrame({
+        'code': codes,
+        'name': [f"Unit {code}" for code in codes],
+        'registered_voters_2022': rng.integers(5_000, 60_000, n_units)
+    })
+
+    candidates = [{'name': f"Candidate {j}", 'party': f"Party {j}"} for j in range(n_candidates)]
+
+    shares = rng.dirichlet(np.ones(n_candidates), n_units)
+    total_votes = rng.integers(3_000, 40_000, n_units)
+    historical_results = pd.DataFrame({
+        'election_year': 2022,
+        'county_code': np.repeat(codes, n_candidates),
+        'candidate_name': np.tile([c['name'] for c in candidates], n_units),
+        'party': np.tile([c['party'] for c in candidates], n_units),
+        'votes': (shares * total_votes[:, None]).astype(int).ravel(),
+        'total_votes_cast': np.repeat(total_votes, n_candidates),
+        'turnout': np.repeat(rng.uniform(50, 85, n_units), n_candidates)
+    })
+
+    return unit_data, historical_results, candidates
+
+
+def worker_counts(max_workers):
+    """1, 2, 4, ... up to and including max_workers"""
+    counts = [1]
+    while counts[-1] * 2 < max_workers:
+        counts.append(counts[-1] * 2)
+    if max_workers > 1:
+        counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parallel forecast generation')
+    parser.add_argument('--units', type=int, default=1450, help='Number of units (default: 1450 wards)')
+    parser.add_argument('--candidates', type=int, default=10, help='Number of candidates')
+    parser.add_argument('--samples', type=int, default=20000, help='Monte Carlo samples per unit')
+    parser.add_argument('--max-workers', type=int, default=default_worker_count(),
+                        help='Largest worker count to try (default: usable cores)')
+    parser.add_argument('--seed', type=int, default=2027, help='Root seed')
+
+    args = parser.parse_args()
+
+    print("\n" + "=" * 80)
+    print("⏱️  PARALLEL FORECAST BENCHMARK")
+    print("=" * 80)
+    print(f"\nUnits: {args.units:,}  Candidates: {args.candidates}  Samples: {args.samples:,}")
+    print(f"Usable cores: {default_worker_count()}")
+
+    unit_data, historical_results, candidates = build_synthetic_data(args.units, args.candidates)
+
+    timings = []
+    baseline_df = None
+
+    for n_workers in worker_counts(args.max_workers):
+        start = time.perf_counter()
+        forecasts_df = generate_multi_candidate_forecast_parallel(
+            unit_data,
+            historical_results,
+            candidates,
+            n_samples=args.samples,
+            n_workers=n_workers,
+            seed=args.seed
+        )
+        elapsed = time.perf_counter() - start
+
+        if baseline_df is None:
+            baseline_df = forecasts_df
+            identical = True
+        else:
+            identical = forecasts_df.equals(baseline_df)
+
+        timings.append((n_workers, elapsed, identical))
+
+    print("\n" + "=" * 80)
+    print("📊 RESULTS")
+    print("=" * 80)
+    print(f"\n{'Workers':>8s} {'Seconds':>10s} {'Speedup':>9s} {'Efficiency':>11s}  Identical")
+
+    base_time = timings[0][1]
+    for n_workers, elapsed, identical in timings:
+        speedup = base_time / elapsed
+        print(f"{n_workers:8d} {elapsed:10.2f} {speedup:8.2f}x {speedup / n_workers:10.0%}  "
+              f"{'✅' if identical else '❌'}")
+
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,52 @@ Tribe-wise turnout and vote share prediction with uncertainty quantification
 
 PRIVACY: Only processes aggregate county-level data
 """
+import json
+import os
+from pathlib import Path
+
+# Persist PyTensor's compiled C modules between runs so daily refits skip
+# recompilation. Must be configured before PyTensor is first imported.
+COMPILE_CACHE_DIR = Path(os.getenv(
+    'MODEL_COMPILE_CACHE_DIR',
+    Path(__file__).parent.parent / 'data' / 'cache' / 'pytensor'
+))
+if 'base_compiledir' not in os.environ.get('PYTENSOR_FLAGS', ''):
+    COMPILE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    os.environ['PYTENSOR_FLAGS'] = ','.join(filter(None, [
+        os.environ.get('PYTENSOR_FLAGS'),
+        f'base_compiledir={COMPILE_CACHE_DIR}'
+    ]))
+
 import pymc as pm
+import pytensor.tensor as pt
 import numpy as np
 import pandas as pd
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 import arviz as az
+import xarray as xr
+from packaging.version import Version
+
+from parallel_forecast import default_worker_count
+from run_metadata import resolve_seed
+
+# From PyMC 5.16 pm.Data and model coords are always mutable; older
+# versions need pm.MutableData and coords_mutable
+if Version(pm.__version__) >= Version('5.16'):
+    MutableData = pm.Data
+    MUTABLE_COORDS_KWARG = 'coords'
+else:
+    MutableData = pm.MutableData
+    MUTABLE_COORDS_KWARG = 'coords_mutable'
+
+# Selectable per run: NUTS for official runs, the rest for fast interactive refits
+INFERENCE_METHODS = ('nuts', 'advi', 'fullrank_advi', 'pathfinder', 'laplace')
+
+# Quantities reported by predict(), compared across inference methods
+COMPARISON_VARIABLES = ['mu_turnout_national', 'alpha_national', 'turnout_final', 'vote_share_county']
+
+# Fitted traces: NetCDF4/HDF5 by default, Zarr for paths ending in .zarr
+TRACE_DIR = Path(os.getenv('MODEL_TRACE_DIR', Path(__file__).parent.parent / 'data' / 'traces'))
 
 
 class HierarchicalBayesianModel:
@@ -24,11 +65,65 @@ class HierarchicalBayesianModel:
     Privacy: All ethnicity data is county-level aggregates only
     """
     
-    def __init__(self, confidence_level: float = 0.90):
+    def __init__(self, confidence_level: float = 0.90, seed: Optional[int] = None):
         self.confidence_level = confidence_level
+        self.seed = resolve_seed(seed)  # Recorded so unseeded fits can be replayed
         self.model = None
         self.trace = None
+        self.trace_path = None  # Set by save_trace/load_trace; variables are read lazily from it
+        self.fit_parameters = {}
+        
+        # Reproducible stream for fitting (predict() only summarises the
+        # trace and draws nothing); the first spawned child, as before
+        fit_seq, = np.random.SeedSequence(self.seed).spawn(1)
+        self._fit_seed = int(fit_seq.generate_state(1)[0])
+        
+    @staticmethod
+    def _prepare_data(
+        county_data: pd.DataFrame,
+        ethnicity_data: pd.DataFrame,
+        historical_results: pd.DataFrame
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, list]]:
+        """
+        Align all inputs on county order and return (data, coords)
+        
+        data holds one array per pm.Data container; coords holds the county,
+        candidate and ethnicity labels that size the model dimensions.
+        """
+        county_ids = county_data['county_id'].values
         
+        historical_turnout = (
+            historical_results.groupby('county_id')['turnout'].mean().reindex(county_ids)
+        )
+        historical_turnout = historical_turnout.fillna(historical_turnout.mean())
+        
+        ethnicity_share = ethnicity_data.pivot_table(
+            index='county_id',
+            columns='ethnicity_group',
+            values='population_share'
+        ).reindex(county_ids).fillna(0)
+        
+        observed_votes = historical_results.pivot_table(
+            index='county_id',
+            columns='candidate_id',
+            values='votes'
+        ).reindex(county_ids).fillna(0).astype(int)
+        
+        data = {
+            'urban_pct': county_data['urban_percentage'].values.astype(float),
+            'youth_pct': county_data['youth_percentage'].values.astype(float),
+            'historical_turnout': historical_turnout.values.astype(float),
+            'ethnicity_share': ethnicity_share.values.astype(float),
+            'observed_votes': observed_votes.values,
+            'total_votes': observed_votes.values.sum(axis=1),
+        }
+        coords = {
+            'county': list(county_ids),
+            'candidate': list(observed_votes.columns),
+            'ethnicity': list(ethnicity_share.columns),
+        }
+        return data, coords
+    
     def build_model(
         self,
         county_data: pd.DataFrame,
@@ -38,6 +133,10 @@ class HierarchicalBayesianModel:
         """
         Build hierarchical Bayesian model
         
+        All data enters through pm.Data containers and every shape follows a
+        mutable dimension (county, candidate, ethnicity), so refits on new
+        data go through update_data instead of rebuilding the graph.
+        
         Args:
             county_data: County-level features (population, urban %, etc.)
             ethnicity_data: County-level ethnicity aggregates (PRIVACY: min 10 per group)
@@ -46,33 +145,51 @@ class HierarchicalBayesianModel:
         Returns:
             PyMC model
         """
-        n_counties = len(county_data)
-        n_candidates = len(historical_results['candidate_id'].unique())
+        data, coords = self._prepare_data(county_data, ethnicity_data, historical_results)
         
-        with pm.Model() as model:
+        with pm.Model(**{MUTABLE_COORDS_KWARG: coords}) as model:
+            # ============================================================
+            # DATA CONTAINERS (swappable without recompilation)
+            # ============================================================
+            
+            urban_pct = MutableData('urban_pct', data['urban_pct'], dims='county')
+            youth_pct = MutableData('youth_pct', data['youth_pct'], dims='county')
+            historical_turnout = MutableData('historical_turnout', data['historical_turnout'], dims='county')
+            ethnicity_share = MutableData('ethnicity_share', data['ethnicity_share'], dims=('county', 'ethnicity'))
+            observed_votes = MutableData('observed_votes', data['observed_votes'], dims=('county', 'candidate'))
+            total_votes = MutableData('total_votes', data['total_votes'], dims='county')
+            
             # ============================================================
             # HYPERPRIORS (National level)
             # ============================================================
             
-            # National baseline turnout
-            mu_turnout_national = pm.Normal('mu_turnout_national', mu=0.70, sigma=0.05)
+            # National baseline turnout (bounded so logit stays defined when
+            # variational/Laplace fits explore the tails)
+            mu_turnout_national = pm.TruncatedNormal(
+                'mu_turnout_national', mu=0.70, sigma=0.05, lower=0, upper=1
+            )
             sigma_turnout_national = pm.HalfNormal('sigma_turnout_national', sigma=0.1)
             
             # National baseline vote shares (Dirichlet for sum-to-one constraint)
-            alpha_national = pm.Dirichlet('alpha_national', a=np.ones(n_candidates))
+            alpha_national = pm.Dirichlet(
+                'alpha_national',
+                a=pt.ones(model.dim_lengths['candidate']),
+                dims='candidate'
+            )
             
             # ============================================================
             # COUNTY-LEVEL PARAMETERS (Partial pooling)
             # ============================================================
             
             # County-specific turnout (hierarchical)
-            turnout_county_raw = pm.Normal('turnout_county_raw', mu=0, sigma=1, shape=n_counties)
+            turnout_county_raw = pm.Normal('turnout_county_raw', mu=0, sigma=1, dims='county')
             turnout_county = pm.Deterministic(
                 'turnout_county',
                 pm.math.invlogit(
                     pm.math.logit(mu_turnout_national) + 
                     sigma_turnout_national * turnout_county_raw
-                )
+                ),
+                dims='county'
             )
             
             # County-specific vote shares (hierarchical Dirichlet)
@@ -80,7 +197,7 @@ class HierarchicalBayesianModel:
             vote_share_county = pm.Dirichlet(
                 'vote_share_county',
                 a=alpha_national * 100,  # Concentration parameter
-                shape=(n_counties, n_candidates)
+                dims=('county', 'candidate')
             )
             
             # ============================================================
@@ -97,20 +214,17 @@ class HierarchicalBayesianModel:
             beta_historical = pm.Normal('beta_historical', mu=0.5, sigma=0.2)
             
             # Combine feature effects
-            urban_pct = county_data['urban_percentage'].values
-            youth_pct = county_data['youth_percentage'].values
-            hist_turnout = historical_results.groupby('county_id')['turnout'].mean().values
-            
             feature_effect = (
                 beta_urban * urban_pct +
                 beta_youth * youth_pct +
-                beta_historical * hist_turnout
+                beta_historical * historical_turnout
             )
             
             # Adjusted turnout with features
             turnout_adjusted = pm.Deterministic(
                 'turnout_adjusted',
-                pm.math.invlogit(pm.math.logit(turnout_county) + feature_effect)
+                pm.math.invlogit(pm.math.logit(turnout_county) + feature_effect),
+                dims='county'
             )
             
             # ============================================================
@@ -121,32 +235,24 @@ class HierarchicalBayesianModel:
             # This models differential turnout by ethnicity group
             # PRIVACY: Only applied to county aggregates, never individuals
             
-            n_ethnicities = len(ethnicity_data['ethnicity_group'].unique())
-            
             ethnicity_turnout_multiplier = pm.Normal(
                 'ethnicity_turnout_multiplier',
                 mu=1.0,
                 sigma=0.15,
-                shape=n_ethnicities
+                dims='ethnicity'
             )
             
             # Map ethnicity multipliers to counties (weighted by population share)
             # This is aggregate-only: county_ethnicity_share is from KNBS census aggregates
-            ethnicity_effect = pm.math.dot(
-                ethnicity_data.pivot_table(
-                    index='county_id',
-                    columns='ethnicity_group',
-                    values='population_share'
-                ).fillna(0).values,
-                ethnicity_turnout_multiplier
-            )
+            ethnicity_effect = pm.math.dot(ethnicity_share, ethnicity_turnout_multiplier)
             
             # Final turnout prediction
             turnout_final = pm.Deterministic(
                 'turnout_final',
                 pm.math.invlogit(
                     pm.math.logit(turnout_adjusted) + 0.1 * (ethnicity_effect - 1.0)
-                )
+                ),
+                dims='county'
             )
             
             # ============================================================
@@ -154,62 +260,237 @@ class HierarchicalBayesianModel:
             # ============================================================
             
             # Observed turnout (from historical data)
-            observed_turnout = historical_results.groupby('county_id')['turnout'].mean().values
-            
             pm.Normal(
                 'obs_turnout',
                 mu=turnout_final,
                 sigma=0.05,  # Observation noise
-                observed=observed_turnout
+                observed=historical_turnout,
+                dims='county'
             )
             
             # Observed vote shares (multinomial)
-            observed_votes = historical_results.pivot_table(
-                index='county_id',
-                columns='candidate_id',
-                values='votes'
-            ).fillna(0).values
-            
-            total_votes = observed_votes.sum(axis=1, keepdims=True)
-            
             pm.Multinomial(
                 'obs_votes',
-                n=total_votes.flatten().astype(int),
+                n=total_votes,
                 p=vote_share_county,
-                observed=observed_votes.astype(int)
+                observed=observed_votes,
+                dims=('county', 'candidate')
             )
         
         self.model = model
         return model
     
-    def fit(self, draws: int = 2000, tune: int = 1000, chains: int = 4):
+    def update_data(
+        self,
+        county_data: pd.DataFrame,
+        ethnicity_data: pd.DataFrame,
+        historical_results: pd.DataFrame
+    ) -> pm.Model:
+        """
+        Swap new counties, results or ethnicity shares into the built model
+        
+        Dimensions are resized through their coords, so the graph is reused
+        as-is and sampling hits PyTensor's compile cache. Any existing trace
+        is discarded because it belongs to the old data.
+        """
+        if self.model is None:
+            return self.build_model(county_data, ethnicity_data, historical_results)
+        
+        data, coords = self._prepare_data(county_data, ethnicity_data, historical_results)
+        pm.set_data(data, model=self.model, coords=coords)
+        self.trace = None
+        self.trace_path = None
+        
+        return self.model
+    
+    def fit(
+        self,
+        draws: int = 2000,
+        tune: int = 1000,
+        chains: int = 4,
+        method: str = 'nuts',
+        n_iterations: int = 30000,
+        cores: Optional[int] = None
+    ):
         """
-        Fit model using MCMC sampling
+        Fit model with the selected inference method
+        
+        NUTS stays the default for official runs. The approximate methods
+        trade accuracy for speed (sub-minute refits for interactive reruns);
+        use compare_inference to check them against a NUTS fit.
         
         Args:
-            draws: Number of posterior samples
-            tune: Number of tuning steps
-            chains: Number of MCMC chains
+            draws: Number of posterior samples (per chain for NUTS)
+            tune: Number of NUTS tuning steps
+            chains: Number of MCMC chains (NUTS only)
+            method: One of INFERENCE_METHODS:
+                - 'nuts': MCMC, target_accept=0.95
+                - 'advi' / 'fullrank_advi': variational inference via pm.fit
+                - 'pathfinder' / 'laplace': via pymc-extras (optional dependency)
+            n_iterations: Optimisation steps for ADVI
+            cores: Processes to run NUTS chains in (defaults to one per chain,
+                capped at the usable cores)
         """
+        if method not in INFERENCE_METHODS:
+            raise ValueError(f"Unknown inference method '{method}', expected one of {INFERENCE_METHODS}")
+        
         with self.model:
-            self.trace = pm.sample(
-                draws=draws,
-                tune=tune,
-                chains=chains,
-                return_inferencedata=True,
-                target_accept=0.95
-            )
+            if method == 'nuts':
+                self.trace = pm.sample(
+                    draws=draws,
+                    tune=tune,
+                    chains=chains,
+                    cores=cores or min(chains, default_worker_count()),
+                    return_inferencedata=True,
+                    target_accept=0.95,
+                    random_seed=self._fit_seed
+                )
+            elif method in ('advi', 'fullrank_advi'):
+                approx = pm.fit(
+                    n=n_iterations,
+                    method=method,
+                    random_seed=self._fit_seed,
+                    callbacks=[pm.callbacks.CheckParametersConvergence(diff='absolute')]
+                )
+                self.trace = approx.sample(draws, random_seed=self._fit_seed)
+            else:
+                try:
+                    import pymc_extras as pmx
+                except ImportError:
+                    raise ImportError(
+                        f"Inference method '{method}' requires pymc-extras: pip install pymc-extras"
+                    )
+                if method == 'pathfinder':
+                    self.trace = pmx.fit_pathfinder(num_draws=draws, random_seed=self._fit_seed)
+                else:
+                    self.trace = pmx.fit_laplace(draws=draws, random_seed=self._fit_seed)
+        
+        self.trace_path = None
+        self.fit_parameters = {
+            'inference_method': method,
+            'draws': draws,
+            'tune': tune if method == 'nuts' else None,
+            'chains': chains if method == 'nuts' else None,
+            'n_iterations': n_iterations if method in ('advi', 'fullrank_advi') else None,
+        }
         
         return self.trace
     
+    def run_parameters(self) -> Dict:
+        """Seed, inference settings and trace location to record in ForecastRun.parameters"""
+        return {
+            'seed': self.seed,
+            'confidence_level': self.confidence_level,
+            'trace_path': str(self.trace_path) if self.trace_path else None,
+            **self.fit_parameters
+        }
+    
+    def save_trace(self, path: Optional[Path] = None) -> Path:
+        """
+        Persist the fitted trace so later runs can re-derive intervals without refitting
+        
+        Args:
+            path: Target file; '.zarr' paths are written as a Zarr store, anything
+                else as NetCDF4/HDF5. Defaults to TRACE_DIR/trace_<seed>_<method>.nc
+        
+        Returns:
+            Path written (also recorded in run_parameters()['trace_path'])
+        """
+        if self.trace is None:
+            raise ValueError("No trace to save - call fit() first")
+        
+        if path is None:
+            method = self.fit_parameters.get('inference_method', 'nuts')
+            path = TRACE_DIR / f"trace_{self.seed}_{method}.nc"
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Settings travel with the trace, so load_trace can restore run_parameters()
+        self.trace.posterior.attrs['run_parameters'] = json.dumps(
+            {'seed': self.seed, **self.fit_parameters}
+        )
+        
+        if path.suffix == '.zarr':
+            self.trace.to_zarr(str(path))
+        else:
+            self.trace.to_netcdf(str(path))
+        
+        self.trace_path = path
+        return path
+    
+    def load_trace(self, path: Path) -> 'HierarchicalBayesianModel':
+        """
+        Attach a trace saved by save_trace without reading it into memory
+        
+        predict() and diagnostics() then load only the variables they use.
+        Returns the model, so calls can be chained: load_trace(path).predict().
+        """
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"Trace not found: {path}")
+        
+        self.trace = None
+        self.trace_path = path
+        
+        attrs = self._open_trace_group('posterior').attrs
+        if 'run_parameters' in attrs:
+            stored = json.loads(attrs['run_parameters'])
+            self.seed = stored.pop('seed', self.seed)
+            self.fit_parameters = stored
+        
+        return self
+    
+    def _open_trace_group(self, group: str) -> xr.Dataset:
+        """Lazily open one InferenceData group of the saved trace (nothing is read yet)"""
+        if self.trace_path.suffix == '.zarr':
+            return xr.open_zarr(self.trace_path, group=group)
+        return xr.open_dataset(self.trace_path, group=group)
+    
+    def _trace_group(self, group: str, var_names: List[str]) -> Optional[xr.Dataset]:
+        """
+        var_names from one trace group, from memory or read lazily from disk
+        
+        Returns None if the group (or all of the variables) is absent, e.g.
+        sample_stats for variational fits.
+        """
+        if self.trace is not None:
+            if group not in self.trace.groups():
+                return None
+            dataset = self.trace[group]
+        elif self.trace_path is not None:
+            try:
+                dataset = self._open_trace_group(group)
+            except (OSError, KeyError):
+                return None
+        else:
+            raise ValueError("Model has no trace - call fit() or load_trace() first")
+        
+        present = [var for var in var_names if var in dataset.data_vars]
+        if not present:
+            return None
+        return dataset[present].load()
+    
     def predict(
         self,
-        county_data_future: pd.DataFrame,
-        ethnicity_data_future: pd.DataFrame
+        county_data_future: Optional[pd.DataFrame] = None,
+        ethnicity_data_future: Optional[pd.DataFrame] = None,
+        confidence_level: Optional[float] = None
     ) -> Dict[str, np.ndarray]:
         """
         Generate predictions for future election
         
+        turnout_final and vote_share_county are deterministic functions of the
+        posterior draws, so they are read straight from the trace instead of
+        re-running posterior predictive sampling. With a saved trace only
+        those two variables are loaded from disk, which makes re-deriving
+        intervals at another level (e.g. 80%) cheap and refit-free.
+        To forecast new data, swap it in with update_data() and refit.
+        
+        Args:
+            county_data_future, ethnicity_data_future: Unused, kept for
+                backwards compatibility
+            confidence_level: Interval width (defaults to the model's)
+        
         Returns:
             Dictionary with:
             - turnout_mean: Point estimates
@@ -218,18 +499,13 @@ class HierarchicalBayesianModel:
             - vote_share_mean: Point estimates per candidate
             - vote_share_lower/upper: Credible intervals
         """
-        with self.model:
-            # Posterior predictive sampling
-            ppc = pm.sample_posterior_predictive(
-                self.trace,
-                var_names=['turnout_final', 'vote_share_county']
-            )
+        posterior = self._trace_group('posterior', ['turnout_final', 'vote_share_county'])
         
         # Extract credible intervals
-        alpha = 1 - self.confidence_level
+        alpha = 1 - (confidence_level or self.confidence_level)
         
-        turnout_samples = ppc.posterior_predictive['turnout_final'].values
-        vote_share_samples = ppc.posterior_predictive['vote_share_county'].values
+        turnout_samples = posterior['turnout_final'].values
+        vote_share_samples = posterior['vote_share_county'].values
         
         return {
             'turnout_mean': turnout_samples.mean(axis=(0, 1)),
@@ -240,54 +516,179 @@ class HierarchicalBayesianModel:
             'vote_share_upper': np.percentile(vote_share_samples, (1 - alpha/2) * 100, axis=(0, 1))
         }
     
-    def diagnostics(self) -> Dict:
+    def diagnostics(self, var_names: Optional[List[str]] = None) -> Dict:
         """
         Model diagnostics and convergence checks
         
+        R-hat, ESS and divergences only exist for NUTS fits; approximate
+        fits report None for them.
+        
+        Args:
+            var_names: Variables to summarise (defaults to the free parameters
+                and COMPARISON_VARIABLES); only these are loaded from a saved trace
+        
         Returns:
             Dictionary with R-hat, ESS, and other diagnostics
         """
-        summary = az.summary(self.trace)
+        if var_names is None:
+            var_names = [
+                'mu_turnout_national', 'sigma_turnout_national', 'alpha_national',
+                'beta_urban', 'beta_youth', 'beta_historical',
+                'ethnicity_turnout_multiplier', 'turnout_final', 'vote_share_county'
+            ]
+        
+        summary = az.summary(self._trace_group('posterior', var_names))
+        sample_stats = self._trace_group('sample_stats', ['diverging'])
+        method = self.fit_parameters.get('inference_method', 'nuts')
+        is_mcmc = method == 'nuts' and sample_stats is not None
+        
+        def convergence_stat(column, reduce):
+            # Approximate fits have a single "chain": az.summary still has the
+            # columns, but they are all NaN
+            if not is_mcmc or column not in summary or summary[column].isna().all():
+                return None
+            return float(reduce(summary[column]))
         
         return {
-            'rhat_max': summary['r_hat'].max(),
-            'ess_bulk_min': summary['ess_bulk'].min(),
-            'ess_tail_min': summary['ess_tail'].min(),
-            'divergences': self.trace.sample_stats['diverging'].sum().item(),
+            'inference_method': self.fit_parameters.get('inference_method'),
+            'rhat_max': convergence_stat('r_hat', pd.Series.max),
+            'ess_bulk_min': convergence_stat('ess_bulk', pd.Series.min),
+            'ess_tail_min': convergence_stat('ess_tail', pd.Series.min),
+            'divergences': sample_stats['diverging'].sum().item() if is_mcmc else None,
             'summary': summary
         }
 
 
+def compare_inference(
+    reference_trace: az.InferenceData,
+    approx_trace: az.InferenceData,
+    var_names: Optional[List[str]] = None,
+    confidence_level: float = 0.90
+) -> pd.DataFrame:
+    """
+    Compare an approximate posterior against a reference (NUTS) posterior
+    
+    Args:
+        reference_trace: Posterior from the reference fit (normally NUTS)
+        approx_trace: Posterior from an approximate fit (ADVI, Pathfinder, Laplace)
+        var_names: Variables to compare (defaults to COMPARISON_VARIABLES)
+        confidence_level: Width of the equal-tailed credible intervals
+    
+    Returns:
+        One row per scalar element with both means and intervals, the mean
+        difference in reference standard deviations, and the overlap of the
+        two intervals as a share of their union (1.0 = identical)
+    """
+    var_names = var_names or COMPARISON_VARIABLES
+    alpha = 1 - confidence_level
+    rows = []
+    
+    for var in var_names:
+        ref = reference_trace.posterior[var].stack(sample=('chain', 'draw')).transpose('sample', ...)
+        approx = approx_trace.posterior[var].stack(sample=('chain', 'draw')).transpose('sample', ...)
+        
+        ref_values = ref.values.reshape(len(ref['sample']), -1)
+        approx_values = approx.values.reshape(len(approx['sample']), -1)
+        
+        ref_lower, ref_upper = np.quantile(ref_values, [alpha / 2, 1 - alpha / 2], axis=0)
+        approx_lower, approx_upper = np.quantile(approx_values, [alpha / 2, 1 - alpha / 2], axis=0)
+        ref_mean, approx_mean = ref_values.mean(axis=0), approx_values.mean(axis=0)
+        ref_sd = ref_values.std(axis=0)
+        
+        overlap = np.clip(np.minimum(ref_upper, approx_upper) - np.maximum(ref_lower, approx_lower), 0, None)
+        union = np.maximum(ref_upper, approx_upper) - np.minimum(ref_lower, approx_lower)
+        
+        element_shape = ref.shape[1:]
+        for flat_index in range(ref_values.shape[1]):
+            index = np.unravel_index(flat_index, element_shape) if element_shape else ()
+            rows.append({
+                'variable': var,
+                'index': ','.join(str(i) for i in index),
+                'reference_mean': ref_mean[flat_index],
+                'approx_mean': approx_mean[flat_index],
+                'mean_diff_sd': (approx_mean[flat_index] - ref_mean[flat_index]) / ref_sd[flat_index]
+                if ref_sd[flat_index] > 0 else 0.0,
+                'reference_lower': ref_lower[flat_index],
+                'reference_upper': ref_upper[flat_index],
+                'approx_lower': approx_lower[flat_index],
+                'approx_upper': approx_upper[flat_index],
+                'interval_overlap': overlap[flat_index] / union[flat_index]
+                if union[flat_index] > 0 else 1.0,
+            })
+    
+    return pd.DataFrame(rows)
+
+
 # Example usage
 if __name__ == "__main__":
+    import argparse
+    import time
+    
+    parser = argparse.ArgumentParser(description='Hierarchical Bayesian model (template with simulated data)')
+    parser.add_argument('--method', choices=INFERENCE_METHODS, default=None,
+                        help='Fit with this inference method (default: build only)')
+    parser.add_argument('--compare', action='store_true',
+                        help='Also fit with NUTS and report posterior means/intervals against it')
+    parser.add_argument('--draws', type=int, default=1000, help='Posterior draws')
+    parser.add_argument('--save-trace', type=str, default=None, metavar='PATH',
+                        help='Persist the fitted trace (.nc, or .zarr) for later predict/diagnostics')
+    args = parser.parse_args()
+    
     # This is a template - actual data would come from ETL pipeline
     
     # Simulated data (replace with real IEBC/KNBS data)
+    rng = np.random.default_rng(2027)
+    
     county_data = pd.DataFrame({
         'county_id': range(47),
-        'urban_percentage': np.random.uniform(0.2, 0.8, 47),
-        'youth_percentage': np.random.uniform(0.3, 0.5, 47)
+        'urban_percentage': rng.uniform(0.2, 0.8, 47),
+        'youth_percentage': rng.uniform(0.3, 0.5, 47)
     })
     
     # PRIVACY: Only aggregate county-level ethnicity data
     ethnicity_data = pd.DataFrame({
         'county_id': np.repeat(range(47), 5),
         'ethnicity_group': np.tile(['Kikuyu', 'Luhya', 'Kalenjin', 'Kamba', 'Kisii'], 47),
-        'population_share': np.random.dirichlet(np.ones(5), 47).flatten()
+        'population_share': rng.dirichlet(np.ones(5), 47).flatten()
     })
     
     historical_results = pd.DataFrame({
         'county_id': np.repeat(range(47), 2),
         'candidate_id': np.tile([0, 1], 47),
-        'votes': np.random.randint(10000, 100000, 94),
-        'turnout': np.random.uniform(0.6, 0.8, 94)
+        'votes': rng.integers(10000, 100000, 94),
+        'turnout': rng.uniform(0.6, 0.8, 94)
     })
     
     # Build and fit model
-    model = HierarchicalBayesianModel(confidence_level=0.90)
+    model = HierarchicalBayesianModel(confidence_level=0.90, seed=2027)
     model.build_model(county_data, ethnicity_data, historical_results)
     
     print("Model built successfully!")
-    print("To fit: model.fit(draws=2000, tune=1000, chains=4)")
-    print("To predict: predictions = model.predict(county_data_future, ethnicity_data_future)")
-
+    
+    if args.method is None:
+        print("To fit: model.fit(draws=2000, tune=1000, chains=4)")
+        print("To fit fast: model.fit(method='advi')  # or 'fullrank_advi', 'pathfinder', 'laplace'")
+        print("To refit on new data: model.update_data(county_data, ethnicity_data, historical_results)")
+        print("To predict: predictions = model.predict(confidence_level=0.80)")
+        print("To persist: model.save_trace(); later model.load_trace(path).predict(confidence_level=0.80)")
+    else:
+        start = time.perf_counter()
+        approx_trace = model.fit(draws=args.draws, method=args.method)
+        print(f"Fitted with {args.method} in {time.perf_counter() - start:.1f}s")
+        
+        if args.save_trace:
+            print(f"Trace saved to {model.save_trace(args.save_trace)}")
+            print(f"Run parameters: {model.run_parameters()}")
+        
+        if args.compare and args.method != 'nuts':
+            start = time.perf_counter()
+            nuts_trace = model.fit(draws=args.draws, method='nuts')
+            print(f"Fitted with nuts in {time.perf_counter() - start:.1f}s")
+            
+            report = compare_inference(nuts_trace, approx_trace, confidence_level=model.confidence_level)
+            print(f"\n{args.method} vs NUTS ({model.confidence_level:.0%} intervals):")
+            print(report.groupby('variable').agg(
+                max_abs_mean_diff_sd=('mean_diff_sd', lambda d: d.abs().max()),
+                min_interval_overlap=('interval_overlap', 'min'),
+                mean_interval_overlap=('interval_overlap', 'mean')
+            ).round(3).to_string())
@@ -15,10 +15,22 @@ from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+from streaming_quantiles import StreamingSummary, iter_chunk_sizes
+from parallel_forecast import run_sharded, spawn_unit_seeds
+from prepared_data import load_prepared
+from posterior_draws import DEFAULT_STORED_DRAWS, thin_draws, split_draws, write_draws, draws_path
+from run_metadata import (
+    DEFAULT_SEED, resolve_seed, write_run_metadata,
+    compute_fingerprint, restore_cached_forecasts, cache_forecasts
+)
+
+MODEL_NAME = 'DirichletMultiCandidate'
+MODEL_VERSION = 'v1.0'
+
 def load_historical_data():
     """Load historical election results"""
     try:
-        historical = pd.read_csv('../data/processed/model_historical_results.csv')
+        historical = load_prepared('model_historical_results')
         return historical
     except FileNotFoundError:
         print("❌ Historical data not found. Run prepare_data.py first.")
@@ -56,12 +68,164 @@ def estimate_candidate_support(historical_data, candidate_name, party):
         return None
 
 
+def build_county_priors(county_historical, county_code, candidates):
+    """
+    Build the turnout prior and Dirichlet concentration parameters for a county
+    
+    Returns:
+    --------
+    (base_turnout, alphas) where alphas has one entry per candidate
+    """
+    n_candidates = len(candidates)
+    
+    # Estimate turnout based on 2022
+    turnout_2022 = county_historical[
+        county_historical['election_year'] == 2022
+    ]['turnout'].values
+
+    if len(turnout_2022) > 0:
+        base_turnout = turnout_2022[0]
+    else:
+        base_turnout = 65.0  # National average
+    
+    # Estimate support for each candidate
+    # Use Dirichlet distribution to ensure vote shares sum to 100%
+    
+    # Build concentration parameters (alpha) for Dirichlet
+    alphas = []
+    
+    for candidate in candidates:
+        # Get historical support for this candidate/party
+        support = estimate_candidate_support(
+            county_historical,
+            candidate['name'],
+            candidate['party']
+        )
+        
+        if support is not None and county_code in support.index:
+            # Use historical support as prior
+            base_support = support[county_code]
+        else:
+            # New candidate - use uniform prior
+            base_support = 100.0 / n_candidates
+        
+        # Convert to Dirichlet concentration parameter
+        # Higher alpha = more concentrated around this value
+        alpha = max(base_support / 10.0, 1.0)  # Scale and ensure > 0
+        alphas.append(alpha)
+    
+    return base_turnout, alphas
+
+
+def forecast_county(
+    county,
+    county_historical,
+    candidates,
+    n_samples,
+    election_year,
+    rng,
+    n_stored_draws=0
+):
+    """
+    Generate Dirichlet forecasts for every candidate in a single county
+    
+    Parameters:
+    -----------
+    county : Series
+        Row of county_data (code, name, registered_voters_2022)
+    county_historical : DataFrame
+        Historical results for this county only
+    candidates : list of dict
+        List of candidates: [{'name': 'X', 'party': 'Y'}, ...]
+    n_samples : int
+        Number of Monte Carlo samples
+    election_year : int
+        Year of election to forecast
+    rng : numpy.random.Generator
+        Generator for this county's samples
+    n_stored_draws : int
+        If > 0, each record also carries a 'draws' array of this many
+        thinned vote share samples (float16, aligned across candidates)
+    
+    Returns:
+    --------
+    List of forecast records, one per candidate
+    """
+    county_code = county['code']
+    county_name = county['name']
+    registered_voters = county['registered_voters_2022']
+    
+    base_turnout, alphas = build_county_priors(county_historical, county_code, candidates)
+    
+    # Generate turnout samples
+    turnout_samples = rng.normal(base_turnout, 5, n_samples)
+    turnout_samples = np.clip(turnout_samples, 40, 95)
+    predicted_turnout = np.mean(turnout_samples)
+    
+    # Generate vote share samples using Dirichlet distribution
+    # This ensures all vote shares sum to 100%
+    vote_share_samples = rng.dirichlet(alphas, n_samples) * 100
+    
+    if n_stored_draws:
+        stored_draws = thin_draws(vote_share_samples, n_stored_draws)
+    
+    forecasts = []
+    
+    # Calculate statistics for each candidate
+    for i, candidate in enumerate(candidates):
+        candidate_samples = vote_share_samples[:, i]
+        
+        # Calculate statistics
+        predicted_share = np.mean(candidate_samples)
+        lower_90 = np.percentile(candidate_samples, 5)
+        upper_90 = np.percentile(candidate_samples, 95)
+        
+        # Calculate predicted votes
+        predicted_votes = int(
+            (predicted_share / 100.0) * 
+            (predicted_turnout / 100.0) * 
+            registered_voters
+        )
+        
+        forecasts.append({
+            'county_code': county_code,
+            'county_name': county_name,
+            'candidate_name': candidate['name'],
+            'party': candidate['party'],
+            'predicted_vote_share': round(predicted_share, 2),
+            'lower_bound_90': round(lower_90, 2),
+            'upper_bound_90': round(upper_90, 2),
+            'predicted_votes': predicted_votes,
+            'predicted_turnout': round(predicted_turnout, 2),
+            'registered_voters': registered_voters,
+            'election_year': election_year
+        })
+        
+        if n_stored_draws:
+            forecasts[-1]['draws'] = stored_draws[:, i]
+    
+    return forecasts
+
+
+def county_payloads(county_data, historical_results):
+    """(county, county_historical) pairs for every county, in county order"""
+    empty = historical_results.iloc[0:0]
+    historical_by_county = dict(tuple(historical_results.groupby('county_code')))
+    
+    return [
+        (county, historical_by_county.get(county['code'], empty))
+        for _, county in county_data.iterrows()
+    ]
+
+
 def generate_multi_candidate_forecast(
     county_data,
     historical_results,
     candidates,
     n_samples=2000,
-    election_year=2027
+    election_year=2027,
+    seed=None,
+    n_stored_draws=0
 ):
     """
     Generate forecasts for multiple candidates using Dirichlet distribution
@@ -78,6 +242,12 @@ def generate_multi_candidate_forecast(
         Number of Monte Carlo samples
     election_year : int
         Year of election to forecast
+    seed : int or None
+        Root seed; each county samples from its own Generator spawned from
+        it, matching generate_multi_candidate_forecast_parallel
+    n_stored_draws : int
+        Posterior draws to keep per county/candidate in a 'draws' column
+        (0 = none); see posterior_draws.split_draws
     
     Returns:
     --------
@@ -92,99 +262,179 @@ def generate_multi_candidate_forecast(
     print(f"   Counties: {len(county_data)}")
     print(f"   Samples: {n_samples:,}")
     
-    for idx, county in county_data.iterrows():
-        county_code = county['code']
-        county_name = county['name']
-        registered_voters = county['registered_voters_2022']
+    payloads = county_payloads(county_data, historical_results)
+    
+    seeds = spawn_unit_seeds(seed, len(payloads))
+    
+    for idx, (county, county_historical) in enumerate(payloads):
+        forecasts.extend(forecast_county(
+            county,
+            county_historical,
+            candidates,
+            n_samples=n_samples,
+            election_year=election_year,
+            rng=np.random.default_rng(seeds[idx]),
+            n_stored_draws=n_stored_draws
+        ))
         
-        # Get historical data for this county
+        if (idx + 1) % 10 == 0:
+            print(f"   Processed {idx + 1}/{len(county_data)} counties...")
+    
+    forecasts_df = pd.DataFrame(forecasts)
+    
+    # Print summary
+    print(f"\n✅ Generated {len(forecasts_df)} forecasts")
+    print(f"   ({len(county_data)} counties × {n_candidates} candidates)")
+    
+    return forecasts_df
+
+
+def generate_multi_candidate_forecast_parallel(
+    county_data,
+    historical_results,
+    candidates,
+    n_samples=2000,
+    election_year=2027,
+    n_workers=1,
+    seed=None,
+    n_stored_draws=0
+):
+    """
+    Process-pool variant of generate_multi_candidate_forecast
+    
+    Counties are sharded across n_workers processes. Each county samples from
+    its own stream spawned from seed, so output does not depend on n_workers.
+    
+    Parameters and return value match generate_multi_candidate_forecast.
+    """
+    n_candidates = len(candidates)
+    
+    print(f"\n🔮 Generating parallel forecasts for {n_candidates} candidates...")
+    print(f"   Candidates: {', '.join([c['name'] for c in candidates])}")
+    print(f"   Counties: {len(county_data)}")
+    print(f"   Samples: {n_samples:,}")
+    print(f"   Workers: {n_workers}")
+    
+    forecasts = run_sharded(
+        forecast_county,
+        county_payloads(county_data, historical_results),
+        shared={
+            'candidates': candidates,
+            'n_samples': n_samples,
+            'election_year': election_year,
+            'n_stored_draws': n_stored_draws
+        },
+        n_workers=n_workers,
+        seed=seed
+    )
+    
+    forecasts_df = pd.DataFrame(forecasts)
+    
+    print(f"\n✅ Generated {len(forecasts_df)} forecasts")
+    print(f"   ({len(county_data)} counties × {n_candidates} candidates)")
+    
+    return forecasts_df
+
+
+def generate_multi_candidate_forecast_streaming(
+    county_data,
+    historical_results,
+    candidates,
+    n_samples=2000,
+    election_year=2027,
+    chunk_size=10000,
+    seed=None,
+    n_stored_draws=0
+):
+    """
+    Memory-bounded variant of generate_multi_candidate_forecast
+    
+    Draws Dirichlet samples for every county at once, chunk_size samples at
+    a time (via normalised Gamma draws), and folds each chunk into running
+    means and histogram sketches of the 5th/95th percentiles. Memory is
+    O(chunk_size × counties × candidates) during a chunk and
+    O(counties × candidates) for the accumulated summary. All chunks draw
+    from one Generator seeded with seed. Stored draws are the first
+    n_stored_draws samples of the stream (they are i.i.d., so no thinning
+    is needed).
+    
+    Parameters and return value match generate_multi_candidate_forecast.
+    """
+    n_candidates = len(candidates)
+    n_counties = len(county_data)
+    
+    print(f"\n🔮 Generating streaming forecasts for {n_candidates} candidates...")
+    print(f"   Candidates: {', '.join([c['name'] for c in candidates])}")
+    print(f"   Counties: {n_counties}")
+    print(f"   Samples: {n_samples:,} (chunks of {chunk_size:,})")
+    
+    base_turnout = np.empty(n_counties)
+    alphas = np.empty((n_counties, n_candidates))
+    
+    for i, county_code in enumerate(county_data['code'].values):
         county_historical = historical_results[
             historical_results['county_code'] == county_code
         ]
+        base_turnout[i], alphas[i] = build_county_priors(county_historical, county_code, candidates)
+    
+    turnout_summary = StreamingSummary((n_counties,))
+    share_summary = StreamingSummary((n_counties, n_candidates))
+    
+    rng = np.random.default_rng(seed)
+    
+    n_stored_draws = min(n_stored_draws, n_samples)
+    stored_draws = np.empty((n_stored_draws, n_counties, n_candidates), dtype=np.float16)
+    n_kept = 0
+    
+    for size in iter_chunk_sizes(n_samples, chunk_size):
+        turnout_samples = rng.normal(base_turnout, 5, (size, n_counties))
+        turnout_summary.update(np.clip(turnout_samples, 40, 95))
         
-        # Estimate turnout based on 2022
-        turnout_2022 = county_historical[
-            county_historical['election_year'] == 2022
-        ]['turnout'].values
-
-        if len(turnout_2022) > 0:
-            base_turnout = turnout_2022[0]
-        else:
-            base_turnout = 65.0  # National average
-        
-        # Generate turnout samples
-        turnout_samples = np.random.normal(base_turnout, 5, n_samples)
-        turnout_samples = np.clip(turnout_samples, 40, 95)
-        predicted_turnout = np.mean(turnout_samples)
-        
-        # Estimate support for each candidate
-        # Use Dirichlet distribution to ensure vote shares sum to 100%
-        
-        # Build concentration parameters (alpha) for Dirichlet
-        alphas = []
-        
-        for candidate in candidates:
-            # Get historical support for this candidate/party
-            support = estimate_candidate_support(
-                county_historical,
-                candidate['name'],
-                candidate['party']
-            )
-            
-            if support is not None and county_code in support.index:
-                # Use historical support as prior
-                base_support = support[county_code]
-            else:
-                # New candidate - use uniform prior
-                base_support = 100.0 / n_candidates
-            
-            # Convert to Dirichlet concentration parameter
-            # Higher alpha = more concentrated around this value
-            alpha = max(base_support / 10.0, 1.0)  # Scale and ensure > 0
-            alphas.append(alpha)
-        
-        # Generate vote share samples using Dirichlet distribution
-        # This ensures all vote shares sum to 100%
-        vote_share_samples = np.random.dirichlet(alphas, n_samples) * 100
+        # Dirichlet across all counties: normalised independent Gamma draws
+        gamma_samples = rng.standard_gamma(alphas, (size, n_counties, n_candidates))
+        share_samples = gamma_samples / gamma_samples.sum(axis=2, keepdims=True) * 100
+        share_summary.update(share_samples)
         
-        # Calculate statistics for each candidate
-        for i, candidate in enumerate(candidates):
-            candidate_samples = vote_share_samples[:, i]
-            
-            # Calculate statistics
-            predicted_share = np.mean(candidate_samples)
-            lower_90 = np.percentile(candidate_samples, 5)
-            upper_90 = np.percentile(candidate_samples, 95)
-            
-            # Calculate predicted votes
+        if n_kept < n_stored_draws:
+            take = min(size, n_stored_draws - n_kept)
+            stored_draws[n_kept:n_kept + take] = share_samples[:take]
+            n_kept += take
+    
+    predicted_turnout = turnout_summary.result()['mean']
+    shares = share_summary.result()
+    
+    forecasts = []
+    
+    for i, county in enumerate(county_data.itertuples(index=False)):
+        for j, candidate in enumerate(candidates):
+            predicted_share = shares['mean'][i, j]
             predicted_votes = int(
-                (predicted_share / 100.0) * 
-                (predicted_turnout / 100.0) * 
-                registered_voters
+                (predicted_share / 100.0) *
+                (predicted_turnout[i] / 100.0) *
+                county.registered_voters_2022
             )
             
             forecasts.append({
-                'county_code': county_code,
-                'county_name': county_name,
+                'county_code': county.code,
+                'county_name': county.name,
                 'candidate_name': candidate['name'],
                 'party': candidate['party'],
                 'predicted_vote_share': round(predicted_share, 2),
-                'lower_bound_90': round(lower_90, 2),
-                'upper_bound_90': round(upper_90, 2),
+                'lower_bound_90': round(shares['q05'][i, j], 2),
+                'upper_bound_90': round(shares['q95'][i, j], 2),
                 'predicted_votes': predicted_votes,
-                'predicted_turnout': round(predicted_turnout, 2),
-                'registered_voters': registered_voters,
+                'predicted_turnout': round(predicted_turnout[i], 2),
+                'registered_voters': county.registered_voters_2022,
                 'election_year': election_year
             })
-        
-        if (idx + 1) % 10 == 0:
-            print(f"   Processed {idx + 1}/{len(county_data)} counties...")
+            
+            if n_stored_draws:
+                forecasts[-1]['draws'] = stored_draws[:, i, j]
     
     forecasts_df = pd.DataFrame(forecasts)
     
-    # Print summary
     print(f"\n✅ Generated {len(forecasts_df)} forecasts")
-    print(f"   ({len(county_data)} counties × {n_candidates} candidates)")
+    print(f"   ({n_counties} counties × {n_candidates} candidates)")
     
     return forecasts_df
 
@@ -235,19 +485,35 @@ def main():
                        help='Number of Monte Carlo samples (default: 2000)')
     parser.add_argument('--year', type=int, default=2027,
                        help='Election year (default: 2027)')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                       help='Stream samples in chunks of this size (memory-bounded quantile mode)')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Worker processes for per-county sampling; not used with --chunk-size (default: 1)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                       help=f'Random seed; identical inputs and seed give identical output (default: {DEFAULT_SEED})')
+    parser.add_argument('--force', action='store_true',
+                       help='Regenerate even if a cached run with the same fingerprint exists')
+    parser.add_argument('--store-draws', type=int, nargs='?', const=DEFAULT_STORED_DRAWS, default=0,
+                       metavar='N',
+                       help=f'Keep N posterior draws per county/candidate for the distribution API '
+                            f'(default when given: {DEFAULT_STORED_DRAWS})')
     
     args = parser.parse_args()
+    if args.chunk_size and args.workers > 1:
+        parser.error('--workers applies to per-county sampling and cannot be combined with --chunk-size')
+    seed = resolve_seed(args.seed)
     
     print("\n" + "=" * 80)
     print("🗳️  MULTI-CANDIDATE FORECASTING MODEL")
     print("=" * 80)
     print(f"\nElection Year: {args.year}")
     print(f"Monte Carlo Samples: {args.samples:,}")
+    print(f"Seed: {seed}")
     print(f"Model: Dirichlet Distribution with Historical Priors")
     
     # Load data
     print("\n📂 Loading data...")
-    county_data = pd.read_csv('../data/processed/model_county_data.csv')
+    county_data = load_prepared('model_county_data')
     historical_results = load_historical_data()
     
     if historical_results is None:
@@ -271,20 +537,79 @@ def main():
     for i, c in enumerate(candidates, 1):
         print(f"   {i}. {c['name']} ({c['party']})")
     
-    # Generate forecasts
-    forecasts_df = generate_multi_candidate_forecast(
-        county_data,
-        historical_results,
-        candidates,
-        n_samples=args.samples,
-        election_year=args.year
-    )
+    # Everything that affects the output; hashed with the input data into the run fingerprint
+    run_metadata = {
+        'model_name': MODEL_NAME,
+        'model_version': MODEL_VERSION,
+        'election_year': args.year,
+        'candidates': candidates,
+        'seed': seed,
+        'n_samples': args.samples,
+        'sampling_mode': 'streaming' if args.chunk_size else 'per_county',
+        'chunk_size': args.chunk_size,
+        'stored_draws': args.store_draws
+    }
+    run_metadata['fingerprint'] = compute_fingerprint(run_metadata)
+    print(f"\n🔑 Fingerprint: {run_metadata['fingerprint'][:16]}")
     
-    # Save forecasts
     output_file = f'../data/processed/forecasts_{args.year}_multi_candidate.csv'
+    
+    if not args.force and restore_cached_forecasts(run_metadata['fingerprint'], output_file):
+        print("\n♻️  Identical inputs and parameters already forecast - reusing cached run")
+        print(f"   Output file: {output_file}")
+        print("   (use --force to regenerate)")
+        print_forecast_summary(pd.read_csv(output_file))
+        return
+    
+    # Generate forecasts
+    if args.chunk_size:
+        forecasts_df = generate_multi_candidate_forecast_streaming(
+            county_data,
+            historical_results,
+            candidates,
+            n_samples=args.samples,
+            election_year=args.year,
+            chunk_size=args.chunk_size,
+            seed=seed,
+            n_stored_draws=args.store_draws
+        )
+    elif args.workers > 1:
+        forecasts_df = generate_multi_candidate_forecast_parallel(
+            county_data,
+            historical_results,
+            candidates,
+            n_samples=args.samples,
+            election_year=args.year,
+            n_workers=args.workers,
+            seed=seed,
+            n_stored_draws=args.store_draws
+        )
+    else:
+        forecasts_df = generate_multi_candidate_forecast(
+            county_data,
+            historical_results,
+            candidates,
+            n_samples=args.samples,
+            election_year=args.year,
+            seed=seed,
+            n_stored_draws=args.store_draws
+        )
+    
+    # Save forecasts (draws go to a sidecar, row-aligned with the CSV)
+    forecasts_df, draws = split_draws(forecasts_df)
     forecasts_df.to_csv(output_file, index=False)
     print(f"\n💾 Saved forecasts to: {output_file}")
     
+    if draws is not None:
+        print(f"🎲 Saved {draws.shape[1]:,} draws per row to: {write_draws(output_file, draws)}")
+    elif draws_path(output_file).exists():
+        draws_path(output_file).unlink()  # Left over from an earlier run
+    
+    # Seed, settings and fingerprint end up in ForecastRun.parameters
+    metadata_file = write_run_metadata(output_file, run_metadata)
+    print(f"🧾 Saved run metadata to: {metadata_file}")
+    cache_forecasts(run_metadata['fingerprint'], output_file)
+    
     # Print summary
     print_forecast_summary(forecasts_df)
     
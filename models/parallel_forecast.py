@@ -0,0 +1,85 @@
+"""
+Process-pool execution layer for per-unit forecasts
+
+Shards administrative units (counties, constituencies, wards) across a
+ProcessPoolExecutor. Every unit draws from its own RNG stream spawned from a
+single SeedSequence, so results are identical whatever the worker count or
+shard size.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+
+import numpy as np
+
+
+def spawn_unit_seeds(seed: Optional[int], n_units: int) -> Sequence[np.random.SeedSequence]:
+    """One child SeedSequence per unit, in unit order"""
+    return np.random.SeedSequence(seed).spawn(n_units)
+
+
+def _run_shard(unit_function: Callable, shard: List[tuple], shared: dict) -> List[list]:
+    """Worker entry point: forecast every unit in a shard with its own generator"""
+    return [
+        unit_function(*payload, rng=np.random.default_rng(seed_seq), **shared)
+        for payload, seed_seq in shard
+    ]
+
+
+def run_sharded(
+    unit_function: Callable[..., list],
+    unit_payloads: Sequence[tuple],
+    shared: Optional[dict] = None,
+    n_workers: int = 1,
+    seed: Optional[int] = None,
+    shard_size: Optional[int] = None
+) -> List[Any]:
+    """
+    Apply unit_function to every unit payload, optionally across processes
+
+    Args:
+        unit_function: Module-level function called as
+            unit_function(*payload, rng=Generator, **shared) returning a list
+            of forecast records for that unit
+        unit_payloads: One tuple of positional arguments per unit
+        shared: Keyword arguments passed to every call (sample count, candidates...)
+        n_workers: Worker processes; 1 runs in-process
+        seed: Root seed; None draws fresh OS entropy
+        shard_size: Units per task sent to a worker (defaults to ~4 shards per worker)
+
+    Returns:
+        Flat list of records, in unit order
+    """
+    shared = shared or {}
+    seeds = spawn_unit_seeds(seed, len(unit_payloads))
+    items = list(zip(unit_payloads, seeds))
+
+    if n_workers <= 1 or len(items) <= 1:
+        shard_results = [_run_shard(unit_function, items, shared)]
+    else:
+        if shard_size is None:
+            shard_size = max(1, -(-len(items) // (n_workers * 4)))
+        shards = [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            shard_results = list(executor.map(
+                _run_shard,
+                [unit_function] * len(shards),
+                shards,
+                [shared] * len(shards)
+            ))
+
+    # executor.map preserves submission order, so the merge is deterministic
+    return [
+        record
+        for shard_result in shard_results
+        for unit_records in shard_result
+        for record in unit_records
+    ]
+
+
+def default_worker_count() -> int:
+    """Usable CPU count for this process"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
@@ -0,0 +1,82 @@
+"""
+Posterior draw store for forecast runs
+
+The forecast CSV keeps only the mean and 90% bounds. Optionally a thinned
+matrix of vote-share draws (float16, one row per CSV row, same draw order
+for every candidate in a unit) is written to a sidecar next to it; the
+store scripts then save each row to forecast_county_draws as a compressed
+bytea so the API can compute any quantile, exceedance or win probability.
+
+Encoding 'zlib-f2le': zlib-compressed little-endian float16 values.
+"""
+import zlib
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DRAWS_ENCODING = 'zlib-f2le'
+DRAWS_DTYPE = np.dtype('<f2')
+
+# ~1,000 draws keeps 1%-level tail quantiles stable at ~2 KB per row
+DEFAULT_STORED_DRAWS = 1000
+
+
+def thin_draws(samples: np.ndarray, n_draws: int) -> np.ndarray:
+    """
+    Evenly spaced subset of n_draws samples along axis 0, as float16
+
+    The same indices are taken for every column, so draws stay aligned
+    across candidates (needed for win probabilities).
+    """
+    n_samples = len(samples)
+    if n_draws >= n_samples:
+        return samples.astype(DRAWS_DTYPE)
+    index = np.linspace(0, n_samples - 1, n_draws).round().astype(int)
+    return samples[index].astype(DRAWS_DTYPE)
+
+
+def encode_draws(draws: np.ndarray) -> bytes:
+    """Serialise one row of draws for the forecast_county_draws.draws column"""
+    return zlib.compress(np.ascontiguousarray(draws, dtype=DRAWS_DTYPE).tobytes())
+
+
+def decode_draws(blob: bytes) -> np.ndarray:
+    """Inverse of encode_draws"""
+    return np.frombuffer(zlib.decompress(blob), dtype=DRAWS_DTYPE)
+
+
+def draws_path(csv_path) -> Path:
+    """Sidecar path for a forecast CSV: forecasts_2027.csv -> forecasts_2027.draws.npz"""
+    return Path(csv_path).with_suffix('.draws.npz')
+
+
+def split_draws(forecasts_df: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[np.ndarray]]:
+    """
+    Separate the per-record 'draws' column from the forecast table
+
+    Returns:
+        (forecasts without the column, draws matrix with one row per
+        forecast row, or None if the run kept no draws)
+    """
+    if 'draws' not in forecasts_df.columns:
+        return forecasts_df, None
+    draws = np.stack(forecasts_df['draws'].values).astype(DRAWS_DTYPE)
+    return forecasts_df.drop(columns=['draws']), draws
+
+
+def write_draws(csv_path, draws: np.ndarray) -> Path:
+    """Write the draws sidecar; row i belongs to row i of the forecast CSV"""
+    path = draws_path(csv_path)
+    np.savez_compressed(path, draws=draws.astype(DRAWS_DTYPE))
+    return path
+
+
+def load_draws(csv_path) -> Optional[np.ndarray]:
+    """Read the draws sidecar for csv_path (None if the run kept no draws)"""
+    path = draws_path(csv_path)
+    if not path.exists():
+        return None
+    with np.load(path) as sidecar:
+        return sidecar['draws']
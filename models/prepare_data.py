@@ -1,9 +1,12 @@
 """
 Prepare training data from database for Bayesian model
+
+Writes typed model inputs plus a manifest (see prepared_data.py) and skips
+the rebuild when the source rows have not changed.
 """
+import argparse
 import pandas as pd
-import psycopg2
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 import os
 import sys
 from pathlib import Path
@@ -13,15 +16,22 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from dotenv import load_dotenv
 
+from prepared_data import (
+    PREPARED_DATASETS, default_format, is_up_to_date, load_model_inputs,
+    write_dataset, write_manifest
+)
+from run_metadata import PROCESSED_DATA_DIR
+
 # Load environment variables
 load_dotenv()
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 engine = create_engine(DATABASE_URL)
 
-def fetch_county_data():
-    """Fetch county-level features"""
-    query = """
+# Each model input as (SELECT, ORDER BY). The SELECT alone is also hashed
+# server-side to detect whether the source rows changed since the last run.
+DATASET_QUERIES = {
+    'model_county_data': ("""
     SELECT 
         c.id as county_id,
         c.code,
@@ -35,13 +45,10 @@ def fetch_county_data():
     FROM counties c
     LEFT JOIN county_demographics cd ON c.id = cd.county_id
     WHERE cd.census_year = 2019
-    ORDER BY c.code::integer
-    """
-    return pd.read_sql(query, engine)
+    """, "ORDER BY code::integer"),
 
-def fetch_ethnicity_data():
-    """Fetch county-level ethnicity aggregates (privacy-preserving)"""
-    query = """
+    # Privacy threshold: only aggregates of at least 10 people
+    'model_ethnicity_data': ("""
     SELECT 
         county_id,
         ethnicity_group,
@@ -49,14 +56,10 @@ def fetch_ethnicity_data():
         percentage as population_share
     FROM county_ethnicity_aggregate
     WHERE census_year = 2019
-    AND population_count >= 10  -- Privacy threshold
-    ORDER BY county_id, ethnicity_group
-    """
-    return pd.read_sql(query, engine)
+    AND population_count >= 10
+    """, "ORDER BY county_id, ethnicity_group"),
 
-def fetch_historical_results():
-    """Fetch historical election results"""
-    query = """
+    'model_historical_results': ("""
     SELECT 
         erc.election_id,
         e.year as election_year,
@@ -74,29 +77,91 @@ def fetch_historical_results():
     JOIN elections e ON erc.election_id = e.id
     JOIN candidates c ON erc.candidate_id = c.id
     JOIN counties c_county ON erc.county_id = c_county.id
-    ORDER BY e.year DESC, erc.county_id, erc.candidate_id
+    """, "ORDER BY election_year DESC, county_id, candidate_id"),
+}
+
+
+def fetch_source_signatures(conn):
     """
-    return pd.read_sql(query, engine)
+    md5 of the rows behind every model input, in a single round trip
+
+    Hashing happens in PostgreSQL, so checking for changes transfers 3 hashes
+    instead of the data.
+    """
+    query = "\nUNION ALL\n".join(
+        f"SELECT '{name}' AS dataset, "
+        f"md5(coalesce(string_agg(q::text, '|' ORDER BY q::text), '')) AS signature "
+        f"FROM ({select_sql}) q"
+        for name, (select_sql, _) in DATASET_QUERIES.items()
+    )
+    rows = conn.execute(text(query)).fetchall()
+    return {dataset: signature for dataset, signature in rows}
+
+
+def fetch_dataset(conn, name):
+    """Fetch one model input"""
+    select_sql, order_sql = DATASET_QUERIES[name]
+    return pd.read_sql(text(f"SELECT * FROM ({select_sql}) q {order_sql}"), conn)
+
+
+def fetch_county_data(conn):
+    """Fetch county-level features"""
+    return fetch_dataset(conn, 'model_county_data')
+
 
-def prepare_training_data():
-    """Prepare all data for model training"""
+def fetch_ethnicity_data(conn):
+    """Fetch county-level ethnicity aggregates (privacy-preserving)"""
+    return fetch_dataset(conn, 'model_ethnicity_data')
+
+
+def fetch_historical_results(conn):
+    """Fetch historical election results"""
+    return fetch_dataset(conn, 'model_historical_results')
+
+
+def prepare_training_data(output_format=None, force=False):
+    """
+    Prepare all data for model training
+    
+    All reads share one REPEATABLE READ snapshot, so the inputs and their
+    source signatures are consistent with each other. Nothing is refetched
+    when the signatures match the manifest (unless force).
+    
+    Args:
+        output_format: 'parquet', 'feather' or 'csv' (default: parquet if pyarrow is installed)
+        force: Rebuild even if the source rows are unchanged
+    
+    Returns:
+        (county_data, ethnicity_data, historical_results)
+    """
+    output_format = output_format or default_format()
+    
     print("=" * 60)
     print("📊 PREPARING TRAINING DATA FOR BAYESIAN MODEL")
     print("=" * 60)
     
-    print("\n1️⃣  Fetching county data...")
-    county_data = fetch_county_data()
-    print(f"   ✅ Loaded {len(county_data)} counties")
-    print(f"   📍 Sample: {county_data['name'].head(3).tolist()}")
-    
-    print("\n2️⃣  Fetching ethnicity data...")
-    ethnicity_data = fetch_ethnicity_data()
-    print(f"   ✅ Loaded {len(ethnicity_data)} ethnicity aggregates")
-    print(f"   🔒 Privacy threshold: ≥10 individuals per aggregate")
-    
-    print("\n3️⃣  Fetching historical results...")
-    historical_results = fetch_historical_results()
-    print(f"   ✅ Loaded {len(historical_results)} historical results")
+    with engine.connect().execution_options(isolation_level='REPEATABLE READ') as conn:
+        print("\n🔎 Checking source tables for changes...")
+        source_signatures = fetch_source_signatures(conn)
+        
+        if not force and is_up_to_date(source_signatures, output_format):
+            print("   ♻️  Source rows unchanged since last preparation - nothing to do")
+            print("   (use --force to rebuild)")
+            return load_model_inputs()
+        
+        print("\n1️⃣  Fetching county data...")
+        county_data = fetch_county_data(conn)
+        print(f"   ✅ Loaded {len(county_data)} counties")
+        print(f"   📍 Sample: {county_data['name'].head(3).tolist()}")
+        
+        print("\n2️⃣  Fetching ethnicity data...")
+        ethnicity_data = fetch_ethnicity_data(conn)
+        print(f"   ✅ Loaded {len(ethnicity_data)} ethnicity aggregates")
+        print(f"   🔒 Privacy threshold: ≥10 individuals per aggregate")
+        
+        print("\n3️⃣  Fetching historical results...")
+        historical_results = fetch_historical_results(conn)
+        print(f"   ✅ Loaded {len(historical_results)} historical results")
     
     # Display summary statistics
     print("\n" + "=" * 60)
@@ -104,14 +169,13 @@ def prepare_training_data():
     print("=" * 60)
     
     print(f"\n🗳️  Elections:")
-    for year in sorted(historical_results['election_year'].unique(), reverse=True):
-        count = len(historical_results[historical_results['election_year'] == year])
+    for year, count in historical_results['election_year'].value_counts().sort_index(ascending=False).items():
         print(f"   - {year}: {count} results")
     
     print(f"\n👥 Candidates:")
-    candidates = historical_results.groupby(['candidate_name', 'party']).size().reset_index(name='counties')
-    for _, row in candidates.iterrows():
-        print(f"   - {row['candidate_name']} ({row['party']}): {row['counties']} counties")
+    candidates = historical_results.groupby(['candidate_name', 'party']).size()
+    for (candidate_name, party), counties in candidates.items():
+        print(f"   - {candidate_name} ({party}): {counties} counties")
     
     print(f"\n📊 Turnout Statistics:")
     print(f"   - Mean: {historical_results['turnout'].mean():.1f}%")
@@ -119,29 +183,26 @@ def prepare_training_data():
     print(f"   - Max:  {historical_results['turnout'].max():.1f}%")
     
     # Create output directory
-    output_dir = Path(__file__).parent.parent / 'data' / 'processed'
-    output_dir.mkdir(parents=True, exist_ok=True)
+    PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Save to CSV for model training
-    county_file = output_dir / 'model_county_data.csv'
-    ethnicity_file = output_dir / 'model_ethnicity_data.csv'
-    historical_file = output_dir / 'model_historical_results.csv'
-    
-    county_data.to_csv(county_file, index=False)
-    ethnicity_data.to_csv(ethnicity_file, index=False)
-    historical_results.to_csv(historical_file, index=False)
+    # Save typed files for model training; the manifest is written last
+    datasets = {
+        name: write_dataset(df, name, output_format)
+        for name, df in zip(PREPARED_DATASETS, (county_data, ethnicity_data, historical_results))
+    }
+    manifest_file = write_manifest(datasets, source_signatures)
     
     print("\n" + "=" * 60)
     print("💾 FILES SAVED")
     print("=" * 60)
-    print(f"   ✅ {county_file}")
-    print(f"   ✅ {ethnicity_file}")
-    print(f"   ✅ {historical_file}")
+    for entry in datasets.values():
+        print(f"   ✅ {PROCESSED_DATA_DIR / entry['file']}")
+    print(f"   🧾 {manifest_file}")
     
     print("\n" + "=" * 60)
     print("✅ DATA PREPARATION COMPLETE!")
     print("=" * 60)
-    print(f"\n📁 Total files: 3")
+    print(f"\n📁 Total files: {len(datasets)} ({output_format})")
     print(f"📊 Total records:")
     print(f"   - Counties: {len(county_data)}")
     print(f"   - Ethnicity aggregates: {len(ethnicity_data)}")
@@ -150,8 +211,15 @@ def prepare_training_data():
     return county_data, ethnicity_data, historical_results
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Prepare model inputs from the database')
+    parser.add_argument('--format', choices=['parquet', 'feather', 'csv'], default=None,
+                        help='Output format (default: parquet if pyarrow is installed, else csv)')
+    parser.add_argument('--force', action='store_true',
+                        help='Rebuild even if the source tables are unchanged')
+    args = parser.parse_args()
+    
     try:
-        prepare_training_data()
+        prepare_training_data(output_format=args.format, force=args.force)
     except Exception as e:
         print(f"\n❌ ERROR: {e}")
         import traceback
@@ -0,0 +1,128 @@
+"""
+Prepared model inputs
+
+prepare_data.py writes each model input as a typed Parquet/Feather file
+(CSV when pyarrow is not installed) and records it in a manifest together
+with a signature of the source rows it was built from. The forecast models
+load inputs through load_prepared, and the run fingerprint reuses the
+manifest's content hashes instead of rehashing the files.
+"""
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from run_metadata import PROCESSED_DATA_DIR, MODEL_INPUTS_MANIFEST, file_digest, load_inputs_manifest
+
+PREPARED_DATASETS = (
+    'model_county_data',
+    'model_ethnicity_data',
+    'model_historical_results',
+)
+
+FORMAT_SUFFIXES = {
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'csv': '.csv',
+}
+
+
+def default_format() -> str:
+    """Parquet when pyarrow is available, otherwise CSV"""
+    try:
+        import pyarrow  # noqa: F401
+        return 'parquet'
+    except ImportError:
+        return 'csv'
+
+
+def write_dataset(df: pd.DataFrame, name: str, fmt: str, data_dir: Path = PROCESSED_DATA_DIR) -> Dict:
+    """
+    Write one prepared dataset atomically
+
+    Returns:
+        Manifest entry: file, format, rows, column dtypes and content hash
+    """
+    path = data_dir / f"{name}{FORMAT_SUFFIXES[fmt]}"
+    tmp_path = path.with_name(path.name + '.tmp')
+
+    if fmt == 'parquet':
+        df.to_parquet(tmp_path, index=False)
+    elif fmt == 'feather':
+        df.reset_index(drop=True).to_feather(tmp_path)
+    else:
+        df.to_csv(tmp_path, index=False)
+
+    os.replace(tmp_path, path)
+
+    return {
+        'file': path.name,
+        'format': fmt,
+        'rows': len(df),
+        'dtypes': {column: str(dtype) for column, dtype in df.dtypes.items()},
+        'sha256': file_digest(path),
+    }
+
+
+def write_manifest(datasets: Dict[str, Dict], source_signatures: Dict[str, str],
+                   manifest_path: Path = MODEL_INPUTS_MANIFEST) -> Path:
+    """Record the prepared datasets and the source signatures they reflect"""
+    manifest = {
+        'prepared_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'source_signatures': source_signatures,
+        'datasets': datasets,
+    }
+    tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    return manifest_path
+
+
+def is_up_to_date(source_signatures: Dict[str, str], fmt: Optional[str] = None,
+                  data_dir: Path = PROCESSED_DATA_DIR) -> bool:
+    """True if the manifest was built from these source rows (in this format) and every file is present"""
+    manifest = load_inputs_manifest()
+    if manifest.get('source_signatures') != source_signatures:
+        return False
+
+    datasets = manifest.get('datasets', {})
+    return all(
+        name in datasets
+        and (fmt is None or datasets[name]['format'] == fmt)
+        and (data_dir / datasets[name]['file']).exists()
+        for name in PREPARED_DATASETS
+    )
+
+
+def load_prepared(name: str, data_dir: Path = PROCESSED_DATA_DIR) -> pd.DataFrame:
+    """
+    Load a prepared model input with its recorded column types
+
+    Falls back to the legacy <name>.csv when no manifest exists yet.
+    """
+    entry = load_inputs_manifest().get('datasets', {}).get(name)
+    if entry is None:
+        return pd.read_csv(data_dir / f"{name}.csv")
+
+    path = data_dir / entry['file']
+    if entry['format'] == 'parquet':
+        return pd.read_parquet(path)
+    if entry['format'] == 'feather':
+        return pd.read_feather(path)
+
+    dtypes = entry['dtypes']
+    parse_dates = [column for column, dtype in dtypes.items() if dtype.startswith('datetime64')]
+    return pd.read_csv(
+        path,
+        dtype={column: dtype for column, dtype in dtypes.items() if column not in parse_dates},
+        parse_dates=parse_dates
+    )
+
+
+def load_model_inputs(data_dir: Path = PROCESSED_DATA_DIR) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """(county_data, ethnicity_data, historical_results)"""
+    return tuple(load_prepared(name, data_dir) for name in PREPARED_DATASETS)
@@ -0,0 +1,147 @@
+"""
+Forecast run metadata
+
+Seeds and model parameters travel from the forecast scripts to the store
+scripts in a JSON sidecar next to the forecast CSV, and end up in
+ForecastRun.parameters.
+
+Runs are also content-addressed: a fingerprint over the prepared input data
+and every output-affecting parameter keys a local cache of forecast CSVs
+and lets the store scripts find an existing ForecastRun for the same inputs.
+"""
+import hashlib
+import json
+import secrets
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+# Default seed, so unseeded reruns on unchanged data hit the cache
+DEFAULT_SEED = 2027
+
+PROCESSED_DATA_DIR = Path(__file__).parent.parent / 'data' / 'processed'
+FORECAST_CACHE_DIR = Path(__file__).parent.parent / 'data' / 'cache' / 'forecasts'
+
+# Sidecars that only some runs write (posterior draws); cached alongside the CSV
+OPTIONAL_SIDECAR_SUFFIXES = ('.draws.npz',)
+
+# Written by prepare_data.py: prepared files, their hashes and source signatures
+MODEL_INPUTS_MANIFEST = PROCESSED_DATA_DIR / 'model_inputs.manifest.json'
+
+# Legacy prepare_data.py outputs, hashed when there is no manifest
+MODEL_INPUT_FILES = (
+    'model_county_data.csv',
+    'model_ethnicity_data.csv',
+    'model_historical_results.csv',
+)
+
+
+def resolve_seed(seed: Optional[int] = None) -> int:
+    """Return seed, or a fresh 63-bit seed so unseeded runs can still be replayed"""
+    if seed is None:
+        return secrets.randbits(63)
+    return int(seed)
+
+
+def metadata_path(csv_path) -> Path:
+    """Sidecar path for a forecast CSV: forecasts_2027.csv -> forecasts_2027.meta.json"""
+    return Path(csv_path).with_suffix('.meta.json')
+
+
+def write_run_metadata(csv_path, metadata: Dict) -> Path:
+    """Write the run metadata sidecar for csv_path"""
+    path = metadata_path(csv_path)
+    with open(path, 'w') as f:
+        json.dump(metadata, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_run_metadata(csv_path) -> Dict:
+    """Read the run metadata sidecar for csv_path ({} if there is none)"""
+    path = metadata_path(csv_path)
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def file_digest(path) -> str:
+    """SHA256 of a file's contents"""
+    sha256_hash = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for byte_block in iter(lambda: f.read(1 << 20), b''):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def load_inputs_manifest() -> Dict:
+    """Read the prepared-inputs manifest ({} if prepare_data.py has not written one)"""
+    if not MODEL_INPUTS_MANIFEST.exists():
+        return {}
+    with open(MODEL_INPUTS_MANIFEST) as f:
+        return json.load(f)
+
+
+def input_digests(input_files: Optional[Iterable] = None) -> Dict[str, str]:
+    """
+    Content hash of every prepared model input, keyed by file name
+
+    By default the hashes recorded in the manifest are used as-is.
+    """
+    if input_files is None:
+        manifest = load_inputs_manifest()
+        if manifest:
+            return {entry['file']: entry['sha256'] for entry in manifest['datasets'].values()}
+        input_files = [PROCESSED_DATA_DIR / name for name in MODEL_INPUT_FILES]
+    return {Path(path).name: file_digest(path) for path in input_files}
+
+
+def compute_fingerprint(parameters: Dict, input_files: Optional[Iterable] = None) -> str:
+    """
+    Content address of a forecast run
+
+    Covers the prepared input data plus every parameter that affects output
+    (model name/version, candidates, sample count, seed, sampling mode...).
+    Parameters must be JSON-serialisable; key order does not matter.
+    """
+    payload = {
+        'inputs': input_digests(input_files),
+        'parameters': parameters,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def cached_forecast_path(fingerprint: str) -> Path:
+    """Cache location of the forecast CSV for a fingerprint"""
+    return FORECAST_CACHE_DIR / f"{fingerprint}.csv"
+
+
+def restore_cached_forecasts(fingerprint: str, output_path) -> bool:
+    """Copy a cached forecast CSV and its metadata to output_path; False on a miss"""
+    cached_csv = cached_forecast_path(fingerprint)
+    if not cached_csv.exists() or not metadata_path(cached_csv).exists():
+        return False
+    shutil.copyfile(cached_csv, output_path)
+    shutil.copyfile(metadata_path(cached_csv), metadata_path(output_path))
+    for suffix in OPTIONAL_SIDECAR_SUFFIXES:
+        cached_sidecar = cached_csv.with_suffix(suffix)
+        output_sidecar = Path(output_path).with_suffix(suffix)
+        if cached_sidecar.exists():
+            shutil.copyfile(cached_sidecar, output_sidecar)
+        elif output_sidecar.exists():
+            output_sidecar.unlink()  # Left over from a different run
+    return True
+
+
+def cache_forecasts(fingerprint: str, output_path) -> Path:
+    """Store a freshly generated forecast CSV and its metadata in the cache"""
+    FORECAST_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cached_csv = cached_forecast_path(fingerprint)
+    shutil.copyfile(output_path, cached_csv)
+    shutil.copyfile(metadata_path(output_path), metadata_path(cached_csv))
+    for suffix in OPTIONAL_SIDECAR_SUFFIXES:
+        output_sidecar = Path(output_path).with_suffix(suffix)
+        if output_sidecar.exists():
+            shutil.copyfile(output_sidecar, cached_csv.with_suffix(suffix))
+    return cached_csv
@@ -12,15 +12,20 @@ from datetime import datetime
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 
+from streaming_quantiles import StreamingSummary, iter_chunk_sizes
+from parallel_forecast import run_sharded, spawn_unit_seeds
+from run_metadata import (
+    DEFAULT_SEED, resolve_seed, write_run_metadata,
+    compute_fingerprint, restore_cached_forecasts, cache_forecasts
+)
+from prepared_data import load_model_inputs
+
+MODEL_NAME = 'SimpleBayesianForecast'
+MODEL_VERSION = 'v1.0'
+
 def load_data():
-    """Load prepared training data"""
-    data_dir = Path(__file__).parent.parent / 'data' / 'processed'
-    
-    county_data = pd.read_csv(data_dir / 'model_county_data.csv')
-    ethnicity_data = pd.read_csv(data_dir / 'model_ethnicity_data.csv')
-    historical_results = pd.read_csv(data_dir / 'model_historical_results.csv')
-    
-    return county_data, ethnicity_data, historical_results
+    """Load prepared training data (typed files listed in the prepare_data.py manifest)"""
+    return load_model_inputs()
 
 def calculate_historical_trends(historical_results):
     """Calculate trends from historical data"""
@@ -39,7 +44,85 @@ def calculate_historical_trends(historical_results):
     
     return county_trends
 
-def generate_forecasts_2027(county_data, historical_results, n_samples=1000):
+def forecast_county(county, county_results_2022, n_samples, rng):
+    """
+    Forecast turnout and candidate vote shares for a single county
+    
+    Args:
+        county: Row of county_data (code, name, registered_voters_2022)
+        county_results_2022: This county's 2022 results
+        n_samples: Number of Monte Carlo samples
+        rng: numpy Generator for this county's samples
+    
+    Returns:
+        List of forecast records, one per candidate
+    """
+    county_code = county['code']
+    county_name = county['name']
+    
+    # Base turnout on 2022 with some uncertainty
+    turnout_2022 = county_results_2022['turnout'].mean()
+    
+    # Generate samples for turnout (normal distribution with std=5%)
+    turnout_samples = rng.normal(turnout_2022, 5, n_samples)
+    turnout_samples = np.clip(turnout_samples, 40, 95)  # Realistic bounds
+    
+    # Calculate mean and credible intervals for turnout
+    turnout_mean = np.mean(turnout_samples)
+    turnout_lower = np.percentile(turnout_samples, 5)  # 90% CI
+    turnout_upper = np.percentile(turnout_samples, 95)
+    
+    forecasts = []
+    
+    # For each candidate, project vote share
+    for _, candidate_row in county_results_2022.iterrows():
+        candidate_name = candidate_row['candidate_name']
+        party = candidate_row['party']
+        vote_share_2022 = (candidate_row['votes'] / candidate_row['total_votes_cast']) * 100
+        
+        # Generate samples for vote share (normal with std=3%)
+        vote_share_samples = rng.normal(vote_share_2022, 3, n_samples)
+        vote_share_samples = np.clip(vote_share_samples, 0, 100)
+        
+        # Calculate statistics
+        vote_share_mean = np.mean(vote_share_samples)
+        vote_share_lower = np.percentile(vote_share_samples, 5)
+        vote_share_upper = np.percentile(vote_share_samples, 95)
+        
+        # Estimate votes based on registered voters
+        registered_voters = county['registered_voters_2022']
+        expected_votes = (registered_voters * turnout_mean / 100) * (vote_share_mean / 100)
+        
+        forecasts.append({
+            'county_code': county_code,
+            'county_name': county_name,
+            'candidate_name': candidate_name,
+            'party': party,
+            'predicted_vote_share': vote_share_mean,
+            'vote_share_lower_90': vote_share_lower,
+            'vote_share_upper_90': vote_share_upper,
+            'predicted_turnout': turnout_mean,
+            'turnout_lower_90': turnout_lower,
+            'turnout_upper_90': turnout_upper,
+            'predicted_votes': int(expected_votes),
+            'registered_voters': registered_voters
+        })
+    
+    return forecasts
+
+def county_payloads(county_data, historical_results):
+    """(county, county_results_2022) pairs for every county with 2022 results"""
+    # For 2027, we'll project based on 2022 results with uncertainty
+    results_2022 = historical_results[historical_results['election_year'] == 2022]
+    results_by_county = dict(tuple(results_2022.groupby('county_code')))
+    
+    return [
+        (county, results_by_county[county['code']])
+        for _, county in county_data.iterrows()
+        if county['code'] in results_by_county
+    ]
+
+def generate_forecasts_2027(county_data, historical_results, n_samples=1000, seed=None):
     """
     Generate probabilistic forecasts for 2027 election
     
@@ -47,77 +130,120 @@ def generate_forecasts_2027(county_data, historical_results, n_samples=1000):
     - Historical vote shares as prior
     - Uncertainty from historical variance
     - Random sampling for credible intervals
+    
+    Each county samples from its own Generator spawned from seed, matching
+    generate_forecasts_2027_parallel for the same seed.
     """
     print("\n" + "=" * 60)
     print("🔮 GENERATING 2027 FORECASTS")
     print("=" * 60)
     
-    # Get unique candidates from historical data
-    candidates = historical_results[['candidate_name', 'party']].drop_duplicates()
+    forecasts = []
+    payloads = county_payloads(county_data, historical_results)
+    
+    for (county, county_results_2022), seed_seq in zip(payloads, spawn_unit_seeds(seed, len(payloads))):
+        rng = np.random.default_rng(seed_seq)
+        forecasts.extend(forecast_county(county, county_results_2022, n_samples, rng))
+    
+    forecasts_df = pd.DataFrame(forecasts)
+    print_forecast_summary(forecasts_df)
+    
+    return forecasts_df
+
+def generate_forecasts_2027_parallel(county_data, historical_results, n_samples=1000, n_workers=1, seed=None):
+    """
+    Process-pool variant of generate_forecasts_2027
+    
+    Counties are sharded across n_workers processes. Each county samples from
+    its own stream spawned from seed, so output does not depend on n_workers.
+    """
+    print("\n" + "=" * 60)
+    print("🔮 GENERATING 2027 FORECASTS (PARALLEL)")
+    print("=" * 60)
+    print(f"   Workers: {n_workers}")
+    
+    forecasts = run_sharded(
+        forecast_county,
+        county_payloads(county_data, historical_results),
+        shared={'n_samples': n_samples},
+        n_workers=n_workers,
+        seed=seed
+    )
+    
+    forecasts_df = pd.DataFrame(forecasts)
+    print_forecast_summary(forecasts_df)
+    
+    return forecasts_df
+
+def generate_forecasts_2027_streaming(county_data, historical_results, n_samples=1000, chunk_size=10000, seed=None):
+    """
+    Memory-bounded variant of generate_forecasts_2027
+    
+    Draws samples for all counties and candidates at once, chunk_size samples
+    at a time, and folds each chunk into running means and histogram sketches
+    of the 5th/95th percentiles. Memory is O(chunk_size × forecasts) instead of
+    O(n_samples × forecasts). All chunks draw from one Generator seeded
+    with seed.
+    """
+    print("\n" + "=" * 60)
+    print("🔮 GENERATING 2027 FORECASTS (STREAMING)")
+    print("=" * 60)
+    print(f"   Chunk size: {chunk_size:,}")
     
-    # For 2027, we'll project based on 2022 results with uncertainty
     results_2022 = historical_results[historical_results['election_year'] == 2022]
+    counties = county_data[county_data['code'].isin(results_2022['county_code'])]
     
-    forecasts = []
+    # One row per (county, candidate), in county order
+    rows = counties[['code', 'name', 'registered_voters_2022']].merge(
+        results_2022, left_on='code', right_on='county_code'
+    )
     
-    for _, county in county_data.iterrows():
-        county_code = county['code']
-        county_name = county['name']
-        
-        # Get 2022 results for this county
-        county_results_2022 = results_2022[results_2022['county_code'] == county_code]
-        
-        if len(county_results_2022) == 0:
-            continue
-        
-        # Base turnout on 2022 with some uncertainty
-        turnout_2022 = county_results_2022['turnout'].mean()
-        
-        # Generate samples for turnout (normal distribution with std=5%)
-        turnout_samples = np.random.normal(turnout_2022, 5, n_samples)
-        turnout_samples = np.clip(turnout_samples, 40, 95)  # Realistic bounds
-        
-        # Calculate mean and credible intervals for turnout
-        turnout_mean = np.mean(turnout_samples)
-        turnout_lower = np.percentile(turnout_samples, 5)  # 90% CI
-        turnout_upper = np.percentile(turnout_samples, 95)
+    turnout_base = results_2022.groupby('county_code')['turnout'].mean().reindex(counties['code']).values
+    share_base = (rows['votes'] / rows['total_votes_cast'] * 100).values
+    
+    turnout_summary = StreamingSummary((len(turnout_base),))
+    share_summary = StreamingSummary((len(share_base),))
+    
+    rng = np.random.default_rng(seed)
+    
+    for size in iter_chunk_sizes(n_samples, chunk_size):
+        turnout_samples = rng.normal(turnout_base, 5, (size, len(turnout_base)))
+        turnout_summary.update(np.clip(turnout_samples, 40, 95))
         
-        # For each candidate, project vote share
-        for _, candidate_row in county_results_2022.iterrows():
-            candidate_name = candidate_row['candidate_name']
-            party = candidate_row['party']
-            vote_share_2022 = (candidate_row['votes'] / candidate_row['total_votes_cast']) * 100
-            
-            # Generate samples for vote share (normal with std=3%)
-            vote_share_samples = np.random.normal(vote_share_2022, 3, n_samples)
-            vote_share_samples = np.clip(vote_share_samples, 0, 100)
-            
-            # Calculate statistics
-            vote_share_mean = np.mean(vote_share_samples)
-            vote_share_lower = np.percentile(vote_share_samples, 5)
-            vote_share_upper = np.percentile(vote_share_samples, 95)
-            
-            # Estimate votes based on registered voters
-            registered_voters = county['registered_voters_2022']
-            expected_votes = (registered_voters * turnout_mean / 100) * (vote_share_mean / 100)
-            
-            forecasts.append({
-                'county_code': county_code,
-                'county_name': county_name,
-                'candidate_name': candidate_name,
-                'party': party,
-                'predicted_vote_share': vote_share_mean,
-                'vote_share_lower_90': vote_share_lower,
-                'vote_share_upper_90': vote_share_upper,
-                'predicted_turnout': turnout_mean,
-                'turnout_lower_90': turnout_lower,
-                'turnout_upper_90': turnout_upper,
-                'predicted_votes': int(expected_votes),
-                'registered_voters': registered_voters
-            })
+        vote_share_samples = rng.normal(share_base, 3, (size, len(share_base)))
+        share_summary.update(np.clip(vote_share_samples, 0, 100))
     
-    forecasts_df = pd.DataFrame(forecasts)
+    # Broadcast county turnout back onto the (county, candidate) rows
+    county_index = pd.Series(np.arange(len(counties)), index=counties['code']).reindex(rows['code']).values
+    turnout = turnout_summary.result()
+    turnout_mean = turnout['mean'][county_index]
+    turnout_lower = turnout['q05'][county_index]
+    turnout_upper = turnout['q95'][county_index]
+    shares = share_summary.result()
+    
+    registered_voters = rows['registered_voters_2022'].values
+    expected_votes = (registered_voters * turnout_mean / 100) * (shares['mean'] / 100)
     
+    forecasts_df = pd.DataFrame({
+        'county_code': rows['code'].values,
+        'county_name': rows['name'].values,
+        'candidate_name': rows['candidate_name'].values,
+        'party': rows['party'].values,
+        'predicted_vote_share': shares['mean'],
+        'vote_share_lower_90': shares['q05'],
+        'vote_share_upper_90': shares['q95'],
+        'predicted_turnout': turnout_mean,
+        'turnout_lower_90': turnout_lower,
+        'turnout_upper_90': turnout_upper,
+        'predicted_votes': expected_votes.astype(int),
+        'registered_voters': registered_voters
+    })
+    print_forecast_summary(forecasts_df)
+    
+    return forecasts_df
+
+def print_forecast_summary(forecasts_df):
+    """Print county counts and national vote shares"""
     print(f"\n✅ Generated {len(forecasts_df)} county-level forecasts")
     print(f"   📍 Counties: {forecasts_df['county_code'].nunique()}")
     print(f"   👥 Candidates: {forecasts_df['candidate_name'].nunique()}")
@@ -134,29 +260,68 @@ def generate_forecasts_2027(county_data, historical_results, n_samples=1000):
     
     for _, row in national_summary.iterrows():
         print(f"   - {row['candidate_name']} ({row['party']}): {row['national_vote_share']:.1f}%")
-    
-    return forecasts_df
 
-def save_forecasts(forecasts_df, output_file='forecasts_2027.csv'):
-    """Save forecasts to CSV"""
+def save_forecasts(forecasts_df, output_file='forecasts_2027.csv', run_metadata=None):
+    """Save forecasts to CSV, plus a metadata sidecar (seed, samples) for store_forecasts.py"""
     output_path = Path(__file__).parent.parent / 'data' / 'processed' / output_file
     forecasts_df.to_csv(output_path, index=False)
     
     print(f"\n💾 Forecasts saved to: {output_path}")
+    
+    if run_metadata is not None:
+        metadata_file = write_run_metadata(output_path, run_metadata)
+        print(f"   🧾 Run metadata: {metadata_file}")
+    
     return output_path
 
 def main():
     parser = argparse.ArgumentParser(description='Generate 2027 election forecasts')
     parser.add_argument('--samples', type=int, default=1000, help='Number of Monte Carlo samples')
     parser.add_argument('--output', type=str, default='forecasts_2027.csv', help='Output filename')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='Stream samples in chunks of this size (memory-bounded quantile mode)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for per-county sampling; not used with --chunk-size (default: 1)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                        help=f'Random seed; identical inputs and seed give identical output (default: {DEFAULT_SEED})')
+    parser.add_argument('--force', action='store_true',
+                        help='Regenerate even if a cached run with the same fingerprint exists')
     
     args = parser.parse_args()
+    if args.chunk_size and args.workers > 1:
+        parser.error('--workers applies to per-county sampling and cannot be combined with --chunk-size')
+    seed = resolve_seed(args.seed)
+    
+    # Everything that affects the output; hashed with the input data into the run fingerprint
+    run_metadata = {
+        'model_name': MODEL_NAME,
+        'model_version': MODEL_VERSION,
+        'seed': seed,
+        'monte_carlo_samples': args.samples,
+        'sampling_mode': 'streaming' if args.chunk_size else 'per_county',
+        'chunk_size': args.chunk_size
+    }
+    run_metadata['fingerprint'] = compute_fingerprint(run_metadata)
     
     print("=" * 60)
     print("🇰🇪 KENPOLIMARKET FORECASTING MODEL")
     print("=" * 60)
     print(f"📅 Run time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"🎲 Monte Carlo samples: {args.samples}")
+    print(f"🌱 Seed: {seed}")
+    if args.chunk_size:
+        print(f"🧮 Streaming chunk size: {args.chunk_size}")
+    if args.workers > 1:
+        print(f"⚙️  Workers: {args.workers}")
+    print(f"🔑 Fingerprint: {run_metadata['fingerprint'][:16]}")
+    
+    output_path = Path(__file__).parent.parent / 'data' / 'processed' / args.output
+    
+    if not args.force and restore_cached_forecasts(run_metadata['fingerprint'], output_path):
+        print("\n♻️  Identical inputs and parameters already forecast - reusing cached run")
+        print(f"   📁 Output file: {output_path}")
+        print("   (use --force to regenerate)")
+        return pd.read_csv(output_path)
     
     # Load data
     print("\n📂 Loading data...")
@@ -166,10 +331,24 @@ def main():
     print(f"   ✅ {len(historical_results)} historical results")
     
     # Generate forecasts
-    forecasts_df = generate_forecasts_2027(county_data, historical_results, n_samples=args.samples)
+    if args.chunk_size:
+        forecasts_df = generate_forecasts_2027_streaming(
+            county_data, historical_results, n_samples=args.samples,
+            chunk_size=args.chunk_size, seed=seed
+        )
+    elif args.workers > 1:
+        forecasts_df = generate_forecasts_2027_parallel(
+            county_data, historical_results, n_samples=args.samples,
+            n_workers=args.workers, seed=seed
+        )
+    else:
+        forecasts_df = generate_forecasts_2027(
+            county_data, historical_results, n_samples=args.samples, seed=seed
+        )
     
-    # Save forecasts
-    output_path = save_forecasts(forecasts_df, args.output)
+    # Save forecasts (seed, settings and fingerprint are recorded in ForecastRun.parameters)
+    output_path = save_forecasts(forecasts_df, args.output, run_metadata)
+    cache_forecasts(run_metadata['fingerprint'], output_path)
     
     print("\n" + "=" * 60)
     print("✅ FORECASTING COMPLETE!")
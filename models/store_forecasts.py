@@ -6,6 +6,7 @@ import uuid
 import json
 from datetime import datetime, date
 from sqlalchemy import create_engine, text
+import argparse
 import os
 import sys
 from pathlib import Path
@@ -15,14 +16,22 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from dotenv import load_dotenv
 
+from run_metadata import load_run_metadata
+
 # Load environment variables
 load_dotenv()
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 engine = create_engine(DATABASE_URL)
 
-def create_forecast_run(election_year=2027, model_name='SimpleBayesianForecast', model_version='v1.0'):
-    """Create forecast run record and return its ID"""
+def create_forecast_run(conn, election_year=2027, model_name='SimpleBayesianForecast', model_version='v1.0', run_metadata=None):
+    """
+    Create forecast run record in 'running' state and return its ID
+
+    run_metadata (seed, sample count, ...) from the forecast script's sidecar
+    is merged into the run parameters. The caller stores the forecasts and
+    calls complete_forecast_run in the same transaction (conn).
+    """
     forecast_run_id = str(uuid.uuid4())
 
     query = text("""
@@ -44,20 +53,42 @@ def create_forecast_run(election_year=2027, model_name='SimpleBayesianForecast',
         'monte_carlo_samples': 2000,
         'confidence_level': 0.90
     }
+    parameters.update(run_metadata or {})
+
+    conn.execute(query, {
+        'id': forecast_run_id,
+        'election_id': election_id,
+        'model_name': model_name,
+        'model_version': model_version,
+        'run_timestamp': datetime.now(),
+        'data_cutoff_date': date.today(),
+        'status': 'running',
+        'parameters': json.dumps(parameters)  # Convert to proper JSON string
+    })
+
+    return forecast_run_id
+
+def complete_forecast_run(conn, forecast_run_id):
+    """Mark a run completed once all of its forecasts are stored"""
+    conn.execute(
+        text("UPDATE forecast_runs SET status = 'completed' WHERE id = :id"),
+        {'id': forecast_run_id}
+    )
+
+def find_forecast_run_by_fingerprint(fingerprint):
+    """Return the ID of the latest completed run with this fingerprint, or None"""
+    query = text("""
+    SELECT id FROM forecast_runs
+    WHERE parameters->>'fingerprint' = :fingerprint
+      AND status = 'completed'
+    ORDER BY run_timestamp DESC
+    LIMIT 1
+    """)
 
     with engine.begin() as conn:
-        conn.execute(query, {
-            'id': forecast_run_id,
-            'election_id': election_id,
-            'model_name': model_name,
-            'model_version': model_version,
-            'run_timestamp': datetime.now(),
-            'data_cutoff_date': date.today(),
-            'status': 'completed',
-            'parameters': json.dumps(parameters)  # Convert to proper JSON string
-        })
+        result = conn.execute(query, {'fingerprint': fingerprint}).fetchone()
 
-    return forecast_run_id
+    return str(result[0]) if result else None
 
 def create_2027_candidates():
     """Create candidate records for 2027 election"""
@@ -101,13 +132,13 @@ def create_2027_candidates():
 
         return candidate_ids
 
-def store_county_forecasts(forecast_run_id, forecasts_df, candidate_ids):
-    """Store county-level forecasts"""
+def store_county_forecasts(conn, forecast_run_id, forecasts_df, candidate_ids):
+    """Store county-level forecasts (on conn, inside the run's transaction)"""
     print("\n📊 Storing county-level forecasts...")
 
     # Get county IDs from database
     county_query = "SELECT id, code FROM counties"
-    counties = pd.read_sql(county_query, engine)
+    counties = pd.read_sql(text(county_query), conn)
     county_id_map = dict(zip(counties['code'].astype(str), counties['id']))
 
     # Prepare forecast records
@@ -143,7 +174,7 @@ def store_county_forecasts(forecast_run_id, forecasts_df, candidate_ids):
     # Insert into database
     if forecast_records:
         forecast_df = pd.DataFrame(forecast_records)
-        forecast_df.to_sql('forecast_county', engine, if_exists='append', index=False)
+        forecast_df.to_sql('forecast_county', conn, if_exists='append', index=False)
         print(f"   ✅ Stored {len(forecast_records)} county forecasts")
     else:
         print("   ⚠️  No forecast records to store")
@@ -178,6 +209,11 @@ def create_2027_election_record():
             return result[0]
 
 def main():
+    parser = argparse.ArgumentParser(description='Store forecasts in the database')
+    parser.add_argument('--force', action='store_true',
+                        help='Store a new run even if one with the same fingerprint exists')
+    args = parser.parse_args()
+
     print("=" * 60)
     print("💾 STORING FORECASTS IN DATABASE")
     print("=" * 60)
@@ -193,6 +229,20 @@ def main():
     print(f"\n📂 Loading forecasts from: {forecasts_file}")
     forecasts_df = pd.read_csv(forecasts_file)
     print(f"   ✅ Loaded {len(forecasts_df)} forecast records")
+    
+    run_metadata = load_run_metadata(forecasts_file)
+    if 'seed' in run_metadata:
+        print(f"   🌱 Seed: {run_metadata['seed']}")
+    else:
+        print("   ⚠️  No run metadata found; seed will not be recorded")
+
+    fingerprint = run_metadata.get('fingerprint')
+    if fingerprint and not args.force:
+        existing_run_id = find_forecast_run_by_fingerprint(fingerprint)
+        if existing_run_id:
+            print(f"\n♻️  Forecast run with fingerprint {fingerprint[:16]} already stored: {existing_run_id}")
+            print("   Nothing to do (use --force to store a new run)")
+            return existing_run_id
 
     # Create 2027 election record
     print("\n🗳️  Creating 2027 election record...")
@@ -201,17 +251,22 @@ def main():
     # Create 2027 candidates
     candidate_ids = create_2027_candidates()
 
-    # Create forecast run
+    # Create the forecast run and store its county forecasts in one
+    # transaction: a failed store leaves no (empty) completed run behind
     print("\n🔮 Creating forecast run record...")
-    forecast_run_id = create_forecast_run(
-        election_year=2027,
-        model_name='SimpleBayesianForecast',
-        model_version='v1.0'
-    )
-    print(f"   ✅ Forecast run ID: {forecast_run_id}")
-
-    # Store county forecasts
-    num_stored = store_county_forecasts(forecast_run_id, forecasts_df, candidate_ids)
+    with engine.begin() as conn:
+        forecast_run_id = create_forecast_run(
+            conn,
+            election_year=2027,
+            model_name='SimpleBayesianForecast',
+            model_version='v1.0',
+            run_metadata=run_metadata
+        )
+        print(f"   ✅ Forecast run ID: {forecast_run_id}")
+
+        # Store county forecasts
+        num_stored = store_county_forecasts(conn, forecast_run_id, forecasts_df, candidate_ids)
+        complete_forecast_run(conn, forecast_run_id)
 
     # Display summary
     print("\n" + "=" * 60)
@@ -6,14 +6,19 @@ This script:
 2. Creates/updates candidate records
 3. Creates a new forecast run
 4. Stores all county-level forecasts
+5. Stores posterior draws, if the run kept any
 """
 
+import argparse
 import psycopg2
 import pandas as pd
 import uuid
 from datetime import datetime
 import json
 
+from run_metadata import load_run_metadata
+from posterior_draws import DRAWS_ENCODING, encode_draws, load_draws
+
 # Database connection
 DB_CONFIG = {
     'dbname': 'kenpolimarket',
@@ -82,7 +87,7 @@ def get_or_create_election(cursor, year, election_type='Presidential'):
 
 
 def create_forecast_run(cursor, election_id, model_name, model_version, parameters):
-    """Create a new forecast run"""
+    """Create a new forecast run in 'running' state (see complete_forecast_run)"""
     
     forecast_run_id = str(uuid.uuid4())
     run_timestamp = datetime.utcnow()
@@ -103,12 +108,36 @@ def create_forecast_run(cursor, election_id, model_name, model_version, paramete
         run_timestamp,
         json.dumps(parameters),
         data_cutoff_date,
-        'completed'
+        'running'
     ))
     
     return forecast_run_id
 
 
+def complete_forecast_run(cursor, forecast_run_id):
+    """Mark a run completed; call in the transaction that stores its last forecasts"""
+    
+    cursor.execute("""
+        UPDATE forecast_runs SET status = 'completed' WHERE id = %s
+    """, (forecast_run_id,))
+
+
+def find_forecast_run_by_fingerprint(cursor, fingerprint):
+    """Return the ID of the latest completed run with this fingerprint, or None"""
+    
+    cursor.execute("""
+        SELECT id FROM forecast_runs
+        WHERE parameters->>'fingerprint' = %s
+          AND status = 'completed'
+        ORDER BY run_timestamp DESC
+        LIMIT 1
+    """, (fingerprint,))
+    
+    result = cursor.fetchone()
+    
+    return result[0] if result else None
+
+
 def get_county_id(cursor, county_code):
     """Get county ID from county code"""
 
@@ -175,9 +204,52 @@ def store_county_forecasts(cursor, forecast_run_id, forecasts_df, candidate_map)
     return stored_count
 
 
+def store_county_draws(cursor, forecast_run_id, forecasts_df, draws, candidate_map):
+    """Store the posterior draws sidecar, one compressed row per county/candidate"""
+    
+    print(f"\n🎲 Storing {draws.shape[1]:,} posterior draws for {len(forecasts_df)} county forecasts...")
+    
+    county_ids = {}
+    stored_count = 0
+    
+    for row, row_draws in zip(forecasts_df.itertuples(index=False), draws):
+        candidate_id = candidate_map.get((row.candidate_name, row.party))
+        if not candidate_id:
+            continue
+        
+        if row.county_code not in county_ids:
+            county_ids[row.county_code] = get_county_id(cursor, row.county_code)
+        
+        cursor.execute("""
+            INSERT INTO forecast_county_draws (
+                forecast_run_id, county_id, candidate_id,
+                n_draws, encoding, draws
+            )
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (
+            forecast_run_id,
+            county_ids[row.county_code],
+            candidate_id,
+            len(row_draws),
+            DRAWS_ENCODING,
+            psycopg2.Binary(encode_draws(row_draws))
+        ))
+        
+        stored_count += 1
+    
+    print(f"   ✅ Stored draws for {stored_count} forecasts")
+    
+    return stored_count
+
+
 def main():
     """Main execution"""
     
+    parser = argparse.ArgumentParser(description='Store multi-candidate forecasts in the database')
+    parser.add_argument('--force', action='store_true',
+                       help='Store a new run even if one with the same fingerprint exists')
+    args = parser.parse_args()
+    
     print("\n" + "=" * 80)
     print("💾 STORING MULTI-CANDIDATE FORECASTS IN DATABASE")
     print("=" * 80)
@@ -188,6 +260,8 @@ def main():
     try:
         forecasts_df = pd.read_csv(forecast_file)
         print(f"\n📂 Loaded {len(forecasts_df)} forecasts from {forecast_file}")
+        run_metadata = load_run_metadata(forecast_file)
+        draws = load_draws(forecast_file)
     except FileNotFoundError:
         print(f"\n❌ Forecast file not found: {forecast_file}")
         print("   Run multi_candidate_forecast.py first to generate forecasts")
@@ -208,6 +282,16 @@ def main():
         conn = psycopg2.connect(**DB_CONFIG)
         cursor = conn.cursor()
         
+        fingerprint = run_metadata.get('fingerprint')
+        if fingerprint and not args.force:
+            existing_run_id = find_forecast_run_by_fingerprint(cursor, fingerprint)
+            if existing_run_id:
+                print(f"\n♻️  Forecast run with fingerprint {fingerprint[:16]} already stored: {existing_run_id}")
+                print("   Nothing to do (use --force to store a new run)")
+                cursor.close()
+                conn.close()
+                return
+        
         print("\n" + "=" * 80)
         print("STEP 1: Create/Update Candidates")
         print("=" * 80)
@@ -240,7 +324,11 @@ def main():
         # Create forecast run
         model_parameters = {
             'model_type': 'Dirichlet Multi-Candidate',
-            'n_samples': 2000,
+            'n_samples': run_metadata.get('n_samples', 2000),
+            'seed': run_metadata.get('seed'),
+            'fingerprint': run_metadata.get('fingerprint'),
+            'sampling_mode': run_metadata.get('sampling_mode', 'per_county'),
+            'stored_draws': int(draws.shape[1]) if draws is not None else 0,
             'n_candidates': len(candidates),
             'candidates': [
                 {'name': name, 'party': party}
@@ -258,8 +346,10 @@ def main():
             model_parameters
         )
         
+        # Not committed yet: the run, its forecasts and the switch to
+        # 'completed' are stored in one transaction, so a failed store
+        # leaves no (empty) completed run behind
         print(f"   ✅ Created forecast run: {forecast_run_id}")
-        conn.commit()
         
         print("\n" + "=" * 80)
         print("STEP 4: Store County Forecasts")
@@ -273,6 +363,10 @@ def main():
             candidate_map
         )
         
+        if draws is not None:
+            store_county_draws(cursor, forecast_run_id, forecasts_df, draws, candidate_map)
+        
+        complete_forecast_run(cursor, forecast_run_id)
         conn.commit()
         
         print("\n" + "=" * 80)
@@ -0,0 +1,133 @@
+"""
+Streaming summaries for chunked Monte Carlo forecasts
+
+Folds sample chunks into running means and per-cell histogram quantile
+sketches so memory stays O(units × candidates) regardless of how many
+samples are drawn.
+"""
+import numpy as np
+from typing import Dict, Sequence
+
+
+class QuantileSketch:
+    """
+    Fixed-bin histogram sketch, one histogram per cell
+
+    Bin ranges are set per cell from a warm-up sample (padded by 10% of the
+    observed spread on each side); later observations outside the range are
+    counted in the edge bins. Quantiles are linearly interpolated within a
+    bin, so the error is bounded by the bin width.
+    """
+
+    def __init__(self, warmup: np.ndarray, bins: int = 256):
+        warmup = np.asarray(warmup, dtype=np.float64)
+        self.shape = warmup.shape[1:]
+        self.bins = bins
+        n_cells = int(np.prod(self.shape))
+
+        flat = warmup.reshape(len(warmup), n_cells)
+        lo, hi = flat.min(axis=0), flat.max(axis=0)
+        pad = 0.1 * (hi - lo)
+        self.lower = lo - pad
+        self.width = np.maximum((hi + pad - self.lower) / bins, 1e-12)
+        self.counts = np.zeros((n_cells, bins), dtype=np.int64)
+        self._offsets = np.arange(n_cells) * bins
+
+        self.update(warmup)
+
+    def update(self, chunk: np.ndarray):
+        """Add a chunk of shape (n, *shape) to the histograms"""
+        flat = np.asarray(chunk, dtype=np.float64).reshape(len(chunk), -1)
+        bin_index = np.floor((flat - self.lower) / self.width).astype(np.int64)
+        np.clip(bin_index, 0, self.bins - 1, out=bin_index)
+        self.counts += np.bincount(
+            (bin_index + self._offsets).ravel(), minlength=self.counts.size
+        ).reshape(self.counts.shape)
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Interpolated q-quantile for every cell"""
+        cdf = np.cumsum(self.counts, axis=1)
+        target = q * cdf[:, -1]
+        cells = np.arange(len(cdf))
+
+        bin_index = np.argmax(cdf >= target[:, None], axis=1)
+        below = np.where(bin_index > 0, cdf[cells, bin_index - 1], 0)
+        in_bin = self.counts[cells, bin_index]
+        fraction = np.where(in_bin > 0, (target - below) / np.maximum(in_bin, 1), 0.5)
+
+        values = self.lower + (bin_index + fraction) * self.width
+        return values.reshape(self.shape)
+
+
+class StreamingSummary:
+    """
+    Running mean and approximate quantiles over chunks of samples
+
+    Chunks have shape (chunk_size, *shape). The first ``warmup`` samples are
+    buffered to size the quantile sketches; if fewer samples than that are
+    ever added, quantiles are exact percentiles of the buffer.
+    """
+
+    def __init__(
+        self,
+        shape: Sequence[int],
+        quantiles: Sequence[float] = (0.05, 0.95),
+        warmup: int = 1000,
+        bins: int = 256
+    ):
+        self.shape = tuple(shape)
+        self.quantiles = tuple(quantiles)
+        self.warmup = warmup
+        self.bins = bins
+        self.count = 0
+        self.mean = np.zeros(self.shape, dtype=np.float64)
+        self.sketch = None
+        self._buffer = []
+
+    def update(self, chunk: np.ndarray):
+        """Fold a chunk of samples into the summary"""
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if chunk.shape[1:] != self.shape:
+            raise ValueError(f"Chunk shape {chunk.shape[1:]} does not match summary shape {self.shape}")
+        if len(chunk) == 0:
+            return
+
+        # Running mean (numerically stable chunk-wise update)
+        new_count = self.count + len(chunk)
+        self.mean += (chunk.mean(axis=0) - self.mean) * (len(chunk) / new_count)
+        self.count = new_count
+
+        if self.sketch is not None:
+            self.sketch.update(chunk)
+            return
+
+        self._buffer.append(chunk)
+        if self.count >= self.warmup:
+            self.sketch = QuantileSketch(np.concatenate(self._buffer, axis=0), bins=self.bins)
+            self._buffer = []
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Estimated q-quantile for every cell"""
+        if self.count == 0:
+            raise ValueError("No samples have been added")
+        if self.sketch is None:
+            return np.percentile(np.concatenate(self._buffer, axis=0), q * 100, axis=0)
+        return self.sketch.quantile(q)
+
+    def result(self) -> Dict[str, np.ndarray]:
+        """Mean plus every tracked quantile, keyed 'mean' and e.g. 'q05'/'q95'"""
+        summary = {'mean': self.mean.copy()}
+        for q in self.quantiles:
+            summary[f"q{round(q * 100):02d}"] = self.quantile(q)
+        return summary
+
+
+def iter_chunk_sizes(n_samples: int, chunk_size: int):
+    """Yield chunk sizes that sum to n_samples"""
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    remaining = n_samples
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        yield size
+        remaining -= size
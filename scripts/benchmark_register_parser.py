@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark the IEBC register parser
+
+Writes a synthetic register file (default 50,000 station lines, with the
+real file's quirks: quoted lines, uneven column gaps, "UASIN   GISHU" /
+"NAIROBI   CITY" county names, centre names run into the station code and
+repeated page headers), then times iter_register against the per-line
+re.split() parser the import scripts used before, and checks both agree
+on every station the old parser could read.
+
+Usage:
+    python scripts/benchmark_register_parser.py --lines 50000 --repeat 3
+"""
+import argparse
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from iebc_register import iter_register
+
+COUNTIES = [
+    ('001', 'MOMBASA'), ('017', 'MACHAKOS'), ('013', 'THARAKA - NITHI'),
+    ('027', 'UASIN   GISHU'), ('028', 'ELGEYO/MARAKWET'), ('042', 'KISUMU'),
+    ('047', 'NAIROBI   CITY'), ('026', 'TRANS   NZOIA'),
+]
+WORDS = ['PRIMARY', 'SCHOOL', 'ST', 'MARYS', 'KAPLELACH', 'SOCIAL', 'HALL', 'NEW', 'TOWN', 'DAY', 'CENTRE']
+
+
+def legacy_parse_line(line):
+    """The per-line parser previously copied across the import scripts (re.split on 2+ spaces)"""
+    line = line.strip().strip('"')
+    if not line or 'County Name' in line or 'REGISTERED VOTERS' in line:
+        return None
+    parts = re.split(r'\s{2,}', line)
+    if len(parts) < 10:
+        return None
+    try:
+        offset = 0
+        if parts[1].strip() in ['UASIN', 'NAIROBI', 'TAITA', 'ELGEYO', 'THARAKA', 'TRANS']:
+            offset = 1
+        combined = ' '.join(parts[7 + offset:])
+        match = re.search(r'(\d{15})', combined)
+        if not match:
+            return None
+        voters_match = re.search(r'(\d+)$', combined[match.end():].strip())
+        if not voters_match:
+            return None
+        return (match.group(1), int(voters_match.group(1)))
+    except (ValueError, IndexError):
+        return None
+
+
+def gap(rng):
+    return ' ' * rng.randint(2, 6)
+
+
+def name(rng, n_words):
+    return ' '.join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def write_synthetic_register(path, n_lines, seed=0):
+    """Synthetic register shaped like data/rov_per_polling_station.csv"""
+    rng = random.Random(seed)
+    header = '"County Code  County Name  Const Code  Const Name  Ward Code  Ward Name  Reg Centre Code  Reg Centre Name  Polling Station Code  Polling Station Name  REGISTERED VOTERS"'
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(5):
+            f.write(f'"INDEPENDENT ELECTORAL AND BOUNDARIES COMMISSION {i}"\n' if i < 4 else header + '\n')
+
+        for i in range(n_lines):
+            if i and i % 1000 == 0:
+                f.write(header + '\n')
+
+            county_code, county_name = rng.choice(COUNTIES)
+            const_code = f"{rng.randint(1, 290):03d}"
+            # Ward/centre/stream digits encode the line number, so station codes are unique
+            ward_code = f"{i // 100000:04d}"
+            center_code = f"{i // 100 % 1000:03d}"
+            ps_code = f"{county_code}{const_code}{ward_code}{center_code}{i % 100:02d}"
+            center_name = name(rng, rng.randint(1, 4))
+            # Centre name sometimes runs straight into the station code
+            center_and_code = f"{center_name}{ps_code}" if rng.random() < 0.05 else f"{center_name}{gap(rng)}{ps_code}"
+
+            f.write(
+                f'"{county_code}{gap(rng)}{county_name}{gap(rng)}{const_code}{gap(rng)}{name(rng, 2)}'
+                f'{gap(rng)}{ward_code}{gap(rng)}{name(rng, rng.randint(1, 2))}{gap(rng)}{center_code}'
+                f'{gap(rng)}{center_and_code}{gap(rng)}{center_name}{gap(rng)}{rng.randint(20, 900)}"\n'
+            )
+
+
+def time_parser(fn, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the IEBC register parser')
+    parser.add_argument('--lines', type=int, default=50000, help='Synthetic station lines')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions (best is reported)')
+    parser.add_argument('--file', default=None, help='Benchmark an existing register file instead')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(args.file) if args.file else Path(tmp) / 'synthetic_register.csv'
+        if not args.file:
+            print(f"📝 Writing synthetic register with {args.lines:,} station lines...")
+            write_synthetic_register(path, args.lines)
+
+        def run_legacy():
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+            return [rec for rec in map(legacy_parse_line, lines[5:]) if rec]
+
+        def run_streaming():
+            stats = {}
+            records = [(rec.ps_code, rec.registered_voters) for rec in iter_register(path, stats=stats)]
+            return records, stats
+
+        legacy_time, legacy = time_parser(run_legacy, args.repeat)
+        new_time, (records, stats) = time_parser(run_streaming, args.repeat)
+
+    n_lines = stats['lines']
+    print()
+    print("=" * 60)
+    print("IEBC REGISTER PARSER BENCHMARK")
+    print("=" * 60)
+    print(f"{'parser':<22} {'seconds':>9} {'lines/s':>12} {'records':>9}")
+    print(f"{'legacy re.split':<22} {legacy_time:>9.3f} {n_lines / legacy_time:>12,.0f} {len(legacy):>9,}")
+    print(f"{'iter_register':<22} {new_time:>9.3f} {n_lines / new_time:>12,.0f} {len(records):>9,}")
+    print(f"\nSpeedup: {legacy_time / new_time:.2f}x")
+    print(f"Rejected lines: {stats['rejected']:,}, partial records: {stats['partial']:,}")
+
+    parsed = dict(records)
+    mismatches = sum(1 for code, voters in legacy if parsed.get(code) != voters)
+    print(f"Stations read by legacy parser: {len(legacy):,}, disagreeing: {mismatches}")
+    if mismatches:
+        print("❌ Parsers disagree")
+        raise SystemExit(1)
+    print("✅ Every station the legacy parser read matches")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,8 @@ Copy polling stations from LOCAL -> PRODUCTION using codes (ward/const/county) f
 - Pulls 2022 polling stations from local DB (voters > 0)
 - Stages into TEMP table on production
 - Single bulk upsert into production.polling_stations
+
+For a full diff-based sync of the hierarchy use scripts/sync_to_production.py.
 """
 import psycopg2
 from psycopg2.extras import execute_values
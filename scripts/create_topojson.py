@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Create one TopoJSON file with county, constituency and ward boundaries.
+
+All three levels share their borders, so they are encoded together: every
+border is stored once as a quantized, delta-encoded arc. The result is
+written compactly (no indentation) next to the GeoJSON files the frontend
+already loads, and the same topology is served at /api/geo/topology.
+
+Usage:
+    python scripts/create_topojson.py [--quantization 100000] [--zoom 9] [--output PATH]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+try:
+    from database import SessionLocal
+    from routers.geo import GEO_LEVELS, boundary_features, zoom_tolerance
+    from topology import build_topology
+except ImportError:
+    print("❌ Error: Could not import database modules")
+    print("   Make sure you're running this from the project root")
+    sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export boundaries as one TopoJSON topology")
+    parser.add_argument('--quantization', type=int, default=100000, help="Integer grid size per axis")
+    parser.add_argument('--zoom', type=int, default=None, help="Simplify the shared arcs for this map zoom (default: full detail)")
+    parser.add_argument(
+        '--output',
+        default=str(Path(__file__).parent.parent / 'frontend' / 'public' / 'kenya-boundaries.topojson'),
+        help="Output file"
+    )
+    args = parser.parse_args()
+
+    print("🗺️  TopoJSON Creator from Database")
+    print("===================================")
+    print("")
+
+    db = SessionLocal()
+    try:
+        layers = {}
+        geojson_bytes = 0
+        for level in GEO_LEVELS:
+            layers[level] = boundary_features(db, level)
+            geojson_bytes += len(json.dumps(
+                {'type': 'FeatureCollection', 'features': layers[level]}, separators=(',', ':')
+            ))
+            print(f"📥 {level}: {len(layers[level])} features")
+    finally:
+        db.close()
+
+    if not any(layers.values()):
+        print("❌ No boundary geometry in the database")
+        sys.exit(1)
+
+    start = time.time()
+    simplify = zoom_tolerance(args.zoom) if args.zoom is not None else 0.0
+    topology = build_topology(layers, quantization=args.quantization, simplify=simplify)
+    elapsed = time.time() - start
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(topology, f, separators=(',', ':'))
+
+    topojson_bytes = output_path.stat().st_size
+    print("")
+    print("📊 File Information:")
+    print("====================")
+    print(f"Arcs: {len(topology['arcs']):,} (built in {elapsed:.1f}s)")
+    print(f"GeoJSON (compact, 3 levels): {geojson_bytes / 1024:.1f} KB")
+    print(f"TopoJSON: {topojson_bytes / 1024:.1f} KB ({topojson_bytes / geojson_bytes:.1%} of GeoJSON)")
+    print(f"   Saved to: {output_path}")
+    print("")
+    print("✅ Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Streaming parser for the IEBC register of voters per polling station
+
+The IEBC publishes the register as a quoted, roughly fixed-width text file
+(data/rov_per_polling_station.csv for 2022, the "Registered Voters Per
+Polling Station" file for 2017). Every importer in scripts/ parses it
+through this module instead of carrying its own split() heuristics.
+
+Lines are read one at a time (the file is never loaded whole) and matched
+against one precompiled pattern per format, anchored on the numeric codes
+rather than on column spacing. That makes the parser immune to the spacing
+quirks in the file:
+
+- multi-word county names split by wide gaps ("UASIN   GISHU",
+  "NAIROBI   CITY") are rejoined with single spaces
+- a registration centre name run into the station code
+  ("BOMU PRIMARY SCHOOL003011005403301") still splits correctly
+- lines whose descriptive columns are garbled but whose station code and
+  voter count are intact are kept, with codes derived from the station code
+
+2022 station codes are 15 digits: county(3) const(3) ward(4) centre(3) stream(2).
+2017 codes are 14 digits with a 2-digit centre and are converted to the
+2022 layout.
+
+Usage:
+    from iebc_register import iter_register
+
+    stats = {}
+    for record in iter_register('data/rov_per_polling_station.csv', stats=stats):
+        print(record.ps_code, record.registered_voters)
+"""
+import re
+from pathlib import Path
+from typing import Dict, Iterator, NamedTuple, Optional, Union
+
+# Title/column header lines at the top of both files
+HEADER_LINES = 5
+
+# Column headers repeated on every page of the converted PDF
+HEADER_MARKERS = ('County Name', 'REGISTERED VOTERS', 'County Code')
+
+MAX_VOTERS = 2147483647  # INTEGER column range
+
+
+class RegisterRecord(NamedTuple):
+    """One polling station row of the register"""
+    county_code: str
+    county_name: str
+    const_code: str
+    const_name: str
+    ward_code: str
+    ward_name: str
+    reg_center_code: str
+    reg_center_name: str
+    ps_code: str
+    ps_name: str
+    registered_voters: int
+    year: int
+
+
+# Full 2022 line:
+# 047  NAIROBI   CITY  275  DAGORETTI NORTH  1371  KILIMANI  001  ST GEORGES  047275137100101  ST GEORGES  708
+# Groups: county code/name, const code/name, ward code/name, centre code/name, station code/name, voters.
+# Names up to the centre contain no digits, so greedy \D* stops right at the next code.
+_LINE_2022 = re.compile(
+    r"(\d{3})\s+(\D*\S)\s+(\d{3})\s+(\D*\S)\s+(\d{4})\s+(\D*\S)\s+(\d{3})\s+"
+    r"(.*?)\s*(?<!\d)(\d{15})(?:\s+(.*\S))?\s+(\d+)$"
+)
+
+# Minimum usable 2022 line: station code, optional name, voters
+_TAIL_2022 = re.compile(r"(?<!\d)(\d{15})(?:\s+(.*\S))?\s+(\d+)$")
+
+# Full 2017 line (county name and constituency code may be run together; no station name,
+# trailing stream number):
+# 001 MOMBASA001 CHANGAMWE 0001 PORT REITZ 001 BOMU PRIMARY SCHOOL 00100100010101 687 01
+_LINE_2017 = re.compile(
+    r"(\d{3})\s*(\D*\S)\s*(\d{3})\s+(\D*\S)\s+(\d{4})\s+(\D*\S)\s+(\d{3})\s+"
+    r"(.*?)\s*(?<!\d)(\d{14})()\s+(\d+)\s+\d+$"
+)
+
+# Minimum usable 2017 line: station code, voters, stream number
+_TAIL_2017 = re.compile(r"(?<!\d)(\d{14})()\s+(\d+)\s+\d+$")
+
+_FORMATS = {
+    2022: (_LINE_2022, _TAIL_2022),
+    2017: (_LINE_2017, _TAIL_2017),
+}
+
+
+def _clean(text: Optional[str]) -> str:
+    """Collapse runs of whitespace ("UASIN   GISHU" -> "UASIN GISHU")"""
+    if not text:
+        return ''
+    return ' '.join(text.split()) if '  ' in text else text
+
+
+def station_code_2022(station_code: str) -> str:
+    """Convert a 14-digit 2017 station code to the 15-digit 2022 layout (3-digit centre)"""
+    if len(station_code) == 15:
+        return station_code
+    return station_code[:10] + station_code[10:12].zfill(3) + station_code[12:14]
+
+
+def parse_line(line: str, year: int = 2022) -> Optional[RegisterRecord]:
+    """
+    Parse one register line
+
+    Returns:
+        RegisterRecord, or None for blank, header and unparseable lines
+    """
+    line = line.strip().strip('"').strip()
+    if not line:
+        return None
+
+    line_re, tail_re = _FORMATS[year]
+
+    match = line_re.match(line)
+    if match:
+        (county_code, county_name, const_code, const_name, ward_code, ward_name,
+         center_code, center_name, ps_code, ps_name, voters) = match.groups()
+        center_name = _clean(center_name)
+        county_name, const_name, ward_name = _clean(county_name), _clean(const_name), _clean(ward_name)
+    else:
+        # Descriptive columns garbled: keep the row if code and voters are intact,
+        # taking the geographic codes from the station code
+        match = tail_re.search(line)
+        if not match:
+            return None
+        ps_code, ps_name, voters = match.groups()
+        county_code, const_code, ward_code, center_code = ps_code[0:3], ps_code[3:6], ps_code[6:10], ps_code[10:13]
+        county_name = const_name = ward_name = center_name = ''
+
+    voters = int(voters)
+    if voters > MAX_VOTERS:
+        return None
+
+    if len(ps_code) != 15:
+        ps_code = station_code_2022(ps_code)
+        center_code = center_code if match.re is line_re else ps_code[10:13]
+
+    return RegisterRecord(
+        county_code, county_name, const_code, const_name, ward_code, ward_name,
+        center_code, center_name, ps_code, _clean(ps_name) or center_name, voters, year
+    )
+
+
+def iter_register(
+    path: Union[str, Path],
+    year: int = 2022,
+    stats: Optional[Dict[str, int]] = None,
+    skip_lines: int = HEADER_LINES
+) -> Iterator[RegisterRecord]:
+    """
+    Stream the records of a register file
+
+    Args:
+        path: Register file
+        year: 2022 or 2017 file format
+        stats: Optional dict, updated in place with 'lines', 'records',
+            'partial' (kept from code and voters only) and 'rejected' counts
+        skip_lines: Header lines to skip
+
+    Yields:
+        RegisterRecord per polling station line, in file order
+    """
+    if year not in _FORMATS:
+        raise ValueError(f"Unsupported register year: {year} (expected one of {sorted(_FORMATS)})")
+
+    if stats is None:
+        stats = {}
+    for key in ('lines', 'records', 'partial', 'rejected'):
+        stats.setdefault(key, 0)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_num, line in enumerate(f, start=1):
+            if line_num <= skip_lines:
+                continue
+            stats['lines'] += 1
+
+            record = parse_line(line, year)
+            if record is None:
+                text = line.strip().strip('"').strip()
+                if text and not any(marker in text for marker in HEADER_MARKERS):
+                    stats['rejected'] += 1
+                continue
+
+            stats['records'] += 1
+            if not record.county_name:
+                stats['partial'] += 1
+            yield record
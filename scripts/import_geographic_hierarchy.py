@@ -2,6 +2,10 @@
 """
 Import geographic hierarchy (constituencies and wards) from polling station CSV
 This must be run before importing polling stations
+
+Runs are recorded in data_ingestion_log. An already-imported file is
+skipped (use --force to re-import); otherwise only new constituencies and
+wards are inserted and only changed ones are updated.
 """
 
 import csv
@@ -11,6 +15,12 @@ import argparse
 import psycopg2
 from psycopg2.extras import execute_batch
 from urllib.parse import urlparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'etl' / 'scripts'))
+from ingestion_log import IngestionRun, diff_rows, file_sha256
+
+SOURCE_NAME = 'IEBC_ROV_2022:hierarchy:import_geographic_hierarchy'
 
 def parse_database_url(database_url):
     """Parse database URL into connection parameters"""
@@ -28,6 +38,7 @@ def main():
     parser = argparse.ArgumentParser(description='Import geographic hierarchy from CSV')
     parser.add_argument('--database-url', required=True, help='Database URL')
     parser.add_argument('--csv-file', required=True, help='Path to CSV file')
+    parser.add_argument('--force', action='store_true', help='Re-import even if this file was already imported')
     
     args = parser.parse_args()
     
@@ -56,87 +67,116 @@ def main():
     county_cache = {row[1]: row[0] for row in cursor.fetchall()}
     print(f"✅ Found {len(county_cache)} counties")
     
-    # Extract unique constituencies and wards from CSV
-    print("📖 Reading CSV...")
-    constituencies = {}  # {code: (name, county_code)}
-    wards = {}  # {code: (name, const_code)}
+    with IngestionRun(conn, SOURCE_NAME, file_sha256(args.csv_file), source_file=args.csv_file) as run:
+        if run.previous and not args.force:
+            run.skip()
+            print(f"♻️  {args.csv_file} already imported at {run.previous[1]} - nothing to do (use --force)")
+            return
+        
+        # Extract unique constituencies and wards from CSV
+        print("📖 Reading CSV...")
+        constituencies = {}  # {code: (name, county_code)}
+        wards = {}  # {code: (name, const_code)}
     
-    with open(args.csv_file, 'r', encoding='utf-8') as f:
-        # Skip header rows
-        for _ in range(5):
-            next(f)
+        with open(args.csv_file, 'r', encoding='utf-8') as f:
+            # Skip header rows
+            for _ in range(5):
+                next(f)
         
-        for line in f:
-            line = line.strip().strip('"')
-            if not line:
-                continue
+            for line in f:
+                line = line.strip().strip('"')
+                if not line:
+                    continue
             
-            parts = [p for p in line.split() if p]
-            if len(parts) < 11:
-                continue
+                parts = [p for p in line.split() if p]
+                if len(parts) < 11:
+                    continue
             
-            try:
-                # Strip leading zeros from codes to match database format
-                county_code = parts[0].lstrip('0') or '0'
-                const_code = parts[2].lstrip('0') or '0'
-                const_name = parts[3]
-                ward_code = parts[4].lstrip('0') or '0'
-                ward_name = parts[5]
-
-                # Store constituency
-                if const_code not in constituencies:
-                    constituencies[const_code] = (const_name, county_code)
-
-                # Store ward
-                if ward_code not in wards:
-                    wards[ward_code] = (ward_name, const_code)
+                try:
+                    # Strip leading zeros from codes to match database format
+                    county_code = parts[0].lstrip('0') or '0'
+                    const_code = parts[2].lstrip('0') or '0'
+                    const_name = parts[3]
+                    ward_code = parts[4].lstrip('0') or '0'
+                    ward_name = parts[5]
+
+                    # Store constituency
+                    if const_code not in constituencies:
+                        constituencies[const_code] = (const_name, county_code)
+
+                    # Store ward
+                    if ward_code not in wards:
+                        wards[ward_code] = (ward_name, const_code)
             
-            except (IndexError, ValueError):
-                continue
+                except (IndexError, ValueError):
+                    continue
     
-    print(f"✅ Found {len(constituencies)} unique constituencies")
-    print(f"✅ Found {len(wards)} unique wards")
-    print()
+        print(f"✅ Found {len(constituencies)} unique constituencies")
+        print(f"✅ Found {len(wards)} unique wards")
+        print()
     
-    # Import constituencies
-    print("📥 Importing constituencies...")
-    const_insert = """
-        INSERT INTO constituencies (code, name, county_id)
-        VALUES (%s, %s, %s)
-    """
-
-    const_data = []
-    for code, (name, county_code) in constituencies.items():
-        county_id = county_cache.get(county_code)
-        if county_id:
-            const_data.append((code, name, county_id))
-
-    if const_data:
-        execute_batch(cursor, const_insert, const_data)
+        # Import constituencies
+        print("📥 Importing constituencies...")
+        const_insert = """
+            INSERT INTO constituencies (code, name, county_id)
+            VALUES (%s, %s, %s)
+        """
+
+        incoming_const = {}
+        for code, (name, county_code) in constituencies.items():
+            county_id = county_cache.get(county_code)
+            if county_id:
+                incoming_const[code] = (name, county_id)
+
+        # Row-level diff: insert new, update changed, leave the rest alone
+        cursor.execute("SELECT code, name, county_id FROM constituencies")
+        existing_const = {row[0]: row[1:] for row in cursor.fetchall()}
+        new_codes, changed_codes, unchanged_const = diff_rows(existing_const, incoming_const.items())
+        const_data = [(code, *incoming_const[code]) for code in new_codes]
+        const_updates = [(*incoming_const[code], code) for code in changed_codes]
+
+        if const_data:
+            execute_batch(cursor, const_insert, const_data)
+        if const_updates:
+            execute_batch(cursor, "UPDATE constituencies SET name = %s, county_id = %s WHERE code = %s", const_updates)
         conn.commit()
-    print(f"✅ Imported {len(const_data)} constituencies")
+        print(f"✅ Imported {len(const_data)} constituencies ({len(const_updates)} updated, {unchanged_const} unchanged)")
     
-    # Load constituency IDs
-    cursor.execute("SELECT id, code FROM constituencies")
-    const_cache = {row[1]: row[0] for row in cursor.fetchall()}
+        # Load constituency IDs
+        cursor.execute("SELECT id, code FROM constituencies")
+        const_cache = {row[1]: row[0] for row in cursor.fetchall()}
     
-    # Import wards
-    print("📥 Importing wards...")
-    ward_insert = """
-        INSERT INTO wards (code, name, constituency_id)
-        VALUES (%s, %s, %s)
-    """
-
-    ward_data = []
-    for code, (name, const_code) in wards.items():
-        const_id = const_cache.get(const_code)
-        if const_id:
-            ward_data.append((code, name, const_id))
-
-    if ward_data:
-        execute_batch(cursor, ward_insert, ward_data)
+        # Import wards
+        print("📥 Importing wards...")
+        ward_insert = """
+            INSERT INTO wards (code, name, constituency_id)
+            VALUES (%s, %s, %s)
+        """
+
+        incoming_wards = {}
+        for code, (name, const_code) in wards.items():
+            const_id = const_cache.get(const_code)
+            if const_id:
+                incoming_wards[code] = (name, const_id)
+
+        cursor.execute("SELECT code, name, constituency_id FROM wards")
+        existing_wards = {row[0]: row[1:] for row in cursor.fetchall()}
+        new_codes, changed_codes, unchanged_wards = diff_rows(existing_wards, incoming_wards.items())
+        ward_data = [(code, *incoming_wards[code]) for code in new_codes]
+        ward_updates = [(*incoming_wards[code], code) for code in changed_codes]
+
+        if ward_data:
+            execute_batch(cursor, ward_insert, ward_data)
+        if ward_updates:
+            execute_batch(cursor, "UPDATE wards SET name = %s, constituency_id = %s WHERE code = %s", ward_updates)
         conn.commit()
-    print(f"✅ Imported {len(ward_data)} wards")
+        print(f"✅ Imported {len(ward_data)} wards ({len(ward_updates)} updated, {unchanged_wards} unchanged)")
+    
+        
+        run.rows_read = len(constituencies) + len(wards)
+        run.rows_inserted = len(const_data) + len(ward_data)
+        run.rows_updated = len(const_updates) + len(ward_updates)
+        run.rows_unchanged = unchanged_const + unchanged_wards
     
     cursor.close()
     conn.close()
@@ -4,16 +4,25 @@ Import historical voter registration data to production database.
 
 This script imports CSV files directly to the Render PostgreSQL database
 for the 2017 and 2022 election years.
+
+Each year's import is recorded in data_ingestion_log. A file that was
+already imported is skipped (use --force to re-import), and only stations
+whose registered voter count is new or changed are written.
 """
 
 import os
 import sys
 import csv
-import re
+import argparse
+from pathlib import Path
 import psycopg2
 from psycopg2.extras import execute_batch
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).parent.parent / 'etl' / 'scripts'))
+from ingestion_log import IngestionRun, diff_rows, file_sha256
+from iebc_register import iter_register
+
 # Production database connection
 # Using IP address to avoid DNS issues: 35.227.164.209 = dpg-d3ginq7fte5s73c6j060-a.oregon-postgres.render.com
 DB_CONFIG = {
@@ -26,146 +35,44 @@ DB_CONFIG = {
     'connect_timeout': 30
 }
 
+def parse_register_csv(filepath, year):
+    """Parse a 2022 or 2017 register file (2017 station codes are converted to the 15-digit format)"""
+    print(f"📖 Reading {year} CSV: {filepath}")
+
+    parse_stats = {}
+    stations = [
+        {
+            'county_code': record.county_code,
+            'county_name': record.county_name,
+            'const_code': record.const_code,
+            'const_name': record.const_name,
+            'ward_code': record.ward_code,
+            'ward_name': record.ward_name,
+            'center_code': record.reg_center_code,
+            'center_name': record.reg_center_name,
+            'station_code': record.ps_code,
+            'station_name': record.ps_name,
+            'registered_voters': record.registered_voters,
+            'year': year
+        }
+        for record in iter_register(filepath, year=year, stats=parse_stats)
+    ]
+
+    print(f"✅ Parsed {len(stations):,} stations from {year} CSV ({parse_stats['rejected']:,} unparseable lines)")
+    return stations
+
+
 def parse_2022_csv(filepath):
     """Parse 2022 CSV format - space-separated fixed-width format"""
-    print(f"📖 Reading 2022 CSV: {filepath}")
-
-    stations = []
-    with open(filepath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-        # Skip header rows (first 5 lines)
-        for line in lines[5:]:
-            line = line.strip()
-            # Remove quotes if present
-            if line.startswith('"') and line.endswith('"'):
-                line = line[1:-1]
-
-            if not line:
-                continue
-
-            try:
-                # Use regex to extract the station code (15 digits) and registered voters (number at end)
-                # Pattern: ... <15-digit-code> <station-name> <registered-voters>
-                match = re.search(r'(\d{15})\s+(.+?)\s+(\d+)\s*$', line)
-                if not match:
-                    continue
-
-                station_code = match.group(1)
-                station_name = match.group(2).strip()
-                registered_voters = int(match.group(3))
-
-                # Extract other fields from the beginning
-                parts = line.split()
-                if len(parts) < 5:
-                    continue
-
-                station = {
-                    'county_code': parts[0],
-                    'county_name': parts[1],
-                    'const_code': parts[2],
-                    'const_name': parts[3],
-                    'ward_code': parts[4],
-                    'ward_name': '',  # Will be filled if needed
-                    'center_code': '',
-                    'center_name': '',
-                    'station_code': station_code,
-                    'station_name': station_name,
-                    'registered_voters': registered_voters,
-                    'year': 2022
-                }
-                stations.append(station)
-            except (ValueError, IndexError) as e:
-                # Skip invalid rows silently
-                continue
-
-    print(f"✅ Parsed {len(stations):,} stations from 2022 CSV")
-    return stations
+    return parse_register_csv(filepath, 2022)
 
 
 def parse_2017_csv(filepath):
     """Parse 2017 CSV format - space-separated fixed-width format"""
-    print(f"📖 Reading 2017 CSV: {filepath}")
-
-    stations = []
-    with open(filepath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-        # Skip header rows (first 5 lines)
-        for line in lines[5:]:
-            line = line.strip()
-            # Remove quotes if present
-            if line.startswith('"') and line.endswith('"'):
-                line = line[1:-1]
-
-            if not line:
-                continue
-
-            try:
-                # Use regex to extract the station code (14 digits) and registered voters
-                # Pattern: ... <14-digit-code> <registered-voters> <stream-number>
-                # Format: 001 MOMBASA001 CHANGAMWE 0001 PORT REITZ 001 BOMU PRIMARY SCHOOL 00100100010101 687 01
-                match = re.search(r'(\d{14})\s+(\d+)\s+\d+\s*$', line)
-                if not match:
-                    continue
-
-                station_code_2017 = match.group(1)
-                registered_voters = int(match.group(2))
-
-                # Convert 2017 14-digit code to 2022 15-digit format
-                # 2017: County(3) + Const(3) + Ward(4) + Center(2) + Station(2) = 14
-                # 2022: County(3) + Const(3) + Ward(4) + Center(3) + Station(2) = 15
-                # We need to pad the center code from 2 to 3 digits
-                county = station_code_2017[0:3]
-                const = station_code_2017[3:6]
-                ward = station_code_2017[6:10]
-                center = station_code_2017[10:12]
-                station_num = station_code_2017[12:14]
-
-                # Pad center to 3 digits
-                center_padded = center.zfill(3)
-                station_code = county + const + ward + center_padded + station_num
-
-                # Extract other fields from the beginning
-                parts = line.split()
-                if len(parts) < 5:
-                    continue
-
-                # Extract polling center name (everything between ward info and station code)
-                # Find the station code position in the line
-                code_pos = line.find(station_code_2017)
-                before_code = line[:code_pos].strip()
-
-                # Parse the beginning parts
-                station = {
-                    'county_code': parts[0],
-                    'county_name': '',  # Will extract from parts
-                    'const_code': '',
-                    'const_name': '',
-                    'ward_code': '',
-                    'ward_name': '',
-                    'center_code': '',
-                    'center_name': before_code.split()[-3:] if len(before_code.split()) >= 3 else '',
-                    'station_code': station_code,  # Use converted 15-digit code
-                    'station_name': '',  # 2017 doesn't have separate station name
-                    'registered_voters': registered_voters,
-                    'year': 2017
-                }
-
-                # Clean up center name
-                if isinstance(station['center_name'], list):
-                    station['center_name'] = ' '.join(station['center_name'])
-
-                stations.append(station)
-            except (ValueError, IndexError) as e:
-                # Skip invalid rows silently
-                continue
-
-    print(f"✅ Parsed {len(stations):,} stations from 2017 CSV")
-    return stations
+    return parse_register_csv(filepath, 2017)
 
 
-def import_to_database(stations, year):
+def import_to_database(stations, year, source_file, force=False):
     """Import stations to voter_registration_history table"""
     
     if not DB_CONFIG['password']:
@@ -175,6 +82,7 @@ def import_to_database(stations, year):
     
     print(f"\n🔌 Connecting to production database...")
     
+    conn = None
     try:
         conn = psycopg2.connect(**DB_CONFIG)
         cur = conn.cursor()
@@ -194,61 +102,82 @@ def import_to_database(stations, year):
             print("   Please apply migration 003_add_voter_registration_history.sql first")
             return False
         
-        print(f"📊 Importing {len(stations):,} stations for year {year}...")
-        
-        # Prepare insert query
-        insert_query = """
-            INSERT INTO voter_registration_history
-                (polling_station_id, election_year, registered_voters, data_source, verified, created_at)
-            SELECT
-                ps.id,
-                %s,
-                %s,
-                %s,
-                TRUE,
-                NOW()
-            FROM polling_stations ps
-            WHERE ps.code = %s
-            ON CONFLICT (polling_station_id, election_year)
-            DO UPDATE SET
-                registered_voters = EXCLUDED.registered_voters,
-                updated_at = NOW()
-        """
+        with IngestionRun(conn, f'IEBC_ROV_{year}:voter_registration_history:import_historical_data', file_sha256(source_file), source_file=source_file) as run:
+            if run.previous and not force:
+                run.skip()
+                print(f"♻️  {source_file} already imported at {run.previous[1]} - nothing to do (use --force)")
+                return True
+            
+            print(f"📊 Importing {len(stations):,} stations for year {year}...")
         
-        # Batch insert
-        batch_data = [
-            (year, station['registered_voters'], f'IEBC {year} CSV Import', station['station_code'])
-            for station in stations
-        ]
-
-        execute_batch(cur, insert_query, batch_data, page_size=1000)
+            # Prepare insert query
+            insert_query = """
+                INSERT INTO voter_registration_history
+                    (polling_station_id, election_year, registered_voters, data_source, verified, created_at)
+                SELECT
+                    ps.id,
+                    %s,
+                    %s,
+                    %s,
+                    TRUE,
+                    NOW()
+                FROM polling_stations ps
+                WHERE ps.code = %s
+                ON CONFLICT (polling_station_id, election_year)
+                DO UPDATE SET
+                    registered_voters = EXCLUDED.registered_voters,
+                    updated_at = NOW()
+            """
         
-        # Get statistics
-        cur.execute("""
-            SELECT COUNT(*) 
-            FROM voter_registration_history 
-            WHERE election_year = %s
-        """, (year,))
+            # Row-level diff against the stored counts; only new/changed stations are sent
+            cur.execute("""
+                SELECT ps.code, vrh.registered_voters
+                FROM voter_registration_history vrh
+                JOIN polling_stations ps ON ps.id = vrh.polling_station_id
+                WHERE vrh.election_year = %s
+            """, (year,))
+            existing = {code: (voters,) for code, voters in cur.fetchall()}
+            incoming = {station['station_code']: (station['registered_voters'],) for station in stations}
+            new_codes, changed_codes, unchanged = diff_rows(existing, incoming.items())
+            print(f"   {len(new_codes):,} new, {len(changed_codes):,} changed, {unchanged:,} unchanged")
+            
+            # Batch insert
+            batch_data = [
+                (year, incoming[code][0], f'IEBC {year} CSV Import', code)
+                for code in new_codes + changed_codes
+            ]
+
+            execute_batch(cur, insert_query, batch_data, page_size=1000)
         
-        total_imported = cur.fetchone()[0]
+            # Get statistics
+            cur.execute("""
+                SELECT COUNT(*) 
+                FROM voter_registration_history 
+                WHERE election_year = %s
+            """, (year,))
         
-        conn.commit()
+            total_imported = cur.fetchone()[0]
+            
+            run.rows_read = len(stations)
+            run.rows_inserted = len(new_codes)
+            run.rows_updated = len(changed_codes)
+            run.rows_unchanged = unchanged
         
-        print(f"✅ Successfully imported {total_imported:,} records for {year}")
+            print(f"✅ Successfully imported {total_imported:,} records for {year}")
         
-        # Show aggregated statistics
-        cur.execute("""
-            SELECT 
-                COUNT(DISTINCT polling_station_id) as stations,
-                SUM(registered_voters) as total_voters
-            FROM voter_registration_history
-            WHERE election_year = %s
-        """, (year,))
+            # Show aggregated statistics
+            cur.execute("""
+                SELECT 
+                    COUNT(DISTINCT polling_station_id) as stations,
+                    SUM(registered_voters) as total_voters
+                FROM voter_registration_history
+                WHERE election_year = %s
+            """, (year,))
         
-        stats = cur.fetchone()
-        print(f"📊 Statistics for {year}:")
-        print(f"   - Polling Stations: {stats[0]:,}")
-        print(f"   - Total Registered Voters: {stats[1]:,}")
+            stats = cur.fetchone()
+            print(f"📊 Statistics for {year}:")
+            print(f"   - Polling Stations: {stats[0]:,}")
+            print(f"   - Total Registered Voters: {stats[1]:,}")
         
         cur.close()
         conn.close()
@@ -261,11 +190,18 @@ def import_to_database(stations, year):
     except Exception as e:
         print(f"❌ Error: {e}")
         return False
+    finally:
+        if conn is not None and not conn.closed:
+            conn.close()
 
 
 def main():
     """Main import function"""
 
+    parser = argparse.ArgumentParser(description='Import historical voter registration data')
+    parser.add_argument('--force', action='store_true', help='Re-import files that were already imported')
+    args = parser.parse_args()
+
     print("=" * 60)
     print("🇰🇪 KenPoliMarket - Historical Data Import")
     print("=" * 60)
@@ -316,11 +252,11 @@ def main():
     print("📤 Step 2: Importing to database...")
     print("-" * 60)
 
-    success_2022 = import_to_database(stations_2022, 2022)
+    success_2022 = import_to_database(stations_2022, 2022, csv_2022, args.force)
     success_2017 = True
 
     if has_2017_data and len(stations_2017) > 0:
-        success_2017 = import_to_database(stations_2017, 2017)
+        success_2017 = import_to_database(stations_2017, 2017, csv_2017, args.force)
 
     print()
     print("=" * 60)
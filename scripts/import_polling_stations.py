@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 """
 Import polling station data from IEBC CSV file
-Usage: python scripts/import_polling_stations.py [--database-url DATABASE_URL] [--csv-file CSV_FILE]
+Usage: python scripts/import_polling_stations.py [--database-url DATABASE_URL] [--csv-file CSV_FILE] [--force]
+
+Each run is recorded in data_ingestion_log. A file that was already imported
+is skipped; otherwise only new stations and stations whose voter count
+changed are written.
 """
 
 import csv
@@ -12,6 +16,13 @@ import psycopg2
 from psycopg2 import sql
 from urllib.parse import urlparse
 from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'etl' / 'scripts'))
+from ingestion_log import IngestionRun, file_sha256
+from iebc_register import iter_register
+
+SOURCE_NAME = 'IEBC_ROV_2022:polling_stations:import_polling_stations'
 
 # Colors for terminal output
 class Colors:
@@ -50,31 +61,6 @@ def clean_text(text):
         return None
     return text.strip().upper()
 
-def parse_csv_row(row):
-    """Parse a row from the CSV file"""
-    # The CSV has inconsistent spacing, so we need to split carefully
-    parts = row.split()
-    
-    if len(parts) < 10:
-        return None
-    
-    try:
-        return {
-            'county_code': parts[0],
-            'county_name': parts[1],
-            'const_code': parts[2],
-            'const_name': parts[3],
-            'ward_code': parts[4],
-            'ward_name': parts[5],
-            'reg_center_code': parts[6],
-            'reg_center_name': ' '.join(parts[7:-2]),  # Everything between center code and station code
-            'polling_station_code': parts[-2],
-            'polling_station_name': ' '.join(parts[7:-1]),  # Similar to center name
-            'registered_voters': int(parts[-1])
-        }
-    except (ValueError, IndexError) as e:
-        return None
-
 def get_or_create_county(cursor, code, name):
     """Get county ID by code, create if doesn't exist"""
     cursor.execute("SELECT id FROM counties WHERE code = %s", (code,))
@@ -140,7 +126,7 @@ def get_or_create_registration_center(cursor, code, name, ward_id, constituency_
     )
     return cursor.fetchone()[0]
 
-def import_polling_stations(database_url, csv_file):
+def import_polling_stations(database_url, csv_file, force=False):
     """Main import function"""
     print_info(f"Starting import from {csv_file}")
     print()
@@ -165,6 +151,7 @@ def import_polling_stations(database_url, csv_file):
         'reg_centers_created': 0,
         'polling_stations_created': 0,
         'polling_stations_updated': 0,
+        'polling_stations_unchanged': 0,
         'errors': []
     }
     
@@ -175,59 +162,29 @@ def import_polling_stations(database_url, csv_file):
     reg_center_cache = {}
     
     try:
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            # Skip header rows
-            for _ in range(5):
-                next(f)
-
-            for line_num, line in enumerate(f, start=6):
-                stats['total_rows'] += 1
-
-                # Parse line - remove quotes and split by whitespace
-                line = line.strip().strip('"')
+        with IngestionRun(conn, SOURCE_NAME, file_sha256(csv_file), source_file=csv_file) as run:
+            if run.previous and not force:
+                run.skip()
+                print_success(f"{csv_file} already imported at {run.previous[1]} - nothing to do (use --force)")
+                return True
 
-                if not line:
-                    stats['skipped_rows'] += 1
-                    continue
+            # Stored voter counts, for the row-level diff
+            cursor.execute("SELECT code, registered_voters_2022 FROM polling_stations")
+            existing_voters = dict(cursor.fetchall())
 
-                # Split by whitespace and filter empty strings
-                parts = [p for p in line.split() if p]
-
-                if len(parts) < 11:  # Minimum fields needed
-                    stats['skipped_rows'] += 1
-                    continue
+            parse_stats = {}
+            for record in iter_register(csv_file, stats=parse_stats):
+                stats['total_rows'] += 1
 
                 try:
-                    # Parse fixed positions based on CSV structure
-                    # Format: County_Code County_Name Const_Code Const_Name Ward_Code Ward_Name RegCenter_Code RegCenter_Name PS_Code PS_Name Voters
-                    county_code = parts[0]
-                    county_name = parts[1]
-                    const_code = parts[2]
-                    const_name = parts[3]
-                    ward_code = parts[4]
-                    ward_name = parts[5]
-                    reg_center_code = parts[6]
-
-                    # Find the polling station code (15 digits)
-                    ps_code_idx = None
-                    for i, part in enumerate(parts):
-                        if len(part) == 15 and part.isdigit():
-                            ps_code_idx = i
-                            break
-
-                    if ps_code_idx is None:
-                        stats['skipped_rows'] += 1
-                        continue
-
-                    polling_station_code = parts[ps_code_idx]
-                    registered_voters = int(parts[-1])
-
-                    # Registration center name is between code and PS code
-                    reg_center_name = ' '.join(parts[7:ps_code_idx])
-
-                    # Polling station name is between PS code and voters
-                    polling_station_name = ' '.join(parts[ps_code_idx+1:-1]) if ps_code_idx+1 < len(parts)-1 else reg_center_name
-                    
+                    county_code, county_name = record.county_code, record.county_name
+                    const_code, const_name = record.const_code, record.const_name
+                    ward_code, ward_name = record.ward_code, record.ward_name
+                    reg_center_code, reg_center_name = record.reg_center_code, record.reg_center_name
+                    polling_station_code = record.ps_code
+                    polling_station_name = record.ps_name
+                    registered_voters = record.registered_voters
+                
                     # Get or create geographic entities
                     if county_code not in county_cache:
                         county_id = get_or_create_county(cursor, county_code, county_name)
@@ -235,7 +192,7 @@ def import_polling_stations(database_url, csv_file):
                         stats['counties_created'] += 1
                     else:
                         county_id = county_cache[county_code]
-                    
+                
                     const_key = f"{county_code}-{const_code}"
                     if const_key not in constituency_cache:
                         constituency_id = get_or_create_constituency(cursor, const_code, const_name, county_id)
@@ -243,7 +200,7 @@ def import_polling_stations(database_url, csv_file):
                         stats['constituencies_created'] += 1
                     else:
                         constituency_id = constituency_cache[const_key]
-                    
+                
                     ward_key = f"{const_code}-{ward_code}"
                     if ward_key not in ward_cache:
                         ward_id = get_or_create_ward(cursor, ward_code, ward_name, constituency_id)
@@ -251,7 +208,7 @@ def import_polling_stations(database_url, csv_file):
                         stats['wards_created'] += 1
                     else:
                         ward_id = ward_cache[ward_key]
-                    
+                
                     reg_center_key = f"{ward_id}-{reg_center_code}"
                     if reg_center_key not in reg_center_cache:
                         reg_center_id = get_or_create_registration_center(
@@ -262,15 +219,13 @@ def import_polling_stations(database_url, csv_file):
                         stats['reg_centers_created'] += 1
                     else:
                         reg_center_id = reg_center_cache[reg_center_key]
-                    
-                    # Insert or update polling station
-                    cursor.execute(
-                        "SELECT id FROM polling_stations WHERE code = %s",
-                        (polling_station_code,)
-                    )
-                    existing = cursor.fetchone()
-                    
-                    if existing:
+                
+                    # Insert or update polling station (unchanged rows are not written)
+                    stored_voters = existing_voters.get(polling_station_code)
+                
+                    if polling_station_code in existing_voters and stored_voters == registered_voters:
+                        stats['polling_stations_unchanged'] += 1
+                    elif polling_station_code in existing_voters:
                         cursor.execute(
                             """UPDATE polling_stations 
                                SET registered_voters_2022 = %s, updated_at = CURRENT_TIMESTAMP
@@ -287,18 +242,29 @@ def import_polling_stations(database_url, csv_file):
                              ward_id, constituency_id, county_id, registered_voters)
                         )
                         stats['polling_stations_created'] += 1
-                    
+                    existing_voters[polling_station_code] = registered_voters
+                
                     # Commit every 1000 rows
                     if stats['total_rows'] % 1000 == 0:
                         conn.commit()
                         print_info(f"Processed {stats['total_rows']} rows...")
-                
+            
                 except Exception as e:
-                    stats['errors'].append(f"Line {line_num}: {str(e)}")
-                    stats['skipped_rows'] += 1
+                    stats['errors'].append(f"Station {record.ps_code}: {str(e)}")
                     if len(stats['errors']) < 10:  # Only store first 10 errors
-                        print_warning(f"Error on line {line_num}: {e}")
-        
+                        print_warning(f"Error on station {record.ps_code}: {e}")
+
+            # Lines the register parser could not read
+            stats['total_rows'] = parse_stats['lines']
+            stats['skipped_rows'] += parse_stats['rejected']
+
+            run.rows_read = stats['total_rows']
+            run.rows_inserted = stats['polling_stations_created']
+            run.rows_updated = stats['polling_stations_updated']
+            run.rows_unchanged = stats['polling_stations_unchanged']
+            run.rows_skipped = stats['skipped_rows']
+            run.rows_failed = len(stats['errors'])
+
         # Final commit
         conn.commit()
         print_success("Import completed successfully!")
@@ -324,6 +290,7 @@ def import_polling_stations(database_url, csv_file):
     print(f"Registration centers created: {stats['reg_centers_created']:,}")
     print(f"Polling stations created:    {stats['polling_stations_created']:,}")
     print(f"Polling stations updated:    {stats['polling_stations_updated']:,}")
+    print(f"Polling stations unchanged:  {stats['polling_stations_unchanged']:,}")
     print(f"Errors encountered:          {len(stats['errors'])}")
     print("=" * 60)
     
@@ -337,6 +304,8 @@ def main():
     parser.add_argument('--csv-file',
                        default='data/rov_per_polling_station.csv',
                        help='Path to CSV file')
+    parser.add_argument('--force', action='store_true',
+                       help='Re-import even if this file was already imported')
     
     args = parser.parse_args()
     
@@ -344,7 +313,7 @@ def main():
         print_error(f"CSV file not found: {args.csv_file}")
         sys.exit(1)
     
-    success = import_polling_stations(args.database_url, args.csv_file)
+    success = import_polling_stations(args.database_url, args.csv_file, args.force)
     sys.exit(0 if success else 1)
 
 if __name__ == '__main__':
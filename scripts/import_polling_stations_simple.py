@@ -2,6 +2,9 @@
 """
 Simple polling station importer - optimized for slow connections
 Imports data in larger batches with better error handling
+
+Runs are recorded in data_ingestion_log: an already-imported file is
+skipped, and only new or changed stations are sent to the server.
 """
 
 import csv
@@ -11,6 +14,12 @@ import argparse
 import psycopg2
 from psycopg2.extras import execute_batch
 from urllib.parse import urlparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'etl' / 'scripts'))
+from ingestion_log import IngestionRun, file_sha256
+
+SOURCE_NAME = 'IEBC_ROV_2022:polling_stations:import_polling_stations_simple'
 
 def parse_database_url(database_url):
     """Parse database URL into connection parameters"""
@@ -28,6 +37,7 @@ def main():
     parser = argparse.ArgumentParser(description='Import IEBC polling station data')
     parser.add_argument('--database-url', required=True, help='Database URL')
     parser.add_argument('--csv-file', required=True, help='Path to CSV file')
+    parser.add_argument('--force', action='store_true', help='Re-import even if this file was already imported')
     
     args = parser.parse_args()
     
@@ -54,7 +64,10 @@ def main():
     stats = {
         'total_rows': 0,
         'skipped_rows': 0,
+        'missing_ids': 0,
         'created_stations': 0,
+        'changed_stations': 0,
+        'unchanged_stations': 0,
         'errors': 0
     }
     
@@ -89,110 +102,135 @@ def main():
     for row in cursor.fetchall():
         ward_cache[row[1]] = row[0]
     
+    # Stored station values, for the row-level diff
+    cursor.execute("SELECT code, county_id, constituency_id, ward_id, registered_voters_2022 FROM polling_stations")
+    existing_stations = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+    
     print(f"✅ Loaded {len(county_cache)} counties, {len(constituency_cache)} constituencies, {len(ward_cache)} wards")
     print()
     
     try:
-        with open(args.csv_file, 'r', encoding='utf-8') as f:
-            # Skip header rows
-            for _ in range(5):
-                next(f)
+        with IngestionRun(conn, SOURCE_NAME, file_sha256(args.csv_file), source_file=args.csv_file) as run:
+            if run.previous and not args.force:
+                run.skip()
+                print(f"♻️  {args.csv_file} already imported at {run.previous[1]} - nothing to do (use --force)")
+                return
             
-            print("📥 Importing polling stations...")
+            with open(args.csv_file, 'r', encoding='utf-8') as f:
+                # Skip header rows
+                for _ in range(5):
+                    next(f)
             
-            for line_num, line in enumerate(f, start=6):
-                stats['total_rows'] += 1
-                
-                # Parse line
-                line = line.strip().strip('"')
-                if not line:
-                    stats['skipped_rows'] += 1
-                    continue
+                print("📥 Importing polling stations...")
+            
+                for line_num, line in enumerate(f, start=6):
+                    stats['total_rows'] += 1
                 
-                # Split by whitespace
-                parts = [p for p in line.split() if p]
+                    # Parse line
+                    line = line.strip().strip('"')
+                    if not line:
+                        stats['skipped_rows'] += 1
+                        continue
                 
-                if len(parts) < 11:
-                    stats['skipped_rows'] += 1
-                    continue
+                    # Split by whitespace
+                    parts = [p for p in line.split() if p]
                 
-                try:
-                    # Find polling station code (15 digits)
-                    ps_code = None
-                    ps_code_idx = None
-                    for i, part in enumerate(parts):
-                        if len(part) == 15 and part.isdigit():
-                            ps_code = part
-                            ps_code_idx = i
-                            break
-                    
-                    if not ps_code:
+                    if len(parts) < 11:
                         stats['skipped_rows'] += 1
                         continue
+                
+                    try:
+                        # Find polling station code (15 digits)
+                        ps_code = None
+                        ps_code_idx = None
+                        for i, part in enumerate(parts):
+                            if len(part) == 15 and part.isdigit():
+                                ps_code = part
+                                ps_code_idx = i
+                                break
+                    
+                        if not ps_code:
+                            stats['skipped_rows'] += 1
+                            continue
                     
-                    # Extract data (strip leading zeros to match database format)
-                    county_code = parts[0].lstrip('0') or '0'
-                    const_code = parts[2].lstrip('0') or '0'
-                    ward_code = parts[4].lstrip('0') or '0'
-                    voters = int(parts[-1])
+                        # Extract data (strip leading zeros to match database format)
+                        county_code = parts[0].lstrip('0') or '0'
+                        const_code = parts[2].lstrip('0') or '0'
+                        ward_code = parts[4].lstrip('0') or '0'
+                        voters = int(parts[-1])
                     
-                    # Get name (everything between PS code and voters)
-                    ps_name = ' '.join(parts[ps_code_idx+1:-1]) if ps_code_idx+1 < len(parts)-1 else ' '.join(parts[7:ps_code_idx])
+                        # Get name (everything between PS code and voters)
+                        ps_name = ' '.join(parts[ps_code_idx+1:-1]) if ps_code_idx+1 < len(parts)-1 else ' '.join(parts[7:ps_code_idx])
                     
-                    # Get IDs from cache
-                    county_id = county_cache.get(county_code)
-                    const_id = constituency_cache.get(const_code)
-                    ward_id = ward_cache.get(ward_code)
+                        # Get IDs from cache
+                        county_id = county_cache.get(county_code)
+                        const_id = constituency_cache.get(const_code)
+                        ward_id = ward_cache.get(ward_code)
 
-                    # Skip if we can't find the geographic entities
-                    if not county_id or not const_id or not ward_id:
-                        stats['skipped_rows'] += 1
-                        if stats['errors'] < 5:
-                            print(f"  ⚠ Line {line_num}: Missing IDs - county:{county_code}={county_id}, const:{const_code}={const_id}, ward:{ward_code}={ward_id}")
-                        continue
+                        # Skip if we can't find the geographic entities
+                        if not county_id or not const_id or not ward_id:
+                            stats['missing_ids'] += 1
+                            if stats['errors'] < 5:
+                                print(f"  ⚠ Line {line_num}: Missing IDs - county:{county_code}={county_id}, const:{const_code}={const_id}, ward:{ward_code}={ward_id}")
+                            continue
 
-                    # Add to batch
-                    batch_data.append((
-                        ps_code,
-                        ps_name,
-                        county_id,
-                        const_id,
-                        ward_id,
-                        voters
-                    ))
+                        # Unchanged stations are not written
+                        if existing_stations.get(ps_code) == (county_id, const_id, ward_id, voters):
+                            stats['unchanged_stations'] += 1
+                            continue
+                        if ps_code in existing_stations:
+                            stats['changed_stations'] += 1
+                        
+                        # Add to batch
+                        batch_data.append((
+                            ps_code,
+                            ps_name,
+                            county_id,
+                            const_id,
+                            ward_id,
+                            voters
+                        ))
                     
-                    # Execute batch when full
-                    if len(batch_data) >= batch_size:
-                        try:
-                            execute_batch(cursor, insert_query, batch_data)
-                            conn.commit()
-                            stats['created_stations'] += len(batch_data)
-                            print(f"  ✓ Imported {stats['created_stations']:,} stations...")
-                        except Exception as batch_error:
-                            conn.rollback()
-                            print(f"  ❌ Batch error: {batch_error}")
-                            print(f"  First item in batch: {batch_data[0] if batch_data else 'empty'}")
-                            stats['errors'] += len(batch_data)
-                        batch_data = []
+                        # Execute batch when full
+                        if len(batch_data) >= batch_size:
+                            try:
+                                execute_batch(cursor, insert_query, batch_data)
+                                conn.commit()
+                                stats['created_stations'] += len(batch_data)
+                                print(f"  ✓ Imported {stats['created_stations']:,} stations...")
+                            except Exception as batch_error:
+                                conn.rollback()
+                                print(f"  ❌ Batch error: {batch_error}")
+                                print(f"  First item in batch: {batch_data[0] if batch_data else 'empty'}")
+                                stats['errors'] += len(batch_data)
+                            batch_data = []
 
-                except Exception as e:
-                    stats['errors'] += 1
-                    if stats['errors'] < 10:
-                        print(f"  ⚠ Error on line {line_num}: {e}")
+                    except Exception as e:
+                        stats['errors'] += 1
+                        if stats['errors'] < 10:
+                            print(f"  ⚠ Error on line {line_num}: {e}")
+            
+                # Insert remaining batch
+                if batch_data:
+                    try:
+                        execute_batch(cursor, insert_query, batch_data)
+                        conn.commit()
+                        stats['created_stations'] += len(batch_data)
+                    except Exception as batch_error:
+                        conn.rollback()
+                        print(f"  ❌ Final batch error: {batch_error}")
+                        stats['errors'] += len(batch_data)
             
-            # Insert remaining batch
-            if batch_data:
-                try:
-                    execute_batch(cursor, insert_query, batch_data)
-                    conn.commit()
-                    stats['created_stations'] += len(batch_data)
-                except Exception as batch_error:
-                    conn.rollback()
-                    print(f"  ❌ Final batch error: {batch_error}")
-                    stats['errors'] += len(batch_data)
+                print()
+                print("✅ Import completed!")
             
-            print()
-            print("✅ Import completed!")
+            run.rows_read = stats['total_rows']
+            run.rows_updated = stats['changed_stations']
+            run.rows_inserted = stats['created_stations'] - stats['changed_stations']
+            run.rows_unchanged = stats['unchanged_stations']
+            run.rows_skipped = stats['skipped_rows']
+            # Stations whose ward/constituency/county is missing can load once it is
+            run.rows_failed = stats['missing_ids'] + stats['errors']
             
     except Exception as e:
         conn.rollback()
@@ -209,7 +247,9 @@ def main():
     print("=" * 60)
     print(f"Total rows processed:     {stats['total_rows']:,}")
     print(f"Polling stations created: {stats['created_stations']:,}")
+    print(f"Unchanged (not written):  {stats['unchanged_stations']:,}")
     print(f"Rows skipped:             {stats['skipped_rows']:,}")
+    print(f"Missing IDs:              {stats['missing_ids']:,}")
     print(f"Errors:                   {stats['errors']}")
     print("=" * 60)
     
@@ -2,12 +2,22 @@
 """
 Import polling stations to production database
 Handles the production schema which includes constituency_id and county_id
+
+Runs are recorded in data_ingestion_log: an already-imported file is
+skipped (use --force to re-import), and unchanged stations are not written.
 """
 
+import argparse
 import psycopg2
 from psycopg2 import sql
-import re
 import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'etl' / 'scripts'))
+from ingestion_log import IngestionRun, file_sha256
+from iebc_register import iter_register
+
+SOURCE_NAME = 'IEBC_ROV_2022:polling_stations:import_polling_stations_to_production'
 
 # Production database connection
 PROD_DB_CONFIG = {
@@ -20,78 +30,11 @@ PROD_DB_CONFIG = {
     'connect_timeout': 30
 }
 
-def parse_iebc_line(line):
-    """Parse a line from the IEBC CSV file."""
-    line = line.strip().strip('"')
-    
-    if not line or 'County Name' in line or 'REGISTERED VOTERS' in line:
-        return None
-    
-    parts = re.split(r'\s{2,}', line)
-    
-    if len(parts) < 10:
-        return None
-    
-    try:
-        county_code = parts[0].strip()
-        county_name = parts[1].strip()
-        offset = 0
-        
-        # Check if county name is split
-        if county_name in ['UASIN', 'NAIROBI', 'TAITA', 'ELGEYO', 'THARAKA', 'TRANS']:
-            county_name = f"{county_name} {parts[2].strip()}"
-            offset = 1
-        
-        const_code = parts[2 + offset].strip()
-        const_name = parts[3 + offset].strip()
-        ward_code = parts[4 + offset].strip()
-        ward_name = parts[5 + offset].strip()
-        reg_center_code = parts[6 + offset].strip()
-        
-        # Find the 15-digit polling station code
-        combined = ' '.join(parts[7 + offset:])
-        match = re.search(r'(\d{15})', combined)
-        
-        if not match:
-            return None
-        
-        ps_code = match.group(1)
-        prefix = combined[:match.start()].strip()
-        suffix = combined[match.end():].strip()
-        
-        # Extract registration center name and polling station name
-        reg_center_name = prefix if prefix else parts[7 + offset].strip()
-        
-        # Get voters from the last part
-        voters_match = re.search(r'(\d+)$', suffix)
-        if voters_match:
-            voters = int(voters_match.group(1))
-            ps_name = suffix[:voters_match.start()].strip()
-        else:
-            return None
-        
-        # Validate voters is reasonable
-        if voters > 2147483647 or voters < 0:
-            return None
-        
-        return {
-            'county_code': county_code,
-            'county_name': county_name,
-            'const_code': const_code,
-            'const_name': const_name,
-            'ward_code': ward_code,
-            'ward_name': ward_name,
-            'reg_center_code': reg_center_code,
-            'reg_center_name': reg_center_name,
-            'ps_code': ps_code,
-            'ps_name': ps_name if ps_name else reg_center_name,
-            'voters': voters
-        }
-    except (ValueError, IndexError) as e:
-        return None
-
-
 def main():
+    parser = argparse.ArgumentParser(description='Import polling stations to production')
+    parser.add_argument('--force', action='store_true', help='Re-import even if this file was already imported')
+    args = parser.parse_args()
+    
     print("🚀 Starting polling stations import to PRODUCTION...")
     print("=" * 70)
     
@@ -143,53 +86,92 @@ def main():
             ward_map[ward_only] = id
     print(f"   Wards: {len(ward_map)}")
     
+    # Stored station values, for the row-level diff
+    cur.execute("SELECT code, ward_id, constituency_id, county_id, registered_voters_2022 FROM polling_stations")
+    existing_stations = {row[0]: tuple(row[1:]) for row in cur.fetchall()}
+    
     # Parse CSV and import
     print("\n📥 Parsing IEBC data and importing...")
     
     csv_file = 'data/rov_per_polling_station.csv'
     
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    total_lines = 0
-    imported = 0
-    updated = 0
-    skipped = 0
-    errors = []
-    
-    batch = []
-    batch_size = 1000
-    
-    for line in lines[5:]:  # Skip header
-        total_lines += 1
+    with IngestionRun(conn, SOURCE_NAME, file_sha256(csv_file), source_file=csv_file) as run:
+        if run.previous and not args.force:
+            run.skip()
+            print(f"\n♻️  {csv_file} already imported at {run.previous[1]} - nothing to do (use --force)")
+            return
         
-        data = parse_iebc_line(line)
-        if not data:
-            skipped += 1
-            continue
+        parse_stats = {}
+        total_lines = 0
+        imported = 0
+        updated = 0
+        unchanged = 0
+        skipped = 0
+        failed = 0
+        errors = []
+    
+        batch = []
+        batch_size = 1000
+    
+        for record in iter_register(csv_file, stats=parse_stats):
+            total_lines += 1
         
-        # Get IDs
-        county_id = county_map.get(data['county_code'])
-        const_id = const_map.get(data['const_code'])
-        ward_id = ward_map.get(data['ward_code'])
+            # Get IDs
+            county_id = county_map.get(record.county_code)
+            const_id = const_map.get(record.const_code)
+            ward_id = ward_map.get(record.ward_code)
         
-        if not all([county_id, const_id, ward_id]):
-            skipped += 1
-            if len(errors) < 10:
-                errors.append(f"Missing IDs for {data['ps_code']}: county={county_id}, const={const_id}, ward={ward_id}")
-            continue
+            if not all([county_id, const_id, ward_id]):
+                failed += 1
+                if len(errors) < 10:
+                    errors.append(f"Missing IDs for {record.ps_code}: county={county_id}, const={const_id}, ward={ward_id}")
+                continue
         
-        batch.append({
-            'code': data['ps_code'],
-            'name': data['ps_name'],
-            'ward_id': ward_id,
-            'constituency_id': const_id,
-            'county_id': county_id,
-            'voters': data['voters']
-        })
+            if existing_stations.get(record.ps_code) == (ward_id, const_id, county_id, record.registered_voters):
+                unchanged += 1
+                continue
+            
+            batch.append({
+                'code': record.ps_code,
+                'name': record.ps_name,
+                'ward_id': ward_id,
+                'constituency_id': const_id,
+                'county_id': county_id,
+                'voters': record.registered_voters
+            })
         
-        # Process batch
-        if len(batch) >= batch_size:
+            # Process batch
+            if len(batch) >= batch_size:
+                for item in batch:
+                    try:
+                        cur.execute("""
+                            INSERT INTO polling_stations 
+                            (code, name, ward_id, constituency_id, county_id, registered_voters_2022)
+                            VALUES (%s, %s, %s, %s, %s, %s)
+                            ON CONFLICT (code) DO UPDATE SET
+                                registered_voters_2022 = EXCLUDED.registered_voters_2022,
+                                ward_id = EXCLUDED.ward_id,
+                                constituency_id = EXCLUDED.constituency_id,
+                                county_id = EXCLUDED.county_id,
+                                updated_at = CURRENT_TIMESTAMP
+                        """, (item['code'], item['name'], item['ward_id'], 
+                              item['constituency_id'], item['county_id'], item['voters']))
+                    
+                        if cur.rowcount == 1:
+                            imported += 1
+                        else:
+                            updated += 1
+                    except Exception as e:
+                        failed += 1
+                        if len(errors) < 10:
+                            errors.append(f"Error inserting {item['code']}: {str(e)}")
+            
+                conn.commit()
+                print(f"   Processed {total_lines:,} lines... (imported: {imported:,}, updated: {updated:,}, failed: {failed:,})")
+                batch = []
+    
+        # Process remaining batch
+        if batch:
             for item in batch:
                 try:
                     cur.execute("""
@@ -204,47 +186,27 @@ def main():
                             updated_at = CURRENT_TIMESTAMP
                     """, (item['code'], item['name'], item['ward_id'], 
                           item['constituency_id'], item['county_id'], item['voters']))
-                    
+                
                     if cur.rowcount == 1:
                         imported += 1
                     else:
                         updated += 1
                 except Exception as e:
-                    skipped += 1
+                    failed += 1
                     if len(errors) < 10:
                         errors.append(f"Error inserting {item['code']}: {str(e)}")
-            
+        
             conn.commit()
-            print(f"   Processed {total_lines:,} lines... (imported: {imported:,}, updated: {updated:,}, skipped: {skipped:,})")
-            batch = []
     
-    # Process remaining batch
-    if batch:
-        for item in batch:
-            try:
-                cur.execute("""
-                    INSERT INTO polling_stations 
-                    (code, name, ward_id, constituency_id, county_id, registered_voters_2022)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (code) DO UPDATE SET
-                        registered_voters_2022 = EXCLUDED.registered_voters_2022,
-                        ward_id = EXCLUDED.ward_id,
-                        constituency_id = EXCLUDED.constituency_id,
-                        county_id = EXCLUDED.county_id,
-                        updated_at = CURRENT_TIMESTAMP
-                """, (item['code'], item['name'], item['ward_id'], 
-                      item['constituency_id'], item['county_id'], item['voters']))
-                
-                if cur.rowcount == 1:
-                    imported += 1
-                else:
-                    updated += 1
-            except Exception as e:
-                skipped += 1
-                if len(errors) < 10:
-                    errors.append(f"Error inserting {item['code']}: {str(e)}")
         
-        conn.commit()
+        total_lines = parse_stats['lines']
+        skipped += parse_stats['rejected']
+        run.rows_read = total_lines
+        run.rows_inserted = imported
+        run.rows_updated = updated
+        run.rows_unchanged = unchanged
+        run.rows_skipped = skipped
+        run.rows_failed = failed
     
     # Get final count
     cur.execute("SELECT COUNT(*) FROM polling_stations")
@@ -256,7 +218,9 @@ def main():
     print(f"\nTotal lines processed: {total_lines:,}")
     print(f"Polling stations imported: {imported:,}")
     print(f"Polling stations updated: {updated:,}")
+    print(f"Polling stations unchanged: {unchanged:,}")
     print(f"Lines skipped: {skipped:,}")
+    print(f"Stations failed: {failed:,}")
     print(f"\nBefore: {initial_count:,} polling stations")
     print(f"After:  {final_count:,} polling stations")
     print(f"Change: +{final_count - initial_count:,}")
@@ -266,6 +230,8 @@ def main():
         for error in errors:
             print(f"   {error}")
     
+    print(f"Ingestion log: {run.summary()}")
+    
     cur.close()
     conn.close()
     
@@ -2,12 +2,23 @@
 """
 Import constituencies and wards to Render production database.
 This script uses the enhanced parser to import all 290 constituencies.
+
+Runs are recorded in data_ingestion_log. An already-imported file is
+skipped; otherwise constituencies and wards are diffed against production
+and only new or changed rows are written (--full-reload restores the old
+clear-and-reinsert behaviour).
 """
 
 import sys
-import re
+import argparse
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent / 'etl' / 'scripts'))
+from ingestion_log import IngestionRun, diff_rows, file_sha256
+from iebc_register import iter_register
+
+SOURCE_NAME = 'IEBC_ROV_2022:hierarchy:import_to_production'
+
 # Production database credentials
 # Using IP address to avoid DNS issues: 35.227.164.209 = dpg-d3ginq7fte5s73c6j060-a.oregon-postgres.render.com
 PROD_DB_CONFIG = {
@@ -29,46 +40,7 @@ except ImportError:
     sys.exit(1)
 
 
-def parse_iebc_line(line):
-    """Parse a line from the IEBC CSV file with enhanced offset detection."""
-    line = line.strip().strip('"')
-    
-    if not line or 'County Name' in line or 'REGISTERED VOTERS' in line:
-        return None
-    
-    parts = re.split(r'\s{2,}', line)
-    
-    if len(parts) < 10:
-        return None
-    
-    try:
-        county_code = parts[0].strip()
-        county_name = parts[1].strip()
-        offset = 0
-        
-        # Check if county name is split (e.g., "UASIN" in one column, "GISHU" in next)
-        if county_name in ['UASIN', 'NAIROBI', 'TAITA', 'ELGEYO', 'THARAKA', 'TRANS']:
-            county_name = f"{county_name} {parts[2].strip()}"
-            offset = 1
-        
-        const_code = parts[2 + offset].strip()
-        const_name = parts[3 + offset].strip()
-        ward_code = parts[4 + offset].strip()
-        ward_name = parts[5 + offset].strip()
-        
-        return {
-            'county_code': county_code,
-            'county_name': county_name,
-            'const_code': const_code,
-            'const_name': const_name,
-            'ward_code': ward_code,
-            'ward_name': ward_name,
-        }
-    except (ValueError, IndexError) as e:
-        return None
-
-
-def import_to_production(csv_path: str):
+def import_to_production(csv_path: str, force: bool = False, full_reload: bool = False):
     """Import data to production database."""
     
     print("🗳️  IEBC Data Importer - PRODUCTION")
@@ -89,161 +61,189 @@ def import_to_production(csv_path: str):
         sys.exit(1)
     
     try:
-        # Read and parse the file
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        print(f"📄 Total lines in file: {len(lines)}")
-        
-        # Parse all lines
-        parsed_data = []
-        for line in lines[5:]:  # Skip header lines
-            data = parse_iebc_line(line)
-            if data:
-                parsed_data.append(data)
+        with IngestionRun(conn, SOURCE_NAME, file_sha256(csv_path), source_file=csv_path) as run:
+            if run.previous and not force and not full_reload:
+                run.skip()
+                print(f"♻️  {csv_path} already imported at {run.previous[1]} - nothing to do (use --force)")
+                return
+            
+            # Stream and parse the file (rows without names are no use for the hierarchy)
+            parse_stats = {}
+            parsed_data = [record for record in iter_register(csv_path, stats=parse_stats) if record.county_name]
         
-        print(f"✅ Parsed {len(parsed_data)} data rows")
-        print()
+            print(f"📄 Total lines in file: {parse_stats['lines']}")
+            print(f"✅ Parsed {len(parsed_data)} data rows")
+            print()
         
-        # Get unique constituencies and wards
-        constituencies = {}
-        wards = {}
+            # Get unique constituencies and wards
+            constituencies = {}
+            wards = {}
         
-        for row in parsed_data:
-            # Skip special constituencies
-            if row['county_name'] in ['DIASPORA', 'PRISONS']:
-                continue
+            for row in parsed_data:
+                # Skip special constituencies
+                if row.county_name in ['DIASPORA', 'PRISONS']:
+                    continue
             
-            const_key = row['const_code']
-            if const_key not in constituencies:
-                constituencies[const_key] = {
-                    'code': row['const_code'],
-                    'name': row['const_name'],
-                    'county_name': row['county_name'],
-                }
+                const_key = row.const_code
+                if const_key not in constituencies:
+                    constituencies[const_key] = {
+                        'code': row.const_code,
+                        'name': row.const_name,
+                        'county_name': row.county_name,
+                    }
             
-            ward_key = f"{row['const_code']}-{row['ward_code']}"
-            if ward_key not in wards:
-                wards[ward_key] = {
-                    'code': f"{row['const_code']}-{row['ward_code']}"[:20],
-                    'name': row['ward_name'],
-                    'const_code': row['const_code'],
-                }
+                ward_key = f"{row.const_code}-{row.ward_code}"
+                if ward_key not in wards:
+                    wards[ward_key] = {
+                        'code': f"{row.const_code}-{row.ward_code}"[:20],
+                        'name': row.ward_name,
+                        'const_code': row.const_code,
+                    }
         
-        print(f"📊 Unique records found:")
-        print(f"   Constituencies: {len(constituencies)}")
-        print(f"   Wards: {len(wards)}")
-        print()
+            print(f"📊 Unique records found:")
+            print(f"   Constituencies: {len(constituencies)}")
+            print(f"   Wards: {len(wards)}")
+            print()
         
-        # Get county mapping
-        print("📍 Fetching counties from production database...")
-        cur.execute("SELECT id, code, name FROM counties")
-        counties_db = cur.fetchall()
+            # Get county mapping
+            print("📍 Fetching counties from production database...")
+            cur.execute("SELECT id, code, name FROM counties")
+            counties_db = cur.fetchall()
         
-        county_map = {}
-        special_mappings = {
-            'THARAKA - NITHI': 'Tharaka Nithi',
-            'THARAKA-NITHI': 'Tharaka Nithi',
-            'THARAKA NITHI': 'Tharaka Nithi',
-            'NAIROBI CITY': 'Nairobi',
-            'UASIN GISHU': 'Uasin Gishu',
-            'ELGEYO/MARAKWET': 'Elgeyo Marakwet',
-            'ELGEYO-MARAKWET': 'Elgeyo Marakwet',
-            'ELGEYO MARAKWET': 'Elgeyo Marakwet',
-            'TAITA TAVETA': 'Taita Taveta',
-            'TAITA-TAVETA': 'Taita Taveta',
-            'TRANS NZOIA': 'Trans Nzoia',
-            'TRANS-NZOIA': 'Trans Nzoia',
-        }
+            county_map = {}
+            special_mappings = {
+                'THARAKA - NITHI': 'Tharaka Nithi',
+                'THARAKA-NITHI': 'Tharaka Nithi',
+                'THARAKA NITHI': 'Tharaka Nithi',
+                'NAIROBI CITY': 'Nairobi',
+                'UASIN GISHU': 'Uasin Gishu',
+                'ELGEYO/MARAKWET': 'Elgeyo Marakwet',
+                'ELGEYO-MARAKWET': 'Elgeyo Marakwet',
+                'ELGEYO MARAKWET': 'Elgeyo Marakwet',
+                'TAITA TAVETA': 'Taita Taveta',
+                'TAITA-TAVETA': 'Taita Taveta',
+                'TRANS NZOIA': 'Trans Nzoia',
+                'TRANS-NZOIA': 'Trans Nzoia',
+            }
         
-        for county_id, code, name in counties_db:
-            county_map[code] = county_id
-            county_map[name.upper()] = county_id
-            county_map[name.upper().replace(' ', '')] = county_id
-            county_map[name.upper().replace('-', ' ')] = county_id
-            county_map[name.upper().replace('/', '')] = county_id
-            county_map[name.upper().replace(' ', '-')] = county_id
+            for county_id, code, name in counties_db:
+                county_map[code] = county_id
+                county_map[name.upper()] = county_id
+                county_map[name.upper().replace(' ', '')] = county_id
+                county_map[name.upper().replace('-', ' ')] = county_id
+                county_map[name.upper().replace('/', '')] = county_id
+                county_map[name.upper().replace(' ', '-')] = county_id
             
-            for iebc_name, db_name in special_mappings.items():
-                if name == db_name:
-                    county_map[iebc_name] = county_id
+                for iebc_name, db_name in special_mappings.items():
+                    if name == db_name:
+                        county_map[iebc_name] = county_id
         
-        print(f"✅ Found {len(counties_db)} counties in database")
-        print()
+            print(f"✅ Found {len(counties_db)} counties in database")
+            print()
         
-        # Clear existing constituencies and wards
-        print("🗑️  Clearing existing constituencies and wards...")
-        cur.execute("DELETE FROM wards")
-        wards_deleted = cur.rowcount
-        cur.execute("DELETE FROM constituencies")
-        const_deleted = cur.rowcount
-        conn.commit()
-        print(f"✅ Deleted {const_deleted} constituencies, {wards_deleted} wards")
-        print()
+            # Clear existing constituencies and wards
+            if full_reload:
+                print("🗑️  Clearing existing constituencies and wards...")
+                cur.execute("DELETE FROM wards")
+                wards_deleted = cur.rowcount
+                cur.execute("DELETE FROM constituencies")
+                const_deleted = cur.rowcount
+                conn.commit()
+                print(f"✅ Deleted {const_deleted} constituencies, {wards_deleted} wards")
+                print()
         
-        # Import constituencies
-        print("📥 Importing constituencies...")
-        imported_const = 0
-        skipped_const = 0
+            # Import constituencies
+            print("📥 Importing constituencies...")
+            imported_const = 0
+            skipped_const = 0
         
-        for const_data in constituencies.values():
-            county_id = county_map.get(const_data['county_name'].upper())
+            incoming_const = {}
+            for const_data in constituencies.values():
+                county_id = county_map.get(const_data['county_name'].upper())
+            
+                if not county_id:
+                    print(f"⚠️  Skipping constituency {const_data['name']} - county not found: {const_data['county_name']}")
+                    skipped_const += 1
+                    continue
+                incoming_const[const_data['code']] = (const_data['name'], county_id)
             
-            if not county_id:
-                print(f"⚠️  Skipping constituency {const_data['name']} - county not found: {const_data['county_name']}")
-                skipped_const += 1
-                continue
+            # Row-level diff: only new or changed constituencies are written
+            cur.execute("SELECT code, name, county_id FROM constituencies")
+            existing_const = {code: (name, county_id) for code, name, county_id in cur.fetchall()}
+            new_codes, changed_codes, unchanged_const = diff_rows(existing_const, incoming_const.items())
+            new_const, changed_const = len(new_codes), len(changed_codes)
+            print(f"   {new_const} new, {changed_const} changed, {unchanged_const} unchanged")
             
-            cur.execute("""
-                INSERT INTO constituencies (code, name, county_id, created_at, updated_at)
-                VALUES (%s, %s, %s, NOW(), NOW())
-                ON CONFLICT (code) DO UPDATE SET
-                    name = EXCLUDED.name,
-                    county_id = EXCLUDED.county_id,
-                    updated_at = NOW()
-            """, (const_data['code'], const_data['name'], county_id))
+            for code in new_codes + changed_codes:
+                name, county_id = incoming_const[code]
+                cur.execute("""
+                    INSERT INTO constituencies (code, name, county_id, created_at, updated_at)
+                    VALUES (%s, %s, %s, NOW(), NOW())
+                    ON CONFLICT (code) DO UPDATE SET
+                        name = EXCLUDED.name,
+                        county_id = EXCLUDED.county_id,
+                        updated_at = NOW()
+                """, (code, name, county_id))
             
-            imported_const += 1
+                imported_const += 1
         
-        conn.commit()
-        print(f"✅ Imported {imported_const} constituencies")
-        if skipped_const > 0:
-            print(f"⚠️  Skipped {skipped_const} constituencies (county not found)")
-        print()
+            conn.commit()
+            print(f"✅ Imported {imported_const} constituencies")
+            if skipped_const > 0:
+                print(f"⚠️  Skipped {skipped_const} constituencies (county not found)")
+            print()
         
-        # Get constituency mapping
-        cur.execute("SELECT id, code FROM constituencies")
-        const_db = cur.fetchall()
-        const_map = {code: id for id, code in const_db}
+            # Get constituency mapping
+            cur.execute("SELECT id, code FROM constituencies")
+            const_db = cur.fetchall()
+            const_map = {code: id for id, code in const_db}
         
-        # Import wards
-        print("📥 Importing wards...")
-        imported_wards = 0
-        skipped_wards = 0
+            # Import wards
+            print("📥 Importing wards...")
+            imported_wards = 0
+            skipped_wards = 0
         
-        for ward_data in wards.values():
-            const_id = const_map.get(ward_data['const_code'])
+            incoming_wards = {}
+            for ward_data in wards.values():
+                const_id = const_map.get(ward_data['const_code'])
+            
+                if not const_id:
+                    skipped_wards += 1
+                    continue
+                incoming_wards[ward_data['code']] = (ward_data['name'], const_id)
             
-            if not const_id:
-                skipped_wards += 1
-                continue
+            cur.execute("SELECT code, name, constituency_id FROM wards")
+            existing_wards = {code: (name, const_id) for code, name, const_id in cur.fetchall()}
+            new_codes, changed_codes, unchanged_wards = diff_rows(existing_wards, incoming_wards.items())
+            new_wards, changed_wards = len(new_codes), len(changed_codes)
+            print(f"   {new_wards} new, {changed_wards} changed, {unchanged_wards} unchanged")
             
-            cur.execute("""
-                INSERT INTO wards (code, name, constituency_id, created_at, updated_at)
-                VALUES (%s, %s, %s, NOW(), NOW())
-                ON CONFLICT (code) DO UPDATE SET
-                    name = EXCLUDED.name,
-                    constituency_id = EXCLUDED.constituency_id,
-                    updated_at = NOW()
-            """, (ward_data['code'], ward_data['name'], const_id))
+            for code in new_codes + changed_codes:
+                name, const_id = incoming_wards[code]
+                cur.execute("""
+                    INSERT INTO wards (code, name, constituency_id, created_at, updated_at)
+                    VALUES (%s, %s, %s, NOW(), NOW())
+                    ON CONFLICT (code) DO UPDATE SET
+                        name = EXCLUDED.name,
+                        constituency_id = EXCLUDED.constituency_id,
+                        updated_at = NOW()
+                """, (code, name, const_id))
             
-            imported_wards += 1
+                imported_wards += 1
         
-        conn.commit()
-        print(f"✅ Imported {imported_wards} wards")
-        if skipped_wards > 0:
-            print(f"⚠️  Skipped {skipped_wards} wards (constituency not found)")
-        print()
+            conn.commit()
+            print(f"✅ Imported {imported_wards} wards")
+            if skipped_wards > 0:
+                print(f"⚠️  Skipped {skipped_wards} wards (constituency not found)")
+            print()
+        
+            
+            run.rows_read = len(parsed_data)
+            run.rows_inserted = new_const + new_wards
+            run.rows_updated = changed_const + changed_wards
+            run.rows_unchanged = unchanged_const + unchanged_wards
+            # Units whose parent is missing can load once it is
+            run.rows_failed = skipped_const + skipped_wards
         
         # Final counts
         cur.execute("SELECT COUNT(*) FROM counties")
@@ -271,14 +271,23 @@ def import_to_production(csv_path: str):
         traceback.print_exc()
         conn.rollback()
         sys.exit(1)
+    finally:
+        if not conn.closed:
+            conn.close()
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import constituencies and wards to production')
+    parser.add_argument('--force', action='store_true', help='Re-import even if this file was already imported')
+    parser.add_argument('--full-reload', action='store_true',
+                        help='Delete all constituencies and wards before importing')
+    args = parser.parse_args()
+    
     csv_path = Path(__file__).parent.parent / 'data' / 'rov_per_polling_station.csv'
     
     if not csv_path.exists():
         print(f"❌ Error: CSV file not found: {csv_path}")
         sys.exit(1)
     
-    import_to_production(str(csv_path))
+    import_to_production(str(csv_path), force=args.force, full_reload=args.full_reload)
 
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Single-pass loader for the IEBC register of voters
+
+Stages the parsed register (iebc_register.iter_register) into a temp table
+with one COPY, then upserts the whole hierarchy from it with set-based SQL
+in dependency order:
+
+    counties -> constituencies -> wards -> registration centres -> polling stations
+
+and recomputes the registered-voter rollups (centres, wards, constituencies,
+counties) from the stored stations. Stations left without a ward by older
+loads but with a location get one from the ward polygon containing them. Everything runs in the caller's
+transaction, so a national import either lands completely or not at all.
+
+Rows are matched on their IEBC codes. Existing names are never overwritten
+(counties carry curated names such as "Nairobi" for "NAIROBI CITY"); only
+missing rows are inserted, parent links and voter counts are updated where
+they differ, and unchanged rows are not rewritten.
+
+The row-level rollup triggers from migration 002 would re-sum a parent for
+every station written, so user triggers on the loaded tables are disabled
+for the transaction and the rollups are done once, set-based, at the end.
+ALTER TABLE is transactional: if the load fails, the triggers come back
+with the rollback. Disabling user triggers also silences the data_versions
+statement triggers (migration 011), so the loader bumps those versions
+itself before re-enabling them; API caches keyed on them are invalidated.
+
+Requires the registration_centers/polling_stations tables from
+database/migrations/002_add_polling_stations_fixed.sql.
+
+Usage:
+    from register_loader import load_register
+
+    conn = engine.raw_connection()   # or psycopg2.connect(...)
+    counts = load_register(conn, 'data/rov_per_polling_station.csv')
+    conn.commit()
+"""
+import csv
+import io
+import time
+from pathlib import Path
+from typing import Dict, Union
+
+from iebc_register import iter_register
+
+# Register "counties" that are not part of the geographic hierarchy
+SPECIAL_COUNTIES = ('DIASPORA', 'PRISONS')
+
+# Tables whose row-level rollup triggers are suspended during the load
+TRIGGER_TABLES = ('polling_stations', 'wards', 'constituencies')
+
+# What bump_data_version() (migration 011) does, for tables whose triggers are disabled
+_BUMP_DATA_VERSION_SQL = """
+    INSERT INTO data_versions (table_name, version, updated_at)
+    VALUES (%s, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name) DO UPDATE
+        SET version = data_versions.version + 1,
+            updated_at = CURRENT_TIMESTAMP
+"""
+
+STAGING_COLUMNS = (
+    'county_code', 'county_name', 'const_code', 'const_name', 'ward_code', 'ward_name',
+    'reg_center_code', 'reg_center_name', 'ps_code', 'ps_name', 'voters'
+)
+
+_CREATE_STAGING = """
+    CREATE TEMP TABLE staging_register (
+        county_code text,
+        county_name text,
+        const_code text,
+        const_name text,
+        ward_code text,
+        ward_name text,
+        reg_center_code text,
+        reg_center_name text,
+        ps_code text,
+        ps_name text,
+        voters integer
+    ) ON COMMIT DROP
+"""
+
+# Each step returns one row per written row: TRUE if inserted, FALSE if updated.
+# Parents are resolved with lpad() because older loads stored unpadded codes ('1' for '001').
+_UPSERT_STEPS = [
+    ('counties', """
+        INSERT INTO counties (code, name)
+        SELECT DISTINCT ON (s.county_code) s.county_code, initcap(s.county_name)
+        FROM staging_register s
+        WHERE s.county_name <> ''
+          AND NOT EXISTS (SELECT 1 FROM counties co WHERE lpad(co.code, 3, '0') = s.county_code)
+        ORDER BY s.county_code
+        RETURNING TRUE
+    """),
+    ('constituencies', """
+        WITH src AS (
+            SELECT DISTINCT ON (s.const_code) s.const_code, s.const_name, co.id AS county_id
+            FROM staging_register s
+            JOIN counties co ON lpad(co.code, 3, '0') = s.county_code
+            ORDER BY s.const_code, (s.const_name = '')
+        ),
+        updated AS (
+            UPDATE constituencies c
+            SET county_id = src.county_id, updated_at = CURRENT_TIMESTAMP
+            FROM src
+            WHERE lpad(c.code, 3, '0') = src.const_code
+              AND c.county_id IS DISTINCT FROM src.county_id
+            RETURNING FALSE
+        ),
+        inserted AS (
+            INSERT INTO constituencies (code, name, county_id)
+            SELECT src.const_code, src.const_name, src.county_id
+            FROM src
+            WHERE NOT EXISTS (SELECT 1 FROM constituencies c WHERE lpad(c.code, 3, '0') = src.const_code)
+            RETURNING TRUE
+        )
+        SELECT * FROM updated UNION ALL SELECT * FROM inserted
+    """),
+    ('wards', """
+        INSERT INTO wards (code, name, constituency_id)
+        SELECT DISTINCT ON (s.ward_code) s.ward_code, s.ward_name, c.id
+        FROM staging_register s
+        JOIN constituencies c ON lpad(c.code, 3, '0') = s.const_code
+        ORDER BY s.ward_code, (s.ward_name = '')
+        ON CONFLICT (code) DO UPDATE SET
+            constituency_id = EXCLUDED.constituency_id,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE wards.constituency_id IS DISTINCT FROM EXCLUDED.constituency_id
+        RETURNING (xmax = 0)
+    """),
+    # Centre codes are only unique within a ward, and the table has no unique key to upsert on
+    ('registration_centers', """
+        INSERT INTO registration_centers (code, name, ward_id, constituency_id, county_id)
+        SELECT DISTINCT ON (w.id, s.reg_center_code)
+               s.reg_center_code, left(s.reg_center_name, 255), w.id, w.constituency_id, c.county_id
+        FROM staging_register s
+        JOIN wards w ON w.code = s.ward_code
+        JOIN constituencies c ON c.id = w.constituency_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM registration_centers rc
+            WHERE rc.ward_id = w.id AND rc.code = s.reg_center_code
+        )
+        ORDER BY w.id, s.reg_center_code, (s.reg_center_name = '')
+        RETURNING TRUE
+    """),
+    ('polling_stations', """
+        INSERT INTO polling_stations
+            (code, name, ward_id, constituency_id, county_id, registration_center_id, registered_voters_2022)
+        SELECT DISTINCT ON (s.ps_code)
+               s.ps_code, left(s.ps_name, 200), w.id, w.constituency_id, c.county_id, rc.id, s.voters
+        FROM staging_register s
+        JOIN wards w ON w.code = s.ward_code
+        JOIN constituencies c ON c.id = w.constituency_id
+        LEFT JOIN registration_centers rc ON rc.ward_id = w.id AND rc.code = s.reg_center_code
+        ORDER BY s.ps_code, rc.id
+        ON CONFLICT (code) DO UPDATE SET
+            registered_voters_2022 = EXCLUDED.registered_voters_2022,
+            ward_id = EXCLUDED.ward_id,
+            constituency_id = EXCLUDED.constituency_id,
+            county_id = EXCLUDED.county_id,
+            registration_center_id = EXCLUDED.registration_center_id,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE (polling_stations.registered_voters_2022, polling_stations.ward_id,
+               polling_stations.constituency_id, polling_stations.county_id,
+               polling_stations.registration_center_id)
+          IS DISTINCT FROM
+              (EXCLUDED.registered_voters_2022, EXCLUDED.ward_id,
+               EXCLUDED.constituency_id, EXCLUDED.county_id,
+               EXCLUDED.registration_center_id)
+        RETURNING (xmax = 0)
+    """),
+]
+
+# Stations without a ward (older loads) but with a POINT: take the ward whose polygon
+# contains them (GIST index on wards.geometry; lowest ward id on shared borders)
+_BACKFILL_WARD_SQL = """
+    UPDATE polling_stations ps
+    SET ward_id = m.ward_id, constituency_id = m.constituency_id, county_id = m.county_id,
+        updated_at = CURRENT_TIMESTAMP
+    FROM (
+        SELECT ps.id, w.id AS ward_id, w.constituency_id, c.county_id
+        FROM polling_stations ps
+        CROSS JOIN LATERAL (
+            SELECT w.id, w.constituency_id FROM wards w
+            WHERE w.geometry IS NOT NULL AND ST_Intersects(w.geometry, ps.geometry)
+            ORDER BY w.id
+            LIMIT 1
+        ) w
+        JOIN constituencies c ON c.id = w.constituency_id
+        WHERE ps.ward_id IS NULL AND ps.geometry IS NOT NULL
+    ) m
+    WHERE ps.id = m.id
+"""
+
+# Rollups bottom-up from the stored stations; only totals that differ are rewritten
+_ROLLUP_STEPS = [
+    ('registration_centers', """
+        UPDATE registration_centers rc
+        SET total_registered_voters = t.voters, total_polling_stations = t.stations,
+            updated_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT rc.id, COALESCE(SUM(ps.registered_voters_2022), 0) AS voters, COUNT(ps.id) AS stations
+            FROM registration_centers rc
+            LEFT JOIN polling_stations ps ON ps.registration_center_id = rc.id
+            GROUP BY rc.id
+        ) t
+        WHERE rc.id = t.id
+          AND (rc.total_registered_voters, rc.total_polling_stations) IS DISTINCT FROM (t.voters, t.stations::integer)
+    """),
+    ('wards', """
+        UPDATE wards w
+        SET registered_voters_2022 = t.voters
+        FROM (
+            SELECT w.id, COALESCE(SUM(ps.registered_voters_2022), 0) AS voters
+            FROM wards w
+            LEFT JOIN polling_stations ps ON ps.ward_id = w.id
+            GROUP BY w.id
+        ) t
+        WHERE w.id = t.id AND w.registered_voters_2022 IS DISTINCT FROM t.voters
+    """),
+    ('constituencies', """
+        UPDATE constituencies c
+        SET registered_voters_2022 = t.voters
+        FROM (
+            SELECT c.id, COALESCE(SUM(w.registered_voters_2022), 0) AS voters
+            FROM constituencies c
+            LEFT JOIN wards w ON w.constituency_id = c.id
+            GROUP BY c.id
+        ) t
+        WHERE c.id = t.id AND c.registered_voters_2022 IS DISTINCT FROM t.voters
+    """),
+    ('counties', """
+        UPDATE counties co
+        SET registered_voters_2022 = t.voters
+        FROM (
+            SELECT co.id, COALESCE(SUM(c.registered_voters_2022), 0) AS voters
+            FROM counties co
+            LEFT JOIN constituencies c ON c.county_id = co.id
+            GROUP BY co.id
+        ) t
+        WHERE co.id = t.id AND co.registered_voters_2022 IS DISTINCT FROM t.voters
+    """),
+]
+
+
+def _register_csv(csv_path: Union[str, Path], stats: Dict[str, int]) -> io.StringIO:
+    """Parsed register as an in-memory CSV buffer ready for COPY"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    stats['special'] = 0
+    for record in iter_register(csv_path, stats=stats):
+        if record.county_name in SPECIAL_COUNTIES:
+            stats['special'] += 1
+            continue
+        writer.writerow((
+            record.county_code, record.county_name, record.const_code, record.const_name,
+            # Ward codes repeat across constituencies, so wards are keyed const-ward (max 20 chars)
+            f"{record.const_code}-{record.ward_code}"[:20], record.ward_name,
+            record.reg_center_code, record.reg_center_name,
+            record.ps_code, record.ps_name, record.registered_voters
+        ))
+    buffer.seek(0)
+    return buffer
+
+
+def load_register(conn, csv_path: Union[str, Path], run=None, verbose: bool = True) -> Dict[str, Dict[str, int]]:
+    """
+    Stage and upsert the 2022 register in the caller's open transaction
+
+    Args:
+        conn: psycopg2 connection (not committed here)
+        csv_path: Register file (data/rov_per_polling_station.csv)
+        run: Optional IngestionRun; station counts are recorded on it
+        verbose: Print per-step timings
+
+    Returns:
+        {'parse': parse stats, '<table>': {'inserted': n, 'updated': n}, ...}
+    """
+    def log(message):
+        if verbose:
+            print(message)
+
+    started = time.perf_counter()
+    parse_stats = {}
+    buffer = _register_csv(csv_path, parse_stats)
+    log(f"📄 Parsed {parse_stats['records']:,} stations from {parse_stats['lines']:,} lines "
+        f"({parse_stats['rejected']:,} unparseable, {parse_stats['special']:,} diaspora/prisons) "
+        f"in {time.perf_counter() - started:.1f}s")
+
+    counts = {'parse': parse_stats}
+    with conn.cursor() as cur:
+        cur.execute("SET LOCAL synchronous_commit TO OFF")
+        for table in TRIGGER_TABLES:
+            cur.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
+
+        step_started = time.perf_counter()
+        cur.execute(_CREATE_STAGING)
+        cur.copy_expert(
+            f"COPY staging_register ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+        cur.execute("CREATE INDEX ON staging_register (ward_code)")
+        cur.execute("ANALYZE staging_register")
+        cur.execute("SELECT COUNT(*), COUNT(DISTINCT ps_code) FROM staging_register")
+        staged, distinct_stations = cur.fetchone()
+        log(f"📥 Staged {staged:,} rows with COPY in {time.perf_counter() - step_started:.2f}s")
+
+        for table, sql in _UPSERT_STEPS:
+            step_started = time.perf_counter()
+            cur.execute(sql)
+            written = [row[0] for row in cur.fetchall()]
+            inserted = sum(written)
+            counts[table] = {'inserted': inserted, 'updated': len(written) - inserted}
+            log(f"   {table:<22} {inserted:>7,} inserted {len(written) - inserted:>7,} updated "
+                f"({time.perf_counter() - step_started:.2f}s)")
+
+        step_started = time.perf_counter()
+        cur.execute(_BACKFILL_WARD_SQL)
+        counts['polling_stations']['ward_backfilled'] = cur.rowcount
+        if cur.rowcount:
+            log(f"📍 Assigned wards to {cur.rowcount:,} located stations "
+                f"({time.perf_counter() - step_started:.2f}s)")
+
+        step_started = time.perf_counter()
+        for table, sql in _ROLLUP_STEPS:
+            cur.execute(sql)
+            counts[table]['rollups'] = cur.rowcount
+        log(f"📊 Voter rollups recomputed in {time.perf_counter() - step_started:.2f}s")
+
+        for table in TRIGGER_TABLES:
+            cur.execute(_BUMP_DATA_VERSION_SQL, (table,))
+            cur.execute(f"ALTER TABLE {table} ENABLE TRIGGER USER")
+
+        cur.execute("""
+            SELECT COUNT(DISTINCT s.ps_code) FROM staging_register s
+            WHERE NOT EXISTS (SELECT 1 FROM polling_stations ps WHERE ps.code = s.ps_code)
+        """)
+        unresolved = cur.fetchone()[0]
+
+    stations = counts['polling_stations']
+    counts['polling_stations']['unchanged'] = distinct_stations - unresolved - stations['inserted'] - stations['updated']
+    counts['polling_stations']['unresolved'] = unresolved
+
+    if run is not None:
+        run.rows_read = parse_stats['lines']
+        run.rows_inserted = stations['inserted']
+        run.rows_updated = stations['updated']
+        run.rows_unchanged = stations['unchanged']
+        run.rows_skipped = parse_stats['rejected'] + parse_stats['special'] + unresolved
+
+    log(f"⏱️  Register loaded in {time.perf_counter() - started:.1f}s (not yet committed)")
+    return counts
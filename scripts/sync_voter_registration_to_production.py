@@ -2,6 +2,9 @@
 """
 Sync voter registration data from local database to production.
 This ensures production has the correct registered_voters_2022 counts.
+
+Superseded by scripts/sync_to_production.py, which transfers only changed
+rows (all columns, not just voter counts) and can resume and dry-run.
 """
 
 import psycopg2